@@ -181,8 +181,6 @@ def accept_team_invitation(
     For users who already have an account and are logged in.
     Validates that the invitation email matches the current user's email.
     """
-    from uuid import UUID
-    
     # Validate the token
     payload = InvitationService.validate_invitation_token(invitation_token)
     if not payload:
@@ -220,9 +218,7 @@ def accept_team_invitation(
         )
     
     # Check if user is already a member
-    members = TeamService.get_team_members(session, team_id)
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    if any(m.user_id == user_uuid for m in members):
+    if TeamService.is_member(session, team_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are already a member of this team"
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
 
 from ..core.database import get_session
-from ..core.security import get_current_user_id
+from ..core.security import get_current_user_id, require_team_member
 from ..services.team import TeamService
 from ..services.budget import BudgetService
 from ..models.schemas import TeamMember
@@ -17,19 +17,9 @@ router = APIRouter()
 def get_team_budget_status(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get budget status for all team members."""
-    # Verify user is a team member
-    from uuid import UUID
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     budget_status = BudgetService.get_member_budget_status(session, team_id)
     return {"budget_status": budget_status}
 
@@ -38,19 +28,9 @@ def get_team_budget_status(
 def get_team_budget_insights(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get team budget insights and recommendations."""
-    # Verify user is a team member
-    from uuid import UUID
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     insights = BudgetService.get_budget_insights(session, team_id)
     return insights
 
@@ -139,19 +119,9 @@ def suggest_optimal_payer(
     team_id: str,
     request_data: Dict,  # {"amount": float}
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get optimal payer suggestion for an expense amount."""
-    # Verify user is a team member
-    from uuid import UUID
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     expense_amount = request_data.get("amount")
     if expense_amount is None or expense_amount <= 0:
         raise HTTPException(
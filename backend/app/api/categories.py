@@ -2,17 +2,15 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
-from uuid import UUID
 
 from app.core.database import get_session
-from app.core.security import get_current_user_id
+from app.core.security import require_team_member
 from app.models.schemas import (
     ExpenseCategoryResponse,
     TeamCustomCategoryResponse,
     TeamCustomCategoryCreate
 )
 from app.services.category import ExpenseCategoryService
-from app.services.team import TeamService
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -29,18 +27,9 @@ def get_default_categories(
 def get_team_categories(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get all categories (default + custom) for a team."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     return ExpenseCategoryService.get_all_team_categories(session, team_id)
 
 
@@ -49,18 +38,9 @@ def create_team_custom_category(
     team_id: str,
     category_data: TeamCustomCategoryCreate,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Create a new custom category for a team."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     try:
         return ExpenseCategoryService.create_team_custom_category(
             session,
@@ -81,18 +61,9 @@ def delete_team_custom_category(
     team_id: str,
     category_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Delete a team custom category."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     try:
         success = ExpenseCategoryService.delete_team_custom_category(
             session,
@@ -1,34 +1,78 @@
 """Expense API endpoints."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+import csv
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
 
 from app.core.database import get_session
-from app.core.security import get_current_user_id
-from app.models.schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse, Team
+from app.core.etag import not_modified_response
+from app.core.idempotency import remember_response, replay_or_claim
+from app.core.responses import fast_json_response
+from app.core.streaming import iter_json_array, streaming_json_response
+from app.core.security import get_current_user_id, require_team_member
+from app.models.schemas import (
+    ExpenseBatchRequest, ExpenseBatchResponse, ExpenseChangesResponse, ExpenseCreate, ExpenseUpdate,
+    ExpenseResponse, Team
+)
 from app.services.expense import ExpenseService
+from app.services.expense_batch import ExpenseBatchService, ExpenseMutationError, MAX_BATCH_MUTATIONS
+from app.services.expense_export import ExpenseExportService, EXPORT_MEDIA_TYPES
+from app.services.expense_import import ExpenseImportService, IMPORT_FORMATS
+from app.services.expense_report import ExpenseReportService, REPORT_PERIODS
 from app.services.team import TeamService
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
 
+def expense_fields(fields: Optional[str] = None) -> Optional[Dict[str, Tuple[str, ...]]]:
+    """Parse the `fields=` sparse fieldset of the expense read endpoints.
+    
+    e.g. `fields=total_amount,payer_id,note,category.emoji`. Only the named
+    response fields are returned, and only the columns they need are read.
+    """
+    try:
+        return ExpenseService.parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
 @router.post("", response_model=ExpenseResponse)
 def create_expense(
     expense_data: ExpenseCreate,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create a new expense."""
+    """Create a new expense.
+    
+    Retries that repeat the same `Idempotency-Key` get the first response
+    back without creating another expense.
+    """
     # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, str(expense_data.team_id))
-    if not any(m.user_id == user_uuid for m in members):
+    if not TeamService.is_member(session, expense_data.team_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this team"
         )
     
+    # Shares are fixed when the expense is written, so participants must be members
+    member_ids = TeamService.get_member_ids(session, str(expense_data.team_id), expense_data.participants)
+    if not all(p in member_ids for p in expense_data.participants):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All participants must be team members"
+        )
+    
+    replay = replay_or_claim(session, user_id, idempotency_key, "POST /expenses", expense_data)
+    if replay:
+        return replay
+    
     expense = ExpenseService.create_expense(
         session,
         str(expense_data.team_id),
@@ -37,58 +81,233 @@ def create_expense(
         expense_data.participants,
         expense_data.category_id,
         expense_data.team_category_id,
-        expense_data.note
+        expense_data.note,
+        commit=False
     )
     
-    return ExpenseService.enrich_expense_with_categories(session, expense)
+    # The stored response is committed together with the expense
+    response = ExpenseService.enrich_expense_with_categories(session, expense)
+    remember_response(session, user_id, idempotency_key, "POST /expenses", response)
+    session.commit()
+    return response
+
+
+@router.post("/{team_id}/batch", response_model=ExpenseBatchResponse)
+def apply_expense_batch(
+    team_id: str,
+    batch: ExpenseBatchRequest,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Apply an ordered list of expense creates, updates and deletes atomically.
+    
+    Meant for clients syncing changes made offline: membership is checked
+    once, the changes are committed together, and if any one of them fails
+    none are applied and the error names the failing operation's index.
+    """
+    if len(batch.operations) > MAX_BATCH_MUTATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {MAX_BATCH_MUTATIONS} operations"
+        )
+    
+    try:
+        results = ExpenseBatchService.apply_mutations(session, team_id, user_id, batch.operations)
+    except ExpenseMutationError as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail={"index": exc.index, "message": exc.detail}
+        )
+    
+    return {"results": results}
+
+
+@router.post("/{team_id}/import")
+def import_team_expenses(
+    team_id: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Bulk-import expenses from a CSV or NDJSON upload.
+    
+    The format comes from `format` or the file name / content type. Payers
+    and participants may be any team members (by user ID or email), so
+    groups can bring over history recorded elsewhere. Valid rows are
+    committed in batches; invalid rows are skipped and reported by line.
+    If the file turns out unreadable after batches were committed, the
+    rows before that point stay imported and `error` names the line the
+    import stopped at.
+    """
+    import_format = format or ExpenseImportService.detect_format(file.filename, file.content_type)
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported import format. Use one of: {', '.join(IMPORT_FORMATS)}"
+        )
+    
+    try:
+        return ExpenseImportService.import_expenses(session, team_id, file.file, import_format)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ExpenseImportService.describe_stream_error(exc)
+        )
+
+
+@router.get("/{team_id}/export")
+def export_team_expenses(
+    team_id: str,
+    format: str = "csv",
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Stream a team's full expense history as CSV or NDJSON, oldest first.
+    
+    Rows are written as they come off the database cursor, so memory use
+    does not depend on the team's history length. The columns can be fed
+    back into the import endpoint.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    
+    return StreamingResponse(
+        ExpenseExportService.iter_export(session, team_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="expenses-{team_id}.{format}"'}
+    )
+
+
+@router.get("/{team_id}/report")
+def get_team_expense_report(
+    team_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    period: str = "day",
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Get expense totals by category, payer, participant and day or week.
+    
+    `start` (inclusive) and `end` (exclusive) limit the report to a date
+    range; `period` is "day" or "week".
+    """
+    if period not in REPORT_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported period. Use one of: {', '.join(REPORT_PERIODS)}"
+        )
+    
+    return ExpenseReportService.get_team_report(session, team_id, start, end, period)
+
+
+@router.get("/{team_id}/changes", response_model=ExpenseChangesResponse)
+def list_team_expense_changes(
+    team_id: str,
+    since: int = 0,
+    after: Optional[UUID] = None,
+    snapshot_seq: Optional[int] = None,
+    limit: int = 500,
+    fields: Optional[Dict[str, Tuple[str, ...]]] = Depends(expense_fields),
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Get expenses created, updated or deleted since the client's last sync.
+    
+    Start with `since=0` for a full sync, then pass back the returned `seq`
+    (and `after` and `snapshot_seq` while `has_more` is true). Deleted
+    expenses come back as tombstones in `deleted`. `fields` narrows the
+    changed expenses.
+    """
+    if since < 0 or limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be 0 or more and limit at least 1"
+        )
+    
+    changes = ExpenseService.get_team_changes(
+        session, team_id, since, after, min(limit, 1000), validate=False, fields=fields,
+        snapshot_seq=snapshot_seq
+    )
+    return fast_json_response(changes)
 
 
 @router.get("/{team_id}", response_model=List[ExpenseResponse])
 def list_team_expenses(
     team_id: str,
+    request: Request,
+    response: Response,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    participant_id: Optional[str] = None,
+    fields: Optional[Dict[str, Tuple[str, ...]]] = Depends(expense_fields),
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
-    """Get all expenses for a team."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
+    """Get a team's expenses newest first, optionally only those `participant_id` takes part in.
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the
+    next page; the header is absent on the last page. The page is streamed
+    as rows come off the database cursor, gzip/brotli compressed when the
+    client accepts it. `fields` limits each expense to the named fields.
+    """
+    if limit < 1:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be at least 1"
         )
     
-    expenses = ExpenseService.get_enriched_team_expenses(session, team_id, limit, offset)
-    return expenses
+    # Clients polling with a current ETag get a 304 without a reload
+    not_modified = not_modified_response(session, team_id, request, response)
+    if not_modified:
+        return not_modified
+    
+    # The next cursor goes in a header, so find it before streaming the rows
+    try:
+        next_cursor = ExpenseService.get_next_cursor(session, team_id, limit, offset, participant_id, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    expenses = ExpenseService.iter_enriched_team_expenses(
+        session, team_id, limit, offset, participant_id, cursor, fields=fields
+    )
+    return streaming_json_response(request, iter_json_array(expenses), response)
 
 
 @router.get("/{team_id}/{expense_id}", response_model=ExpenseResponse)
 def get_expense(
     team_id: str,
     expense_id: str,
+    fields: Optional[Dict[str, Tuple[str, ...]]] = Depends(expense_fields),
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
-    """Get expense details."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
+    """Get expense details, or only the named `fields` of them.
     
-    expense = ExpenseService.get_expense(session, expense_id)
+    Expenses of other teams are a 404, as membership is only checked for `team_id`.
+    """
+    if fields is not None:
+        expense = ExpenseService.get_expense_fields(session, expense_id, fields, team_id)
+    else:
+        expense = ExpenseService.get_expense(session, expense_id, team_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Expense not found"
         )
     
+    if fields is not None:
+        return fast_json_response(expense)
     return ExpenseService.enrich_expense_with_categories(session, expense)
 
 
@@ -109,9 +328,7 @@ def update_expense(
         )
     
     # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, str(expense.team_id))
-    if not any(m.user_id == user_uuid for m in members):
+    if not TeamService.is_member(session, expense.team_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this team"
@@ -124,6 +341,14 @@ def update_expense(
             detail="You can only edit expenses you created"
         )
     
+    if expense_data.participants is not None:
+        member_ids = TeamService.get_member_ids(session, str(expense.team_id), expense_data.participants)
+        if not all(p in member_ids for p in expense_data.participants):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="All participants must be team members"
+            )
+    
     # Update the expense
     updated_expense = ExpenseService.update_expense(
         session,
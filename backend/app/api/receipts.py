@@ -0,0 +1,151 @@
+"""Expense receipt API endpoints."""
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.core.database import get_session
+from app.core.files import file_response
+from app.core.security import require_team_member
+from app.models.schemas import Expense, ExpenseReceipt, ExpenseReceiptResponse, Team
+from app.services.receipt import ReceiptService, ReceiptTooLarge, UnsupportedReceiptType
+
+router = APIRouter(prefix="/expenses", tags=["receipts"])
+
+
+def _get_team_expense(session: Session, team_id: str, expense_id: UUID) -> Expense:
+    """Get a live expense of the team or raise 404."""
+    expense = session.exec(
+        select(Expense).where(
+            (Expense.id == expense_id) &
+            (Expense.team_id == UUID(team_id)) &
+            Expense.deleted_at.is_(None)
+        )
+    ).first()
+    if not expense:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found"
+        )
+    return expense
+
+
+def _get_receipt(session: Session, team_id: str, expense_id: UUID, receipt_id: UUID) -> ExpenseReceipt:
+    """Get a receipt of a live team expense or raise 404."""
+    _get_team_expense(session, team_id, expense_id)
+    receipt = ReceiptService.get_receipt(session, expense_id, receipt_id)
+    if not receipt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found"
+        )
+    return receipt
+
+
+@router.post("/{team_id}/{expense_id}/receipts", response_model=ExpenseReceiptResponse)
+def upload_receipt(
+    team_id: str,
+    expense_id: UUID,
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Attach a receipt photo or PDF to an expense.
+
+    Identical files are stored once, however many expenses they are
+    attached to.
+    """
+    _get_team_expense(session, team_id, expense_id)
+    try:
+        return ReceiptService.create_receipt(session, expense_id, user_id, file.file, file.filename)
+    except ReceiptTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(exc)
+        )
+    except UnsupportedReceiptType as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(exc)
+        )
+
+
+@router.get("/{team_id}/{expense_id}/receipts", response_model=List[ExpenseReceiptResponse])
+def list_receipts(
+    team_id: str,
+    expense_id: UUID,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """List an expense's receipts, oldest first."""
+    _get_team_expense(session, team_id, expense_id)
+    return ReceiptService.get_expense_receipts(session, expense_id)
+
+
+@router.get("/{team_id}/{expense_id}/receipts/{receipt_id}")
+def download_receipt(
+    team_id: str,
+    expense_id: UUID,
+    receipt_id: UUID,
+    request: Request,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Download a receipt file.
+
+    Supports Range requests, and If-None-Match with the file's SHA-256 as
+    its ETag; the file never changes, so clients may cache it indefinitely.
+    """
+    receipt = _get_receipt(session, team_id, expense_id, receipt_id)
+    return file_response(
+        request,
+        ReceiptService.blob_path(receipt.sha256),
+        receipt.content_type,
+        f'"{receipt.sha256}"',
+        filename=receipt.filename
+    )
+
+
+@router.get("/{team_id}/{expense_id}/receipts/{receipt_id}/thumbnail")
+def get_receipt_thumbnail(
+    team_id: str,
+    expense_id: UUID,
+    receipt_id: UUID,
+    request: Request,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Get a JPEG thumbnail of an image receipt, generated on first request and cached."""
+    receipt = _get_receipt(session, team_id, expense_id, receipt_id)
+    path = ReceiptService.get_thumbnail(receipt)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No thumbnail available for this receipt"
+        )
+
+    size = get_settings().RECEIPT_THUMBNAIL_SIZE
+    return file_response(request, path, "image/jpeg", f'"{receipt.sha256}-{size}"')
+
+
+@router.delete("/{team_id}/{expense_id}/receipts/{receipt_id}")
+def delete_receipt(
+    team_id: str,
+    expense_id: UUID,
+    receipt_id: UUID,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Remove a receipt; allowed for its uploader, the expense payer and the team owner."""
+    receipt = _get_receipt(session, team_id, expense_id, receipt_id)
+    expense = session.get(Expense, expense_id)
+    team = session.get(Team, expense.team_id)
+    if user_id not in (str(receipt.uploaded_by), str(expense.payer_id), str(team.created_by)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You cannot delete this receipt"
+        )
+
+    ReceiptService.delete_receipt(session, receipt)
+    return {"message": "Receipt deleted"}
@@ -0,0 +1,85 @@
+"""Recurring expense API endpoints."""
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import Session
+
+from app.core.database import get_session
+from app.core.security import require_team_member
+from app.models.schemas import RecurringExpenseCreate, RecurringExpenseResponse, Team
+from app.services.recurring_expense import RecurringExpenseService
+from app.services.team import TeamService
+
+router = APIRouter(prefix="/recurring-expenses", tags=["recurring-expenses"])
+
+
+@router.post("/{team_id}", response_model=RecurringExpenseResponse)
+def create_recurring_expense(
+    team_id: str,
+    data: RecurringExpenseCreate,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Create an expense that repeats daily, weekly or monthly, paid by the current user.
+
+    Occurrences already due (a `start_at` in the past included) are created
+    straight away; later ones are created by the scheduler as they fall due.
+    """
+    member_ids = TeamService.get_member_ids(session, team_id, data.participants)
+    if not data.participants or not all(p in member_ids for p in data.participants):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All participants must be team members"
+        )
+
+    try:
+        template = RecurringExpenseService.create_recurring_expense(session, team_id, user_id, data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    RecurringExpenseService.materialize_due(session, team_id=team_id)
+    session.refresh(template)
+    return RecurringExpenseService.to_response(template, list(dict.fromkeys(data.participants)))
+
+
+@router.get("/{team_id}", response_model=List[RecurringExpenseResponse])
+def list_recurring_expenses(
+    team_id: str,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """List a team's recurring expenses, including stopped ones."""
+    return RecurringExpenseService.get_team_recurring_expenses(session, team_id)
+
+
+@router.delete("/{team_id}/{recurring_id}", response_model=RecurringExpenseResponse)
+def stop_recurring_expense(
+    team_id: str,
+    recurring_id: UUID,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Stop a recurring expense; the payer or team owner may do this.
+
+    Expenses it has already created stay in place.
+    """
+    template = RecurringExpenseService.get_recurring_expense(session, team_id, recurring_id)
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring expense not found"
+        )
+
+    team = session.get(Team, template.team_id)
+    if user_id not in (str(template.payer_id), str(team.created_by)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You cannot stop this recurring expense"
+        )
+
+    template = RecurringExpenseService.stop_recurring_expense(session, template)
+    participants = RecurringExpenseService.get_participants_by_template(session, [template.id])
+    return RecurringExpenseService.to_response(template, participants[template.id])
@@ -1,12 +1,13 @@
 """Settlement request API endpoints."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from sqlmodel import Session, select
-from uuid import UUID
 
 from app.core.database import get_session
-from app.core.security import get_current_user_id
-from app.services.team import TeamService
+from app.core.idempotency import remember_response, replay_or_claim
+from app.core.responses import dumps
+from app.core.streaming import iter_json_array, streaming_json_response
+from app.core.security import get_current_user_id, require_team_member
 from app.services.settlement_request import SettlementRequestService
 from app.models.schemas import CreateSettlementRequest, ApproveSettlementRequest
 
@@ -18,17 +19,18 @@ def create_settlement_request(
     team_id: str,
     request: CreateSettlementRequest,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create a new settlement request."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
+    """Create a new settlement request.
+    
+    Retries that repeat the same `Idempotency-Key` get the first response
+    back without creating another request or sending another email.
+    """
+    scope = f"POST /settlements/{team_id}/create"
+    replay = replay_or_claim(session, user_id, idempotency_key, scope, request)
+    if replay:
+        return replay
     
     try:
         settlement = SettlementRequestService.create_settlement_request(
@@ -37,26 +39,37 @@ def create_settlement_request(
             from_user_id=user_id,
             to_user_id=request.to_user_id,
             amount=request.amount,
-            message=request.message
+            message=request.message,
+            commit=False
         )
         
-        return {
+        response = {
             "settlement_id": str(settlement.id),
             "message": "Settlement request created successfully",
             "status": settlement.status,
             "expires_at": settlement.expires_at
         }
+        # The stored response is committed together with the settlement, so
+        # a claim is never left committed without one
+        remember_response(session, user_id, idempotency_key, scope, response)
+        session.commit()
     
     except ValueError as e:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except Exception as e:
+        # Releases the idempotency claim, so a retry runs again
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create settlement request"
         )
+    
+    SettlementRequestService.send_settlement_request_email(session, settlement)
+    return response
 
 
 @router.post("/approve")
@@ -95,34 +108,31 @@ def approve_settlement(
 @router.get("/{team_id}/requests")
 def get_user_settlement_requests(
     team_id: str,
+    request: Request,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
-    """Get all settlement requests for the current user in a team."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
+    """Get all settlement requests for the current user in a team.
     
-    try:
-        settlement_requests = SettlementRequestService.get_user_settlement_requests(
-            session=session,
-            team_id=team_id,
-            user_id=user_id
-        )
-        
-        return {
-            "team_id": team_id,
-            "settlement_requests": settlement_requests,
-            "total_requests": len(settlement_requests)
-        }
+    The list is streamed as rows are read, with `total_requests` written
+    after it, and compressed when the client accepts it.
+    """
+    settlement_requests = SettlementRequestService.iter_user_settlement_requests(
+        session=session,
+        team_id=team_id,
+        user_id=user_id
+    )
+    total = 0
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve settlement requests"
-        )
\ No newline at end of file
+    def counted():
+        nonlocal total
+        for settlement_request in settlement_requests:
+            total += 1
+            yield settlement_request
+    
+    body = iter_json_array(
+        counted(),
+        prefix=b'{"team_id":' + dumps(team_id) + b',"settlement_requests":',
+        suffix=lambda: b',"total_requests":' + dumps(total) + b"}"
+    )
+    return streaming_json_response(request, body)
\ No newline at end of file
@@ -1,17 +1,15 @@
 """Summary and analytics API endpoints."""
 from typing import List, Dict
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request, Response
 from sqlmodel import Session
-from uuid import UUID
 
 from app.core.database import get_session
-from app.core.security import get_current_user_id
-from app.services.team import TeamService
-from app.services.expense import ExpenseService
-from app.services.settlement import (
-    calculate_balances, calculate_settlements, calculate_next_payer,
-    calculate_budget_balances, Settlement
-)
+from app.core.etag import not_modified_response
+from app.core.security import require_team_member
+from app.services.balance import BalanceService
+from app.services.budget import BudgetService
+from app.services.ledger import from_minor
+from app.services.settlement import calculate_next_payer
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
@@ -19,45 +17,26 @@ router = APIRouter(prefix="/summary", tags=["summary"])
 @router.get("/{team_id}/balances")
 def get_team_balances(
     team_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get remaining budget balances for each team member."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
+    # Clients polling with a current ETag get a 304 without a recompute
+    not_modified = not_modified_response(session, team_id, request, response)
+    if not_modified:
+        return not_modified
     
-    # Get all expenses for the team
-    expenses = ExpenseService.get_team_expenses(session, team_id, limit=10000)
-    
-    # Parse expenses into format expected by budget calculator
-    expense_list = []
-    team_member_ids = [str(m.user_id) for m in members]
-    
-    for expense in expenses:
-        participants = ExpenseService.get_expense_participants(expense)
-        expense_list.append({
-            "payer_id": str(expense.payer_id),
-            "participants": participants,
-            "total_amount": expense.total_amount
-        })
-    
-    # Calculate budget balances (remaining budget after actual payments)
-    team_member_uuids = [UUID(uid) for uid in team_member_ids]
-    member_budgets = {UUID(str(m.user_id)): m.initial_budget for m in members}
-    budget_balances = calculate_budget_balances(expense_list, team_member_uuids, member_budgets)
+    # Read remaining budgets from the materialized balance table
+    budget_balances = BalanceService.get_budget_balances(session, team_id)
     
     # Format response with string keys for frontend compatibility
     return {
         "team_id": team_id,
         "balances": {
-            member_id: float(budget_balances.get(UUID(member_id), 0.0))
-            for member_id in team_member_ids
+            str(member_id): from_minor(balance)
+            for member_id, balance in budget_balances.items()
         }
     }
 
@@ -65,38 +44,19 @@ def get_team_balances(
 @router.get("/{team_id}/settlements")
 def get_settlement_plan(
     team_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get optimal settlement plan."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
-    # Get all expenses
-    expenses = ExpenseService.get_team_expenses(session, team_id, limit=10000)
+    # Clients polling with a current ETag get a 304 without a recompute
+    not_modified = not_modified_response(session, team_id, request, response)
+    if not_modified:
+        return not_modified
     
-    # Parse expenses
-    expense_list = []
-    team_member_ids = [str(m.user_id) for m in members]
-    
-    for expense in expenses:
-        participants = ExpenseService.get_expense_participants(expense)
-        expense_list.append({
-            "payer_id": str(expense.payer_id),
-            "participants": participants,
-            "total_amount": expense.total_amount
-        })
-    
-    # Calculate balances and settlements using UUID conversion
-    team_member_uuids = [UUID(uid) for uid in team_member_ids]
-    balances = calculate_balances(expense_list, team_member_uuids)
-    settlements = calculate_settlements(balances)
+    # Settlement plan is cached per team ledger version
+    settlements = BalanceService.get_snapshot(session, team_id).settlements
     
     # Format response to match frontend expectations
     settlement_list = [
@@ -118,44 +78,77 @@ def get_settlement_plan(
 @router.get("/{team_id}/next-payer")
 def get_next_payer(
     team_id: str,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get suggestion for next person who should pay."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
-    # Get all expenses
-    expenses = ExpenseService.get_team_expenses(session, team_id, limit=10000)
-    
-    # Parse expenses
-    expense_list = []
-    team_member_ids = [str(m.user_id) for m in members]
-    user_budgets = {str(m.user_id): m.initial_budget for m in members}
-    
-    for expense in expenses:
-        participants = ExpenseService.get_expense_participants(expense)
-        expense_list.append({
-            "payer_id": str(expense.payer_id),
-            "participants": participants,
-            "total_amount": expense.total_amount
-        })
-    
-    # Calculate balances and get next payer suggestion using UUID conversion
-    team_member_uuids = [UUID(uid) for uid in team_member_ids]
-    balances = calculate_balances(expense_list, team_member_uuids)
-    next_user, suggested_amount = calculate_next_payer(
-        balances, user_budgets, expense_list
-    )
+    # Clients polling with a current ETag get a 304 without a recompute
+    not_modified = not_modified_response(session, team_id, request, response)
+    if not_modified:
+        return not_modified
+    
+    # Get next payer suggestion from the cached ledger snapshot
+    snapshot = BalanceService.get_snapshot(session, team_id)
+    user_budgets = {str(member_id): budget for member_id, budget in snapshot.budgets.items()}
+    balances = {
+        member_id: from_minor(balance)
+        for member_id, balance in snapshot.settlement_balances.items()
+    }
+    next_user, suggested_amount = calculate_next_payer(balances, user_budgets, [])
     
     return {
         "team_id": team_id,
         "next_payer_id": str(next_user),
         "suggested_amount": suggested_amount
     }
+
+
+@router.get("/{team_id}/dashboard")
+def get_team_dashboard(
+    team_id: str,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(require_team_member)
+):
+    """Get balances, settlement plan, next payer and budget status in one call.
+
+    Every section is derived from one ledger snapshot, instead of the four
+    separate endpoints each re-reading the team.
+    """
+    not_modified = not_modified_response(session, team_id, request, response)
+    if not_modified:
+        return not_modified
+
+    snapshot = BalanceService.get_snapshot(session, team_id)
+
+    user_budgets = {str(member_id): budget for member_id, budget in snapshot.budgets.items()}
+    next_user, suggested_amount = calculate_next_payer(
+        {member_id: from_minor(balance) for member_id, balance in snapshot.settlement_balances.items()},
+        user_budgets,
+        []
+    )
+
+    return {
+        "team_id": team_id,
+        "balances": {
+            str(member_id): from_minor(balance)
+            for member_id, balance in snapshot.budget_balances.items()
+        },
+        "settlements": [
+            {
+                "from_user": str(s.from_user),
+                "to_user": str(s.to_user),
+                "amount": s.amount
+            }
+            for s in snapshot.settlements
+        ],
+        "total_transactions": len(snapshot.settlements),
+        "next_payer": {
+            "next_payer_id": str(next_user),
+            "suggested_amount": suggested_amount
+        },
+        "budget_status": BudgetService.get_member_budget_status(session, team_id, snapshot)
+    }
@@ -1,13 +1,14 @@
 """Team API endpoints."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
 from uuid import UUID
 from datetime import datetime
 
 from app.core.database import get_session
-from app.core.security import get_current_user_id
+from app.core.security import get_current_user_id, require_team_member
 from app.core.config import get_settings
+from app.core.streaming import iter_json_array, streaming_json_response
 from app.models.schemas import (
     TeamCreate, TeamResponse, TeamMemberResponse,
     BudgetSet, UserResponse, AddTeamMember, User,
@@ -52,8 +53,11 @@ def get_team(
     session: Session = Depends(get_session),
     user_id: str = Depends(get_current_user_id)
 ):
-    """Get team details."""
-    from uuid import UUID
+    """Get team details.
+    
+    Checks that the team exists before membership, so an unknown team is a
+    404 rather than require_team_member's 403.
+    """
     team = TeamService.get_team(session, team_id)
     if not team:
         raise HTTPException(
@@ -61,15 +65,7 @@ def get_team(
             detail="Team not found"
         )
     
-    # Verify user is a member - convert user_id to UUID for comparison
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
+    require_team_member(team_id, session, user_id)
     return team
 
 
@@ -129,19 +125,9 @@ def invite_member(
     team_id: str,
     email: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Invite a member to the team."""
-    from uuid import UUID
-    # Verify user is a member - convert user_id to UUID for comparison
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     # Get user to invite
     invite_user = AuthService.get_user_by_email(session, email)
     if not invite_user:
@@ -163,19 +149,9 @@ def add_member(
     team_id: str,
     member_data: AddTeamMember,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Add a member directly to a team by user ID."""
-    from uuid import UUID
-    # Verify user is a member (must be team member to add others)
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     # Verify the user to add exists
     user_to_add = session.exec(
         select(User).where(User.id == member_data.user_id)
@@ -189,7 +165,7 @@ def add_member(
     # Add user to team with appropriate budget
     # Get team details to determine budget allocation
     team = TeamService.get_team(session, team_id)
-    current_member_count = len(members)
+    current_member_count = TeamService.count_team_members(session, team_id)
     new_member_count = current_member_count + 1
     
     # Calculate fair budget share (team budget divided by new total members)
@@ -209,19 +185,9 @@ def set_member_budget(
     team_id: str,
     budget: BudgetSet,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Set a member's budget."""
-    from uuid import UUID
-    # Verify user is a team member - convert user_id to UUID for comparison
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     member = TeamService.set_member_budget(
         session, team_id, str(budget.user_id), budget.budget_amount
     )
@@ -231,22 +197,14 @@ def set_member_budget(
 @router.get("/{team_id}/members", response_model=List[TeamMemberResponse])
 def get_team_members(
     team_id: str,
+    request: Request,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
-    """Get all members of a team."""
-    # Verify user is a member - convert user_id to UUID for comparison
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
+    """Get all members of a team, streamed and compressed when the client accepts it."""
     # Get enriched member data with user details
-    enriched_members = TeamService.get_team_members_enriched(session, team_id)
-    return enriched_members
+    enriched_members = TeamService.iter_team_members_enriched(session, team_id)
+    return streaming_json_response(request, iter_json_array(enriched_members))
 
 
 @router.post("/{team_id}/send-invites", response_model=BulkInvitationResult)
@@ -254,22 +212,13 @@ def send_team_invitations(
     team_id: str,
     request: SendInvitationsRequest,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Send invitation emails to add new members to a team.
     
     Only team members can send invitations.
     Sends invitation emails to provided email addresses.
     """
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     # Get team and inviter details
     team = TeamService.get_team(session, team_id)
     if not team:
@@ -302,7 +251,7 @@ def send_team_invitations(
         if existing_user:
             # User already exists, check if already a team member
             user_uuid_check = UUID(str(existing_user.id)) if not isinstance(existing_user.id, UUID) else existing_user.id
-            if any(m.user_id == user_uuid_check for m in members):
+            if TeamService.is_member(session, team_id, user_uuid_check):
                 already_members.append({"email": email, "name": existing_user.name})
                 continue  # Skip, already a member
             else:
@@ -428,9 +377,7 @@ def accept_team_invitation(
         )
     
     # Check if user is already a member
-    members = TeamService.get_team_members(session, team_id)
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    if any(m.user_id == user_uuid for m in members):
+    if TeamService.is_member(session, team_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are already a member of this team"
@@ -452,21 +399,12 @@ def accept_team_invitation(
 def get_team_invitations(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get pending invitations for a team.
     
     Only team members can view pending invitations.
     """
-    # Verify user is a team member
-    user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     invitations = InvitationService.get_pending_invitations(session, team_id)
     return invitations
 
@@ -536,18 +474,9 @@ def get_invitation_info(
 def get_budget_status(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get budget status for all team members."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id)
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     budget_status = BudgetService.get_member_budget_status(session, team_id)
     return {"budget_status": budget_status}
 
@@ -556,18 +485,9 @@ def get_budget_status(
 def get_budget_insights(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Get budget insights and recommendations for the team."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id)
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     insights = BudgetService.get_budget_insights(session, team_id)
     return insights
 
@@ -577,18 +497,9 @@ def suggest_optimal_payer(
     team_id: str,
     request: dict,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Suggest the optimal payer for an expense."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id)
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     amount = request.get("amount", 0)
     if amount <= 0:
         raise HTTPException(
@@ -613,18 +524,9 @@ def update_member_budget(
     member_user_id: str,
     request: dict,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Update a team member's budget."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id)
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     budget = request.get("budget", 0)
     if budget < 0:
         raise HTTPException(
@@ -640,18 +542,9 @@ def update_member_budget(
 def recalculate_budgets_equally(
     team_id: str,
     session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(require_team_member)
 ):
     """Recalculate budgets equally among all team members."""
-    # Verify user is a team member
-    user_uuid = UUID(user_id)
-    members = TeamService.get_team_members(session, team_id)
-    if not any(m.user_id == user_uuid for m in members):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this team"
-        )
-    
     # Get team trip budget
     team = TeamService.get_team(session, team_id)
     if not team:
@@ -661,6 +554,7 @@ def recalculate_budgets_equally(
         )
     
     # Calculate equal budget per member
+    members = TeamService.get_team_members(session, team_id)
     member_count = len(members)
     if member_count == 0:
         raise HTTPException(
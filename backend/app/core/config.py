@@ -28,6 +28,25 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = "http://localhost:4200"
     BACKEND_URL: str = "http://localhost:8000"
     
+    # Caching
+    LEDGER_CACHE_SIZE: int = 1024  # Team ledger snapshots kept in memory per process
+    MEMBERSHIP_CACHE_SIZE: int = 10000  # (team, user) membership checks kept per process
+    MEMBERSHIP_CACHE_TTL_SECONDS: float = 30.0
+    
+    # Idempotency keys
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24  # How long a retried request replays the first response
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 600.0  # Minimum gap between expired-key purges
+    
+    # Receipt attachments
+    RECEIPT_STORAGE_DIR: str = "receipts"  # Content-addressed blobs and cached thumbnails
+    RECEIPT_MAX_BYTES: int = 10 * 1024 * 1024
+    RECEIPT_THUMBNAIL_SIZE: int = 320  # Longest edge of generated thumbnails, in pixels
+    RECEIPT_DELETED_EXPENSE_GRACE_HOURS: int = 24  # Receipts of deleted expenses are removed after this
+    
+    # Recurring expenses
+    RECURRING_EXPENSES_ENABLED: bool = True  # Run the scheduler in this process
+    RECURRING_EXPENSE_INTERVAL_SECONDS: float = 60.0  # Gap between scheduler runs
+    
     # CORS
     CORS_ORIGINS: list = [
         "http://localhost:4200",
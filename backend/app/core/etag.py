@@ -0,0 +1,82 @@
+"""ETag helpers for conditional GET on team-scoped endpoints."""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlmodel import Session
+
+from app.services.balance import BalanceService
+
+# Content codings whose variant tags count as a match for the identity tag
+ETAG_CODINGS = ("gzip", "br")
+
+
+def team_etag(session: Session, team_id: str, request: Request) -> Optional[str]:
+    """Build a strong ETag for a team-scoped GET response.
+
+    The tag covers the team's ledger version (bumped by every expense,
+    member, budget and category change) plus the request path and query, so
+    it costs a single primary-key lookup instead of building the response.
+    Returns None if the team does not exist.
+    """
+    version = BalanceService.get_version(session, team_id)
+    if version is None:
+        return None
+    key = f"{team_id}:{version}:{request.url.path}?{request.url.query}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """The tag of `etag`'s representation sent with Content-Encoding `encoding`.
+
+    Compressed bodies differ byte for byte from the identity body, so each
+    coding gets its own strong tag, e.g. `"abc-gzip"`.
+    """
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(request: Request, etag: str) -> Optional[str]:
+    """The If-None-Match tag that matches `etag` or one of its coded variants, or None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == etag or any(tag == encoded_etag(etag, coding) for coding in ETAG_CODINGS):
+            return tag
+    return None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag` or one of its coded variants."""
+    return matching_etag(request, etag) is not None
+
+
+def not_modified_response(
+    session: Session,
+    team_id: str,
+    request: Request,
+    response: Response
+) -> Optional[Response]:
+    """Return a 304 response if the client's cached copy is current.
+
+    Otherwise sets ETag and Cache-Control on `response` and returns None so
+    the endpoint builds its body as usual.
+    """
+    etag = team_etag(session, team_id, request)
+    if etag is None:
+        return None
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    matched = matching_etag(request, etag)
+    if matched is not None:
+        # Echo the variant the client holds, so a gzip body's tag stays valid
+        headers["ETag"] = matched
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,126 @@
+"""File responses with byte-range, conditional and zero-copy support."""
+import os
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.etag import etag_matches
+
+# ASGI extension a server advertises when it can sendfile() a file descriptor
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `Range: bytes=...` header into inclusive (start, end) offsets.
+
+    Returns None when the whole file should be sent: no header, a unit
+    other than bytes, several ranges or bad syntax, all of which a server
+    may ignore. Raises ValueError if the range lies outside the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, dash, last = header[len("bytes="):].strip().partition("-")
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse for one byte range of a file, sent with sendfile() when the server supports it.
+
+    Falls back to reading the range in chunks on servers without the ASGI
+    zero-copy send extension.
+    """
+
+    def __init__(self, path: str, offset: int, length: int, **kwargs) -> None:
+        super().__init__(path, **kwargs)
+        self.offset = offset
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZERO_COPY_EXTENSION,
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False
+                })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.offset)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if self.background is not None:
+            await self.background()
+
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    etag: str,
+    filename: Optional[str] = None,
+    cache_control: str = "private, max-age=31536000, immutable"
+) -> Response:
+    """Serve `path` honouring If-None-Match, Range and If-Range.
+
+    `etag` must change whenever the file's content does; for
+    content-addressed files the digest is ideal, which is also why the
+    default Cache-Control lets clients keep the file forever.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    byte_range = None
+    # A stale If-Range means the client's partial copy is outdated: send it all
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(
+        path,
+        offset=start,
+        length=end - start + 1,
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+        method=request.method,
+        content_disposition_type="inline"
+    )
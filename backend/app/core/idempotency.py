@@ -0,0 +1,59 @@
+"""Idempotency-Key helpers for write endpoints that clients may retry."""
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session
+
+from app.services.idempotency import IdempotencyConflict, IdempotencyService, MAX_KEY_LENGTH
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def replay_or_claim(
+    session: Session,
+    user_id: str,
+    key: Optional[str],
+    scope: str,
+    payload: Any
+) -> Optional[Response]:
+    """Return the stored response if this request is a retry of one already done.
+
+    Otherwise claims `key` and returns None so the endpoint runs as usual;
+    it must call `remember_response` before committing. Does nothing when
+    the client sent no key.
+    """
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+        )
+
+    request_hash = IdempotencyService.request_hash(jsonable_encoder(payload))
+    try:
+        record = IdempotencyService.claim(session, user_id, scope, key, request_hash)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if record is None:
+        return None
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def remember_response(
+    session: Session,
+    user_id: str,
+    key: Optional[str],
+    scope: str,
+    body: Any,
+    status_code: int = status.HTTP_200_OK
+) -> None:
+    """Store `body` as the response to replay for `key`; saved with the next commit."""
+    if key:
+        IdempotencyService.save_response(session, user_id, scope, key, jsonable_encoder(body), status_code)
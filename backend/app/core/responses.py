@@ -0,0 +1,54 @@
+"""Fast JSON responses for large list endpoints."""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder always works
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types found in service dicts the way Pydantic does."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode response-shaped content to compact UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes plain dicts and lists directly.
+
+    Content must already have the response shape: dicts, lists and scalars
+    plus UUID, datetime and Enum values. Returning one of these from an
+    endpoint skips FastAPI's `response_model` validation and its
+    `jsonable_encoder` pass, and encodes with orjson when it is installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """Wrap pre-shaped `content`, keeping headers already set on the endpoint's `response`."""
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content=content, headers=headers)
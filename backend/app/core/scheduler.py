@@ -0,0 +1,67 @@
+"""In-process scheduler for recurring expenses and periodic cleanup."""
+import asyncio
+from contextlib import suppress
+from typing import Optional
+
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.services.idempotency import IdempotencyService
+from app.services.receipt import ReceiptService
+from app.services.recurring_expense import RecurringExpenseService
+
+
+class RecurringExpenseScheduler:
+    """Calls `RecurringExpenseService.materialize_due` every `interval_seconds`.
+
+    Each run also purges expired idempotency keys (at most once per
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS) and the receipts of long-deleted
+    expenses, so request handlers never commit for housekeeping. The
+    first run happens as soon as the scheduler starts, which catches up
+    the periods missed while the app was down. Database work runs in a
+    worker thread so the event loop keeps serving requests.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start running in the background on the current event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop after the current run, if one is in progress."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created = await run_in_threadpool(self.run_once)
+                if created:
+                    print(f"Created {created} recurring expense occurrences")
+            except Exception as e:
+                print(f"Recurring expense run failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    @staticmethod
+    def run_once() -> int:
+        """Materialize every due occurrence now; returns how many expenses were created."""
+        with Session(engine) as session:
+            created = RecurringExpenseService.materialize_due(session)
+        with Session(engine) as session:
+            IdempotencyService.purge_expired_if_due(session)
+        with Session(engine) as session:
+            ReceiptService.purge_deleted_expense_receipts(session)
+        return created
+
+
+recurring_expense_scheduler = RecurringExpenseScheduler(get_settings().RECURRING_EXPENSE_INTERVAL_SECONDS)
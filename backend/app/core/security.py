@@ -2,9 +2,12 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header
+from sqlmodel import Session
 
 from app.core.config import get_settings
+from app.core.database import get_session
+from app.services.team import TeamService
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -86,3 +89,24 @@ def get_current_user_id(authorization: str = Header(None)) -> str:
             detail="Invalid or expired token"
         )
     return payload.get("sub")
+
+
+def require_team_member(
+    team_id: str,
+    session: Session = Depends(get_session),
+    user_id: str = Depends(get_current_user_id)
+) -> str:
+    """Authorize the current user for the `team_id` path parameter.
+    
+    Returns the user ID, so it can stand in for get_current_user_id:
+    Usage: def my_endpoint(team_id: str, user_id: str = Depends(require_team_member))
+    
+    The check is one indexed EXISTS lookup backed by a short-TTL cache, and
+    FastAPI evaluates a dependency once per request however often it is used.
+    """
+    if not TeamService.is_member(session, team_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this team"
+        )
+    return user_id
@@ -0,0 +1,110 @@
+"""Streaming JSON arrays with incremental gzip/brotli compression."""
+import zlib
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.etag import encoded_etag
+from app.core.responses import dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Raw bytes gathered before a chunk is compressed and sent
+STREAM_CHUNK_SIZE = 16 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def iter_json_array(
+    items: Iterable,
+    prefix: bytes = b"",
+    suffix: Union[bytes, Callable[[], bytes]] = b""
+) -> Iterator[bytes]:
+    """Encode `items` as a JSON array, yielding roughly STREAM_CHUNK_SIZE bytes at a time.
+
+    Items are encoded as they are pulled, so only one chunk is ever held in
+    memory. `prefix` and `suffix` wrap the array, e.g. to embed it in an
+    object; `suffix` may be a callable evaluated after the last item.
+    """
+    buffer = bytearray(prefix)
+    buffer += b"["
+    first = True
+    for item in items:
+        if not first:
+            buffer += b","
+        buffer += dumps(item)
+        first = False
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    buffer += suffix() if callable(suffix) else suffix
+    yield bytes(buffer)
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Pick "br" or "gzip" from the request's Accept-Encoding, or None for identity."""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def iter_compressed(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Compress `chunks` as they arrive, flushing after each so the client can decode it right away."""
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        yield from chunks
+
+
+def streaming_json_response(
+    request: Request,
+    chunks: Iterable[bytes],
+    response: Optional[Response] = None
+) -> StreamingResponse:
+    """Stream JSON `chunks` (see `iter_json_array`), compressed if the client accepts it.
+
+    Headers already set on the endpoint's `response` (cursors) are kept;
+    an ETag gets the coding appended, as each coding is its own representation.
+    """
+    headers = dict(response.headers) if response is not None else {}
+    encoding = negotiate_encoding(request)
+    headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        if "etag" in headers:
+            headers["etag"] = encoded_etag(headers["etag"], encoding)
+    return StreamingResponse(
+        iter_compressed(chunks, encoding),
+        media_type="application/json",
+        headers=headers
+    )
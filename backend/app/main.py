@@ -4,8 +4,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.database import create_db_and_tables, get_session
+from app.core.scheduler import recurring_expense_scheduler
 from app.services.category import ExpenseCategoryService
-from app.api import auth, teams, expenses, summary, categories, budget, settlement_requests
+from app.api import (
+    auth, teams, expenses, receipts, recurring_expenses, summary, categories, budget, settlement_requests
+)
 
 # Initialize settings
 settings = get_settings()
@@ -24,16 +27,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Idempotent-Replayed", "Content-Range", "Accept-Ranges"],
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(teams.router)
 app.include_router(expenses.router)
+app.include_router(receipts.router)
 app.include_router(categories.router)
 app.include_router(summary.router)
 app.include_router(budget.router, prefix="/teams", tags=["budget"])
 app.include_router(settlement_requests.router)
+app.include_router(recurring_expenses.router)
 
 
 @app.on_event("startup")
@@ -48,6 +54,16 @@ async def on_startup():
         session.close()
     except Exception as e:
         print(f"Warning: Could not initialize default categories: {e}")
+    
+    # Create recurring expenses that fell due while the app was down, then keep up
+    if settings.RECURRING_EXPENSES_ENABLED:
+        recurring_expense_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background work."""
+    await recurring_expense_scheduler.stop()
 
 
 @app.get("/")
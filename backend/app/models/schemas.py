@@ -1,10 +1,8 @@
 from uuid import UUID
 from datetime import datetime
 from typing import Optional, List
-from sqlmodel import SQLModel, Field, Column, String
+from sqlmodel import SQLModel, Field, Column, Index, String, UniqueConstraint
 from enum import Enum
-import json
-from pydantic import field_validator
 
 
 class AuthProvider(str, Enum):
@@ -33,6 +31,7 @@ class Team(SQLModel, table=True):
     name: str
     trip_budget: Optional[float] = Field(default=None)
     created_by: UUID = Field(foreign_key="user.id")
+    ledger_version: int = Field(default=0)  # Bumped whenever balances or budgets change
     created_at: datetime = Field(default_factory=datetime.utcnow)
     modified_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -40,9 +39,12 @@ class Team(SQLModel, table=True):
 class TeamMember(SQLModel, table=True):
     """Team member association with budget tracking."""
     
+    # The unique index also serves per-team member lists and membership checks
+    __table_args__ = (UniqueConstraint("team_id", "user_id", name="uq_team_member"),)
+    
     id: Optional[UUID] = Field(default=None, primary_key=True)
     team_id: UUID = Field(foreign_key="team.id")
-    user_id: UUID = Field(foreign_key="user.id")
+    user_id: UUID = Field(foreign_key="user.id", index=True)
     initial_budget: float = 0.0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     modified_at: datetime = Field(default_factory=datetime.utcnow)
@@ -74,21 +76,75 @@ class TeamCustomCategory(SQLModel, table=True):
 class Expense(SQLModel, table=True):
     """Expense model for tracking payments."""
     
+    # Serves newest-first team listings and keyset pagination on (created_at, id),
+    # and delta sync on (change_seq, id)
+    __table_args__ = (
+        Index("ix_expense_team_created_id", "team_id", "created_at", "id"),
+        Index("ix_expense_team_change_seq", "team_id", "change_seq", "id"),
+    )
+    
     id: Optional[UUID] = Field(default=None, primary_key=True)
     team_id: UUID = Field(foreign_key="team.id")
     payer_id: UUID = Field(foreign_key="user.id")
     total_amount: float
-    participants: str = Field(default="[]")  # JSON string of UUIDs
     category_id: Optional[UUID] = Field(default=None, foreign_key="expensecategory.id")
     team_category_id: Optional[UUID] = Field(default=None, foreign_key="teamcustomcategory.id")
     note: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     modified_at: datetime = Field(default_factory=datetime.utcnow)
+    # Deleted expenses are kept as tombstones so delta sync can report them
+    deleted_at: Optional[datetime] = None
+    change_seq: int = Field(default=0)  # Team ledger_version of the last create, update or delete
+
+
+class ExpenseParticipant(SQLModel, table=True):
+    """Participant of an expense with their share of the total."""
+    
+    __table_args__ = (UniqueConstraint("expense_id", "user_id", name="uq_expense_participant"),)
+    
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    expense_id: UUID = Field(foreign_key="expense.id", index=True)
+    user_id: UUID = Field(foreign_key="user.id", index=True)
+    position: int = 0  # Order the participant was listed in
+    share_minor: int = 0  # This participant's share of the expense, in paise
+
+
+class ExpenseReceipt(SQLModel, table=True):
+    """Receipt file attached to an expense.
+    
+    The file itself lives on disk under its SHA-256, so identical uploads
+    share one blob whichever team they belong to.
+    """
+    
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    expense_id: UUID = Field(foreign_key="expense.id", index=True)
+    sha256: str = Field(max_length=64, index=True)  # Hex digest; names the blob on disk
+    content_type: str
+    size_bytes: int
+    filename: Optional[str] = None  # As uploaded, for downloads
+    uploaded_by: UUID = Field(foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TeamMemberBalance(SQLModel, table=True):
+    """Materialized ledger totals per team member, kept in step with expense writes."""
+    
+    __table_args__ = (UniqueConstraint("team_id", "user_id", name="uq_team_member_balance"),)
+    
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    team_id: UUID = Field(foreign_key="team.id", index=True)
+    user_id: UUID = Field(foreign_key="user.id")
+    paid_minor: int = 0  # Total paid by this member, in paise
+    owed_minor: int = 0  # Total share of expenses this member owes, in paise
+    modified_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class TeamInvitation(SQLModel, table=True):
     """Team invitation model for tracking pending member invitations."""
     
+    # Pending invitations are looked up by team, used flag and expiry together
+    __table_args__ = (Index("ix_teaminvitation_team_pending", "team_id", "is_used", "expires_at"),)
+    
     id: Optional[UUID] = Field(default=None, primary_key=True)
     team_id: UUID = Field(foreign_key="team.id", index=True)
     invitee_email: str = Field(index=True)
@@ -235,16 +291,66 @@ class ExpenseResponse(ExpenseBase):
     category: Optional[ExpenseCategoryResponse] = None
     team_category: Optional[TeamCustomCategoryResponse] = None
 
-    @field_validator('participants', mode='before')
-    @classmethod
-    def parse_participants(cls, v):
-        """Convert JSON string to list if needed."""
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return v
+
+class ExpenseTombstone(SQLModel):
+    """A deleted expense, as reported by delta sync."""
+    id: UUID
+    deleted_at: datetime
+    change_seq: int
+
+
+class ExpenseChangesResponse(SQLModel):
+    """Expenses created, updated or deleted since a client's last sync."""
+    seq: int  # Pass back as `since` once has_more is false
+    has_more: bool = False
+    after: Optional[UUID] = None  # Pass back with `since` to continue while has_more
+    snapshot_seq: Optional[int] = None  # Pass back with `after` to continue a full sync
+    expenses: List[ExpenseResponse]
+    deleted: List[ExpenseTombstone]
+
+
+class ExpenseReceiptResponse(SQLModel):
+    """Receipt attachment response schema."""
+    id: UUID
+    expense_id: UUID
+    sha256: str
+    content_type: str
+    size_bytes: int
+    filename: Optional[str] = None
+    uploaded_by: UUID
+    created_at: datetime
+
+
+class ExpenseMutationType(str, Enum):
+    """Kinds of change in an expense batch."""
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class ExpenseMutation(SQLModel):
+    """One change in an expense batch."""
+    op: ExpenseMutationType
+    expense_id: Optional[UUID] = None  # Required for update and delete
+    # Fields to set; create requires total_amount and participants
+    data: Optional[ExpenseUpdate] = None
+
+
+class ExpenseBatchRequest(SQLModel):
+    """Ordered list of expense changes applied in one transaction."""
+    operations: List[ExpenseMutation]
+
+
+class ExpenseMutationResult(SQLModel):
+    """Outcome of one change in an expense batch."""
+    op: ExpenseMutationType
+    expense_id: UUID
+    expense: Optional[ExpenseResponse] = None  # None for deletes
+
+
+class ExpenseBatchResponse(SQLModel):
+    """Results of an expense batch, in request order."""
+    results: List[ExpenseMutationResult]
 
 
 class TokenResponse(SQLModel):
@@ -321,6 +427,13 @@ class SettlementStatus(str, Enum):
 class SettlementRequest(SQLModel, table=True):
     """Settlement request model for managing payment settlements between users."""
     
+    # Sent/received listings filter on one side of the pair and sort newest
+    # first; the pending-duplicate check uses the (team_id, from_user_id) prefix
+    __table_args__ = (
+        Index("ix_settlementrequest_team_from_created", "team_id", "from_user_id", "created_at"),
+        Index("ix_settlementrequest_team_to_created", "team_id", "to_user_id", "created_at"),
+    )
+    
     id: Optional[UUID] = Field(default=None, primary_key=True)
     team_id: UUID = Field(foreign_key="team.id")
     from_user_id: UUID = Field(foreign_key="user.id")  # User who owes money
@@ -333,6 +446,23 @@ class SettlementRequest(SQLModel, table=True):
     expires_at: datetime = Field(default_factory=lambda: datetime.utcnow().replace(hour=23, minute=59, second=59))  # Expires at end of day
     
 
+class IdempotencyKey(SQLModel, table=True):
+    """Response stored for a client-supplied Idempotency-Key, replayed on retries."""
+
+    # Keys are per user and endpoint; expires_at serves the expiry purge
+    __table_args__ = (UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_key"),)
+
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    user_id: UUID = Field(foreign_key="user.id")
+    scope: str  # e.g. "POST /expenses"
+    key: str = Field(max_length=255)
+    request_hash: str  # SHA-256 of the request body; a reused key must send the same body
+    status_code: Optional[int] = None  # None while the first request is still running
+    response_body: Optional[str] = None  # JSON
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+
 class CreateSettlementRequest(SQLModel):
     """Request schema for creating a settlement request."""
     to_user_id: str
@@ -343,3 +473,79 @@ class CreateSettlementRequest(SQLModel):
 class ApproveSettlementRequest(SQLModel):
     """Request schema for approving a settlement."""
     settlement_id: str
+
+
+class RecurrenceInterval(str, Enum):
+    """How often a recurring expense repeats."""
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"  # Same day of month as start_at, or the month's last day
+
+
+class RecurringExpense(SQLModel, table=True):
+    """Template the scheduler turns into an expense once per period."""
+
+    # The scheduler scans active templates by next_run_at
+    __table_args__ = (Index("ix_recurringexpense_due", "is_active", "next_run_at"),)
+
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    team_id: UUID = Field(foreign_key="team.id", index=True)
+    payer_id: UUID = Field(foreign_key="user.id")
+    created_by: UUID = Field(foreign_key="user.id")
+    total_amount: float
+    category_id: Optional[UUID] = Field(default=None, foreign_key="expensecategory.id")
+    team_category_id: Optional[UUID] = Field(default=None, foreign_key="teamcustomcategory.id")
+    note: Optional[str] = None
+    interval: RecurrenceInterval = Field(default=RecurrenceInterval.DAILY)
+    start_at: datetime  # First occurrence; later ones keep its time of day
+    end_at: Optional[datetime] = None  # No occurrences after this
+    next_run_at: datetime  # Next occurrence still to be created
+    last_run_at: Optional[datetime] = None  # Latest occurrence created
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    modified_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RecurringExpenseParticipant(SQLModel, table=True):
+    """Participant of a recurring expense template."""
+
+    __table_args__ = (
+        UniqueConstraint("recurring_expense_id", "user_id", name="uq_recurring_expense_participant"),
+    )
+
+    id: Optional[UUID] = Field(default=None, primary_key=True)
+    recurring_expense_id: UUID = Field(foreign_key="recurringexpense.id", index=True)
+    user_id: UUID = Field(foreign_key="user.id")
+    position: int = 0  # Order the participant was listed in
+
+
+class RecurringExpenseCreate(SQLModel):
+    """Recurring expense creation schema; the current user pays."""
+    total_amount: float = Field(gt=0)
+    participants: List[UUID]
+    category_id: Optional[UUID] = None
+    team_category_id: Optional[UUID] = None
+    note: Optional[str] = None
+    interval: RecurrenceInterval = RecurrenceInterval.DAILY
+    start_at: Optional[datetime] = None  # Defaults to now
+    end_at: Optional[datetime] = None
+
+
+class RecurringExpenseResponse(SQLModel):
+    """Recurring expense response schema."""
+    id: UUID
+    team_id: UUID
+    payer_id: UUID
+    created_by: UUID
+    total_amount: float
+    participants: List[UUID]
+    category_id: Optional[UUID] = None
+    team_category_id: Optional[UUID] = None
+    note: Optional[str] = None
+    interval: RecurrenceInterval
+    start_at: datetime
+    end_at: Optional[datetime] = None
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    is_active: bool
+    created_at: datetime
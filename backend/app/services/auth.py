@@ -7,6 +7,7 @@ from sqlmodel import Session, select
 
 from app.models.schemas import User, UserCreate, AuthProvider
 from app.core.security import hash_password, verify_password, create_access_token
+from app.services.balance import BalanceService
 
 
 class AuthService:
@@ -89,10 +90,13 @@ class AuthService:
         
         if user:
             # Update existing user
+            profile = (user.name, user.photo_url)
             user.name = name
             if photo_url:
                 user.photo_url = photo_url
             session.add(user)
+            if (user.name, user.photo_url) != profile:
+                BalanceService.bump_user_team_versions(session, user.id)
         else:
             # Create new user
             user = User(
@@ -0,0 +1,301 @@
+"""Materialized per-member balance table maintenance.
+
+`TeamMemberBalance` holds each member's paid and owed totals in paise. The
+expense service applies deltas to it inside the same transaction as every
+expense write, so summary and budget endpoints read O(members) rows instead
+of recomputing over the whole expense history.
+
+Derived per-team data (balances and the settlement plan) is additionally
+cached in memory, keyed by the team's `ledger_version`. Every service that
+changes expenses, members or budgets calls `bump_version` in the same
+transaction, so a new version is a new cache key and stale entries simply
+age out of the LRU.
+
+Rebuild from the raw expense table with:
+    python -m app.services.balance [team_id ...]
+"""
+import sys
+from datetime import datetime
+from uuid import UUID, uuid4
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.schemas import Expense, ExpenseParticipant, Team, TeamMember, TeamMemberBalance
+from app.services.cache import LRUCache
+from app.services.ledger import Ledger, to_minor
+from app.services.settlement import Settlement, calculate_settlements_minor
+
+# Teams with a version bump that is not committed yet, per session
+_PENDING_KEY = "ledger_pending_teams"
+
+ledger_cache = LRUCache(get_settings().LEDGER_CACHE_SIZE)
+
+
+@event.listens_for(OrmSession, "after_commit")
+@event.listens_for(OrmSession, "after_rollback")
+def _clear_pending_versions(session: OrmSession) -> None:
+    """Forget pending version bumps once their transaction ends."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+class LedgerSnapshot(NamedTuple):
+    """Balances and settlement plan for one team at one ledger version."""
+
+    version: Optional[int]
+    paid: Dict[UUID, int]
+    owed: Dict[UUID, int]
+    budgets: Dict[UUID, float]
+    settlement_balances: Dict[UUID, int]
+    budget_balances: Dict[UUID, int]
+    settlements: List[Settlement]
+
+
+class BalanceService:
+    """Service for the materialized team member balance table."""
+
+    @staticmethod
+    def apply_expense(session: Session, expense: Expense, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) an expense's effect on member balances.
+
+        Reads the expense's participant shares, so it must run after they
+        are written (create) or before they are replaced (update/delete).
+        Does not commit; callers commit together with the expense write.
+        """
+        payer_id = expense.payer_id if isinstance(expense.payer_id, UUID) else UUID(str(expense.payer_id))
+        team_id = expense.team_id if isinstance(expense.team_id, UUID) else UUID(str(expense.team_id))
+        expense_id = expense.id if isinstance(expense.id, UUID) else UUID(str(expense.id))
+
+        shares = session.exec(
+            select(ExpenseParticipant.user_id, ExpenseParticipant.share_minor)
+            .where(ExpenseParticipant.expense_id == expense_id)
+        ).all()
+
+        # Only current members carry a balance
+        involved = {payer_id, *(user_id for user_id, _ in shares)}
+        member_ids = set(session.exec(
+            select(TeamMember.user_id).where(
+                (TeamMember.team_id == team_id) &
+                (TeamMember.user_id.in_(involved))
+            )
+        ).all())
+        if not member_ids:
+            return
+
+        ledger = Ledger(member_ids)
+        ledger.add_payment(payer_id, to_minor(expense.total_amount))
+        for user_id, share_minor in shares:
+            ledger.add_share(user_id, share_minor)
+        deltas = {
+            user_id: (ledger.paid[user_id] * sign, ledger.owed[user_id] * sign)
+            for user_id in member_ids
+            if ledger.paid[user_id] or ledger.owed[user_id]
+        }
+        BalanceService.apply_deltas(session, team_id, deltas)
+
+    @staticmethod
+    def apply_deltas(session: Session, team_id: UUID, deltas: Dict[UUID, Tuple[int, int]]) -> None:
+        """Add (paid, owed) deltas to member balance rows, creating rows as needed.
+        
+        Does not commit. Bulk writers aggregate deltas over a whole batch and
+        apply them in one call.
+        """
+        if not deltas:
+            return
+
+        rows = session.exec(
+            select(TeamMemberBalance).where(
+                (TeamMemberBalance.team_id == team_id) &
+                (TeamMemberBalance.user_id.in_(list(deltas)))
+            )
+        ).all()
+        rows_by_user = {row.user_id: row for row in rows}
+
+        now = datetime.utcnow()
+        for user_id, (paid_delta, owed_delta) in deltas.items():
+            row = rows_by_user.get(user_id)
+            if row is None:
+                row = TeamMemberBalance(id=uuid4(), team_id=team_id, user_id=user_id)
+            row.paid_minor += paid_delta
+            row.owed_minor += owed_delta
+            row.modified_at = now
+            session.add(row)
+
+    @staticmethod
+    def get_member_balances(session: Session, team_id: str) -> List[Tuple[TeamMember, int, int]]:
+        """Get (member, paid_minor, owed_minor) for every member of a team.
+
+        Teams whose balance rows have not been built yet (e.g. data written
+        before the table existed) fall back to SQL aggregates over the
+        expense tables, so results are correct either way.
+        """
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        results = session.exec(
+            select(TeamMember, TeamMemberBalance.paid_minor, TeamMemberBalance.owed_minor)
+            .outerjoin(
+                TeamMemberBalance,
+                (TeamMemberBalance.team_id == TeamMember.team_id) &
+                (TeamMemberBalance.user_id == TeamMember.user_id)
+            )
+            .where(TeamMember.team_id == team_uuid)
+        ).all()
+
+        if results and all(paid is None for _, paid, _ in results):
+            from app.services.expense import ExpenseService
+            paid_totals = ExpenseService.get_payer_totals(session, team_uuid)
+            share_totals = ExpenseService.get_participant_share_totals(session, team_uuid)
+            return [
+                (member, paid_totals.get(member.user_id, 0), share_totals.get(member.user_id, 0))
+                for member, _, _ in results
+            ]
+
+        return [(member, paid or 0, owed or 0) for member, paid, owed in results]
+
+    @staticmethod
+    def get_settlement_balances(session: Session, team_id: str) -> Dict[UUID, int]:
+        """Net settlement position per member in paise (positive = is owed money)."""
+        return dict(BalanceService.get_snapshot(session, team_id).settlement_balances)
+
+    @staticmethod
+    def get_budget_balances(session: Session, team_id: str) -> Dict[UUID, int]:
+        """Remaining budget per member in paise (initial budget minus payments made)."""
+        return dict(BalanceService.get_snapshot(session, team_id).budget_balances)
+
+    @staticmethod
+    def bump_version(session: Session, team_id: str) -> Optional[int]:
+        """Mark a team's balances, members or budgets as changed.
+
+        Increments `Team.ledger_version` in the caller's transaction, so
+        cached snapshots for the old version stop being served once it
+        commits. The UPDATE holds the team row lock until commit, so new
+        versions become visible in the order they were handed out, which
+        lets expenses use them as their delta-sync `change_seq`. Returns the
+        new version (None if the team does not exist). Does not commit.
+        """
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        version = session.execute(
+            update(Team)
+            .where(Team.id == team_uuid)
+            .values(ledger_version=Team.ledger_version + 1)
+            .returning(Team.ledger_version)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        session.info.setdefault(_PENDING_KEY, set()).add(team_uuid)
+        return version
+
+    @staticmethod
+    def bump_user_team_versions(session: Session, user_id: str) -> None:
+        """`bump_version` every team the user belongs to, e.g. after a profile change.
+
+        Team responses show member names, so they must not be served from
+        cache, or answered with 304, once a member's profile changes.
+        Does not commit.
+        """
+        user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
+        team_ids = session.exec(select(TeamMember.team_id).where(TeamMember.user_id == user_uuid)).all()
+        for team_id in sorted(team_ids):
+            BalanceService.bump_version(session, team_id)
+
+    @staticmethod
+    def get_version(session: Session, team_id: str) -> Optional[int]:
+        """Current ledger version of a team (None if the team does not exist)."""
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        return session.exec(select(Team.ledger_version).where(Team.id == team_uuid)).first()
+
+    @staticmethod
+    def get_snapshot(session: Session, team_id: str) -> LedgerSnapshot:
+        """Get a team's balances and settlement plan, served from cache when current.
+
+        Snapshots are cached under (team_id, ledger_version). Reads inside a
+        transaction that has bumped the version but not committed yet are
+        computed fresh and not cached.
+        """
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        version = BalanceService.get_version(session, team_uuid)
+        cacheable = version is not None and team_uuid not in session.info.get(_PENDING_KEY, ())
+
+        def build() -> LedgerSnapshot:
+            member_balances = BalanceService.get_member_balances(session, team_uuid)
+            paid = {member.user_id: paid for member, paid, _ in member_balances}
+            owed = {member.user_id: owed for member, _, owed in member_balances}
+            budgets = {member.user_id: member.initial_budget for member, _, _ in member_balances}
+            settlement_balances = {user_id: paid[user_id] - owed[user_id] for user_id in paid}
+            return LedgerSnapshot(
+                version=version,
+                paid=paid,
+                owed=owed,
+                budgets=budgets,
+                settlement_balances=settlement_balances,
+                budget_balances={user_id: to_minor(budgets[user_id]) - paid[user_id] for user_id in paid},
+                settlements=calculate_settlements_minor(settlement_balances)
+            )
+
+        if not cacheable:
+            return build()
+        return ledger_cache.get_or_set((team_uuid, version), build)
+
+    @staticmethod
+    def invalidate_team(team_id: str) -> None:
+        """Drop every cached snapshot for a team (e.g. when it is deleted)."""
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        ledger_cache.invalidate(lambda key: key[0] == team_uuid)
+
+    @staticmethod
+    def rebuild_team(session: Session, team_id: str, commit: bool = True) -> None:
+        """Recompute a team's balance rows from the raw expense table.
+
+        Paid and owed totals come from two GROUP BY queries, so the rebuild
+        never pulls expense rows into Python.
+        """
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+
+        member_ids = session.exec(
+            select(TeamMember.user_id).where(TeamMember.team_id == team_uuid)
+        ).all()
+        # Aggregate payments and shares in the database
+        from app.services.expense import ExpenseService
+        ledger = Ledger(member_ids)
+        for payer_id, paid_minor in ExpenseService.get_payer_totals(session, team_uuid).items():
+            ledger.add_payment(payer_id, paid_minor)
+        for user_id, share_minor in ExpenseService.get_participant_share_totals(session, team_uuid).items():
+            ledger.add_share(user_id, share_minor)
+
+        session.execute(delete(TeamMemberBalance).where(TeamMemberBalance.team_id == team_uuid))
+        now = datetime.utcnow()
+        for user_id in member_ids:
+            session.add(TeamMemberBalance(
+                id=uuid4(),
+                team_id=team_uuid,
+                user_id=user_id,
+                paid_minor=ledger.paid[user_id],
+                owed_minor=ledger.owed[user_id],
+                modified_at=now
+            ))
+
+        BalanceService.bump_version(session, team_uuid)
+
+        if commit:
+            session.commit()
+
+    @staticmethod
+    def rebuild_all(session: Session, team_ids: Optional[Iterable[str]] = None) -> int:
+        """Rebuild balance rows for the given teams (default: every team)."""
+        if team_ids is None:
+            team_ids = session.exec(select(Team.id)).all()
+
+        rebuilt = 0
+        for team_id in team_ids:
+            BalanceService.rebuild_team(session, team_id)
+            rebuilt += 1
+        return rebuilt
+
+
+if __name__ == "__main__":
+    from app.core.database import engine, create_db_and_tables
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        count = BalanceService.rebuild_all(session, sys.argv[1:] or None)
+    print(f"Rebuilt balances for {count} team(s)")
@@ -3,63 +3,53 @@
 from typing import List, Dict, Optional, Tuple
 from uuid import UUID
 from sqlmodel import Session, select
-from ..models.schemas import TeamMember, Expense, User
-from .expense import ExpenseService
-from . import settlement as settlement_module
+from ..models.schemas import TeamMember, User
+from .balance import BalanceService, LedgerSnapshot
+from .ledger import from_minor
 
 
 class BudgetService:
     """Service for budget tracking and smart payer suggestions."""
     
     @staticmethod
-    def get_member_budget_status(session: Session, team_id: str) -> List[Dict]:
-        """Get budget status for all team members."""
-        # Get all team members with their budgets
-        members_query = select(TeamMember, User).join(
-            User, TeamMember.user_id == User.id
-        ).where(TeamMember.team_id == UUID(team_id))
-        
-        member_results = session.exec(members_query).all()
-        
-        # Get current balances using the settlement calculation logic
-        members = [member for member, user in member_results]
-        expenses = ExpenseService.get_team_expenses(session, team_id, limit=10000)
-        
-        # Parse expenses into format expected by settlement calculator
-        expense_list = []
-        team_member_ids = [str(m.user_id) for m in members]
-        
-        for expense in expenses:
-            participants = ExpenseService.get_expense_participants(expense)
-            expense_list.append({
-                "payer_id": str(expense.payer_id),
-                "participants": participants,
-                "total_amount": expense.total_amount
-            })
-        
-        # Calculate budget balances (actual payments made, not settlement splits)
-        # Convert team member IDs to UUIDs for calculation
-        team_member_uuids = [UUID(uid) for uid in team_member_ids]
-        member_budgets = {member.user_id: member.initial_budget for member in members}
-        remaining_budgets = settlement_module.calculate_budget_balances(
-            expense_list, team_member_uuids, member_budgets
-        )
+    def get_member_budget_status(
+        session: Session,
+        team_id: str,
+        snapshot: Optional[LedgerSnapshot] = None
+    ) -> List[Dict]:
+        """Get budget status for all team members.
+
+        Pass `snapshot` (from BalanceService.get_snapshot) when the caller
+        already has one to skip reloading the team's balances.
+        """
+        if snapshot is None:
+            snapshot = BalanceService.get_snapshot(session, team_id)
+
+        # Payments made per member come from the materialized balance table
+        member_ids = list(snapshot.paid)
+        users = {
+            user.id: user
+            for user in session.exec(select(User).where(User.id.in_(member_ids))).all()
+        } if member_ids else {}
         
         budget_status = []
-        for member, user in member_results:
-            # Get remaining budget for this member
-            remaining_budget = remaining_budgets.get(member.user_id, member.initial_budget)
-            total_spent = member.initial_budget - remaining_budget
+        for member_id, spent_minor in snapshot.paid.items():
+            user = users.get(member_id)
+            if user is None:
+                continue
+            initial_budget = snapshot.budgets[member_id]
+            remaining_budget = from_minor(snapshot.budget_balances[member_id])
+            total_spent = from_minor(spent_minor)
             
             budget_status.append({
-                "user_id": str(member.user_id),
+                "user_id": str(member_id),
                 "user_name": user.name,
                 "user_email": user.email,
-                "initial_budget": member.initial_budget,
+                "initial_budget": initial_budget,
                 "current_balance": remaining_budget,  # Remaining budget, not settlement balance
                 "remaining_budget": remaining_budget,
                 "total_spent": max(0, total_spent),  # Ensure non-negative spending
-                "budget_utilization_percentage": (total_spent / member.initial_budget * 100) if member.initial_budget > 0 else 0,
+                "budget_utilization_percentage": (total_spent / initial_budget * 100) if initial_budget > 0 else 0,
                 "is_over_budget": remaining_budget < 0,
                 "available_to_pay": remaining_budget > 0
             })
@@ -109,6 +99,7 @@ class BudgetService:
             
             member.initial_budget = new_budget
             session.add(member)
+            BalanceService.bump_version(session, team_id)
             session.commit()
             session.refresh(member)
             return True
@@ -16,6 +16,7 @@ from app.models.schemas import (
     TeamCustomCategoryResponse,
     TeamCustomCategoryCreate
 )
+from app.services.balance import BalanceService
 
 
 class ExpenseCategoryService:
@@ -159,6 +160,8 @@ class ExpenseCategoryService:
             raise PermissionError("Only category creator can delete this category")
 
         session.delete(category)
+        # Expense listings show category names, so cached responses go stale
+        BalanceService.bump_version(session, team_uuid)
         session.commit()
         return True
 
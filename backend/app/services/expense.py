@@ -1,11 +1,26 @@
 """Expense management service."""
+import base64
 import json
-from uuid import uuid4
+from uuid import uuid4, UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import Integer, cast, delete, func, insert, tuple_
 from sqlmodel import Session, select
 
-from app.models.schemas import Expense, ExpenseResponse, ExpenseCategory, TeamCustomCategory
+from app.models.schemas import (
+    Expense, ExpenseParticipant, ExpenseResponse, ExpenseCategory, ExpenseCategoryResponse,
+    TeamCustomCategory, TeamCustomCategoryResponse, TeamMember
+)
+from app.services.balance import BalanceService
+from app.services.ledger import MINOR_UNITS_PER_MAJOR, quantize_amount, split_minor, to_minor
+
+# Fields a `fields=` selection can name; the category objects also take
+# dotted subfields such as "category.emoji"
+EXPENSE_FIELDS = tuple(ExpenseResponse.model_fields)
+CATEGORY_FIELDS = {
+    "category": tuple(ExpenseCategoryResponse.model_fields),
+    "team_category": tuple(TeamCustomCategoryResponse.model_fields),
+}
 
 
 class ExpenseService:
@@ -20,77 +35,457 @@ class ExpenseService:
         participants: List[str],
         category_id: Optional[str] = None,
         team_category_id: Optional[str] = None,
-        note: Optional[str] = None
+        note: Optional[str] = None,
+        commit: bool = True
     ) -> Expense:
-        """Create a new expense."""
+        """Create a new expense and apply it to member balances."""
         expense = Expense(
             id=uuid4(),
             team_id=team_id,
             payer_id=payer_id,
-            total_amount=total_amount,
-            participants=json.dumps([str(p) for p in participants]),
+            total_amount=quantize_amount(total_amount),
             category_id=category_id,
             team_category_id=team_category_id,
             note=note,
             created_at=datetime.utcnow()
         )
         session.add(expense)
-        session.commit()
-        session.refresh(expense)
+        ExpenseService._set_participants(session, expense, participants)
+        BalanceService.apply_expense(session, expense)
+        expense.change_seq = BalanceService.bump_version(session, expense.team_id)
+        if commit:
+            session.commit()
+            session.refresh(expense)
         return expense
     
     @staticmethod
-    def get_expense(session: Session, expense_id: str) -> Optional[Expense]:
-        """Get expense by ID."""
-        return session.exec(
-            select(Expense).where(Expense.id == expense_id)
-        ).first()
+    def get_expense(session: Session, expense_id: str, team_id: Optional[str] = None) -> Optional[Expense]:
+        """Get expense by ID, only if it belongs to `team_id` when given; deleted expenses are not returned."""
+        query = select(Expense).where((Expense.id == expense_id) & Expense.deleted_at.is_(None))
+        if team_id is not None:
+            query = query.where(Expense.team_id == UUID(str(team_id)))
+        return session.exec(query).first()
     
     @staticmethod
     def get_team_expenses(
         session: Session,
         team_id: str,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        participant_id: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Expense]:
-        """Get all expenses for a team."""
-        return session.exec(
-            select(Expense)
-            .where(Expense.team_id == team_id)
-            .order_by(Expense.created_at.desc())
-            .limit(limit)
-            .offset(offset)
+        """Get a team's expenses newest first, optionally only those a user takes part in.
+        
+        `cursor` (from `encode_cursor`) continues after the expense it was
+        made from; with the (team_id, created_at, id) index each page is an
+        index range scan, however deep into the history it is.
+        """
+        query = ExpenseService._team_expenses_query(select(Expense), team_id, participant_id, cursor)
+        return session.exec(query.limit(limit).offset(offset)).all()
+    
+    @staticmethod
+    def _team_expenses_query(query, team_id: str, participant_id: Optional[str], cursor: Optional[str]):
+        """Apply the team listing filters and newest-first order to `query`."""
+        query = query.where((Expense.team_id == team_id) & Expense.deleted_at.is_(None))
+        if cursor:
+            created_at, expense_id = ExpenseService.decode_cursor(cursor)
+            query = query.where(tuple_(Expense.created_at, Expense.id) < tuple_(created_at, expense_id))
+        if participant_id:
+            query = query.where(
+                Expense.id.in_(
+                    select(ExpenseParticipant.expense_id)
+                    .where(ExpenseParticipant.user_id == UUID(str(participant_id)))
+                )
+            )
+        return query.order_by(Expense.created_at.desc(), Expense.id.desc())
+    
+    @staticmethod
+    def get_next_cursor(
+        session: Session,
+        team_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        participant_id: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Optional[str]:
+        """Cursor for the page after this one, or None if this is the last page.
+        
+        Only reads (created_at, id) keys from the listing index, so a
+        streamed page can send its next cursor before the rows themselves.
+        """
+        query = ExpenseService._team_expenses_query(
+            select(Expense.created_at, Expense.id), team_id, participant_id, cursor
+        )
+        keys = session.exec(query.offset(offset + limit - 1).limit(2)).all()
+        return ExpenseService.encode_cursor(keys[0]) if len(keys) == 2 else None
+    
+    @staticmethod
+    def iter_enriched_team_expenses(
+        session: Session,
+        team_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        participant_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[Dict[str, Tuple[str, ...]]] = None
+    ) -> Iterator[dict]:
+        """Yield one page of enriched expenses as plain dicts, straight off the cursor.
+        
+        Rows are read `batch_size` at a time and each batch's participants
+        and categories are loaded together, so memory stays bounded however
+        large `limit` is. With `fields` (from `parse_fields`) only the
+        columns those fields need are selected and only they are returned.
+        """
+        if fields is None:
+            query = ExpenseService._team_expenses_query(select(Expense), team_id, participant_id, cursor)
+            result = session.exec(query.limit(limit).offset(offset).execution_options(yield_per=batch_size))
+            for expenses in result.partitions():
+                yield from ExpenseService.enrich_expenses(session, expenses, validate=False)
+            return
+        
+        query = ExpenseService._team_expenses_query(
+            select(*ExpenseService._fields_columns(fields)), team_id, participant_id, cursor
+        )
+        result = session.execute(query.limit(limit).offset(offset).execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield from ExpenseService.project_expenses(session, rows, fields)
+    
+    @staticmethod
+    def get_team_changes(
+        session: Session,
+        team_id: str,
+        since: int = 0,
+        after: Optional[UUID] = None,
+        limit: int = 500,
+        validate: bool = True,
+        fields: Optional[Dict[str, Tuple[str, ...]]] = None,
+        snapshot_seq: Optional[int] = None
+    ) -> dict:
+        """Get a team's expenses created, updated or deleted after change `since`.
+
+        Changes come in (change_seq, id) order, `limit` at a time. While
+        `has_more` is set, pass the returned `seq`, `after` and
+        `snapshot_seq` back to continue; once it is clear, `seq` is the
+        value to sync from next time. `since=0` is a full sync: every live
+        expense and no tombstones for anything deleted up to the version
+        it started at, which `snapshot_seq` carries across its pages.
+        `validate` is passed on to `enrich_expenses`; with `fields` the
+        changed expenses are projected by `project_expenses` instead.
+        """
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        # Read the version first; anything committed later gets a higher seq
+        current_seq = BalanceService.get_version(session, team_uuid) or 0
+        if since == 0:
+            snapshot_seq = current_seq
+        elif after is None:
+            snapshot_seq = None
+
+        if fields is None:
+            query = select(Expense)
+        else:
+            query = select(*ExpenseService._fields_columns(fields, "change_seq", "deleted_at"))
+        query = query.where(
+            (Expense.team_id == team_uuid) & (Expense.change_seq <= current_seq)
+        )
+        if snapshot_seq is not None:
+            # Deletes after the full sync started may hit rows it already sent
+            query = query.where(Expense.deleted_at.is_(None) | (Expense.change_seq > snapshot_seq))
+        if after is not None:
+            query = query.where(tuple_(Expense.change_seq, Expense.id) > tuple_(since, after))
+        elif since > 0:
+            query = query.where(Expense.change_seq > since)
+        changes = session.exec(
+            query.order_by(Expense.change_seq, Expense.id).limit(limit + 1)
+        ).all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        live = [expense for expense in changes if expense.deleted_at is None]
+        return {
+            "seq": changes[-1].change_seq if has_more else current_seq,
+            "has_more": has_more,
+            "after": changes[-1].id if has_more else None,
+            "snapshot_seq": snapshot_seq if has_more else None,
+            "expenses": (
+                ExpenseService.enrich_expenses(session, live, validate) if fields is None
+                else ExpenseService.project_expenses(session, live, fields)
+            ),
+            "deleted": [
+                {"id": expense.id, "deleted_at": expense.deleted_at, "change_seq": expense.change_seq}
+                for expense in changes if expense.deleted_at is not None
+            ]
+        }
+
+    @staticmethod
+    def encode_cursor(expense: Expense) -> str:
+        """Opaque pagination cursor pointing just after `expense`."""
+        payload = json.dumps([expense.created_at.isoformat(), str(expense.id)])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+        """Decode a cursor from `encode_cursor`; raises ValueError if it is malformed."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, expense_id = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(created_at), UUID(expense_id)
+        except (TypeError, ValueError, UnicodeDecodeError) as exc:
+            raise ValueError("Invalid cursor") from exc
+    
+    @staticmethod
+    def get_payer_totals(session: Session, team_id: str) -> Dict[UUID, int]:
+        """Total paid per payer in paise, summed in SQL.
+        
+        Each amount is rounded to whole paise before summing, so the total is
+        exact and matches the ledger. Uses only portable SQL (ROUND/CAST/SUM)
+        and works on SQLite and Postgres alike.
+        """
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        amount_minor = cast(func.round(Expense.total_amount * MINOR_UNITS_PER_MAJOR), Integer)
+        results = session.execute(
+            select(Expense.payer_id, func.sum(amount_minor))
+            .where((Expense.team_id == team_uuid) & Expense.deleted_at.is_(None))
+            .group_by(Expense.payer_id)
         ).all()
+        return {payer_id: int(total or 0) for payer_id, total in results}
     
     @staticmethod
-    def delete_expense(session: Session, expense_id: str) -> bool:
-        """Delete an expense."""
+    def get_participant_share_totals(session: Session, team_id: str) -> Dict[UUID, int]:
+        """Total share owed per participant in paise, summed in SQL."""
+        team_uuid = UUID(team_id) if isinstance(team_id, str) else team_id
+        results = session.execute(
+            select(ExpenseParticipant.user_id, func.sum(ExpenseParticipant.share_minor))
+            .join(Expense, Expense.id == ExpenseParticipant.expense_id)
+            .where((Expense.team_id == team_uuid) & Expense.deleted_at.is_(None))
+            .group_by(ExpenseParticipant.user_id)
+        ).all()
+        return {user_id: int(total or 0) for user_id, total in results}
+    
+    @staticmethod
+    def delete_expense(session: Session, expense_id: str, commit: bool = True) -> bool:
+        """Delete an expense and remove it from member balances.
+        
+        The row stays behind as a tombstone (deleted_at and a new
+        change_seq, no participants) so delta sync can report the deletion.
+        """
         expense = ExpenseService.get_expense(session, expense_id)
         if not expense:
             return False
         
-        session.delete(expense)
-        session.commit()
+        BalanceService.apply_expense(session, expense, sign=-1)
+        session.execute(
+            delete(ExpenseParticipant).where(ExpenseParticipant.expense_id == expense.id)
+        )
+        now = datetime.utcnow()
+        expense.deleted_at = now
+        expense.modified_at = now
+        expense.change_seq = BalanceService.bump_version(session, expense.team_id)
+        session.add(expense)
+        if commit:
+            session.commit()
         return True
     
     @staticmethod
-    def get_expense_participants(expense: Expense) -> List[str]:
-        """Parse participants from expense JSON."""
-        try:
-            return json.loads(expense.participants)
-        except (json.JSONDecodeError, TypeError):
-            return []
+    def bulk_create_expenses(
+        session: Session,
+        team_id: str,
+        expenses: List[dict],
+        commit: bool = True
+    ) -> List[UUID]:
+        """Insert many already-validated expenses with executemany.
+        
+        Each dict has payer_id, total_amount and participants (member UUIDs,
+        deduplicated and in listed order), plus optional category_id,
+        team_category_id, note and created_at. Expense and participant rows
+        go in with one INSERT each and balance deltas are summed over the
+        whole batch, so the cost per expense is a few tuples, not queries.
+        """
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        now = datetime.utcnow()
+        # The whole batch shares one change_seq; it commits as one unit
+        change_seq = BalanceService.bump_version(session, team_uuid)
+        expense_rows = []
+        participant_rows = []
+        deltas: Dict[UUID, List[int]] = {}
+        
+        for data in expenses:
+            expense_id = uuid4()
+            total_minor = to_minor(data["total_amount"])
+            created_at = data.get("created_at") or now
+            expense_rows.append({
+                "id": expense_id,
+                "team_id": team_uuid,
+                "payer_id": data["payer_id"],
+                "total_amount": quantize_amount(data["total_amount"]),
+                "category_id": data.get("category_id"),
+                "team_category_id": data.get("team_category_id"),
+                "note": data.get("note"),
+                "created_at": created_at,
+                "modified_at": created_at,
+                "change_seq": change_seq
+            })
+            deltas.setdefault(data["payer_id"], [0, 0])[0] += total_minor
+            
+            participants = data["participants"]
+            for position, (user_id, share) in enumerate(
+                zip(participants, split_minor(total_minor, len(participants)))
+            ):
+                participant_rows.append({
+                    "id": uuid4(),
+                    "expense_id": expense_id,
+                    "user_id": user_id,
+                    "position": position,
+                    "share_minor": share
+                })
+                deltas.setdefault(user_id, [0, 0])[1] += share
+        
+        if expense_rows:
+            session.execute(insert(Expense), expense_rows)
+        if participant_rows:
+            session.execute(insert(ExpenseParticipant), participant_rows)
+        BalanceService.apply_deltas(
+            session, team_uuid, {user_id: (paid, owed) for user_id, (paid, owed) in deltas.items()}
+        )
+        if commit:
+            session.commit()
+        return [row["id"] for row in expense_rows]
+    
+    @staticmethod
+    def _set_participants(session: Session, expense: Expense, participants: List[str]) -> None:
+        """Replace an expense's participant rows and compute each share.
+        
+        The total is split among participants who are team members, using
+        the same largest-remainder rule as the ledger. Shares are fixed at
+        write time, so balances can be summed straight from this table.
+        """
+        expense_uuid = expense.id if isinstance(expense.id, UUID) else UUID(str(expense.id))
+        team_uuid = expense.team_id if isinstance(expense.team_id, UUID) else UUID(str(expense.team_id))
+        
+        # Drop duplicates but keep the order participants were listed in
+        participant_ids = list(dict.fromkeys(UUID(str(p)) for p in participants))
+        
+        session.execute(
+            delete(ExpenseParticipant).where(ExpenseParticipant.expense_id == expense_uuid)
+        )
+        
+        member_ids = set(session.exec(
+            select(TeamMember.user_id).where(
+                (TeamMember.team_id == team_uuid) &
+                (TeamMember.user_id.in_(participant_ids))
+            )
+        ).all()) if participant_ids else set()
+        member_participants = [p for p in participant_ids if p in member_ids]
+        shares = dict(zip(
+            member_participants,
+            split_minor(to_minor(expense.total_amount), len(member_participants))
+        ))
+        
+        for position, participant_id in enumerate(participant_ids):
+            session.add(ExpenseParticipant(
+                id=uuid4(),
+                expense_id=expense_uuid,
+                user_id=participant_id,
+                position=position,
+                share_minor=shares.get(participant_id, 0)
+            ))
+    
+    @staticmethod
+    def get_expense_participants(session: Session, expense_id: str) -> List[UUID]:
+        """Get participant user IDs of an expense in listed order."""
+        expense_uuid = expense_id if isinstance(expense_id, UUID) else UUID(str(expense_id))
+        return session.exec(
+            select(ExpenseParticipant.user_id)
+            .where(ExpenseParticipant.expense_id == expense_uuid)
+            .order_by(ExpenseParticipant.position)
+        ).all()
+    
+    @staticmethod
+    def get_participants_by_expense(session: Session, expense_ids: List[UUID]) -> Dict[UUID, List[UUID]]:
+        """Get participant user IDs for several expenses in one query."""
+        participants: Dict[UUID, List[UUID]] = {expense_id: [] for expense_id in expense_ids}
+        if not expense_ids:
+            return participants
+        
+        results = session.exec(
+            select(ExpenseParticipant.expense_id, ExpenseParticipant.user_id)
+            .where(ExpenseParticipant.expense_id.in_(expense_ids))
+            .order_by(ExpenseParticipant.expense_id, ExpenseParticipant.position)
+        ).all()
+        for expense_id, user_id in results:
+            participants[expense_id].append(user_id)
+        return participants
 
     @staticmethod
-    def enrich_expense_with_categories(session: Session, expense: Expense) -> ExpenseResponse:
-        """Enrich expense with category details."""
+    def get_categories_by_id(
+        session: Session,
+        expenses: List[Expense]
+    ) -> Tuple[Dict[UUID, ExpenseCategory], Dict[UUID, TeamCustomCategory]]:
+        """Load every default and team category referenced by `expenses`.
+
+        Runs at most one query per category table, however many expenses
+        are passed in.
+        """
+        category_ids = {expense.category_id for expense in expenses if expense.category_id}
+        team_category_ids = {expense.team_category_id for expense in expenses if expense.team_category_id}
+        
+        categories = {}
+        if category_ids:
+            categories = {
+                category.id: category
+                for category in session.exec(
+                    select(ExpenseCategory).where(ExpenseCategory.id.in_(category_ids))
+                ).all()
+            }
+        
+        team_categories = {}
+        if team_category_ids:
+            team_categories = {
+                team_category.id: team_category
+                for team_category in session.exec(
+                    select(TeamCustomCategory).where(TeamCustomCategory.id.in_(team_category_ids))
+                ).all()
+            }
+        
+        return categories, team_categories
+
+    @staticmethod
+    def enrich_expense_with_categories(
+        session: Session,
+        expense: Expense,
+        participants: Optional[List[UUID]] = None,
+        categories: Optional[Dict[UUID, ExpenseCategory]] = None,
+        team_categories: Optional[Dict[UUID, TeamCustomCategory]] = None
+    ) -> ExpenseResponse:
+        """Enrich expense with participant and category details.
+        
+        Listings pass pre-loaded `participants` and category maps so no
+        per-expense queries are issued.
+        """
+        if participants is None:
+            participants = ExpenseService.get_expense_participants(session, expense.id)
+        if categories is None or team_categories is None:
+            categories, team_categories = ExpenseService.get_categories_by_id(session, [expense])
+        return ExpenseResponse(
+            **ExpenseService._expense_dict(expense, participants, categories, team_categories)
+        )
+
+    @staticmethod
+    def _expense_dict(
+        expense: Expense,
+        participants: List[UUID],
+        categories: Dict[UUID, ExpenseCategory],
+        team_categories: Dict[UUID, TeamCustomCategory]
+    ) -> dict:
+        """Build the `ExpenseResponse` shape of an expense as a plain dict."""
         # Convert expense to response format
         expense_data = {
             "id": expense.id,
             "team_id": expense.team_id,
             "payer_id": expense.payer_id,
             "total_amount": expense.total_amount,
-            "participants": json.loads(expense.participants) if expense.participants else [],
+            "participants": participants,
             "category_id": expense.category_id,
             "team_category_id": expense.team_category_id,
             "note": expense.note,
@@ -100,49 +495,150 @@ class ExpenseService:
             "team_category": None
         }
         
-        # Load default category if present
-        if expense.category_id:
-            category = session.exec(
-                select(ExpenseCategory).where(ExpenseCategory.id == expense.category_id)
-            ).first()
-            if category:
-                expense_data["category"] = {
-                    "id": category.id,
-                    "name": category.name,
-                    "emoji": category.emoji,
-                    "is_default": category.is_default,
-                    "created_at": category.created_at,
-                    "modified_at": category.modified_at
-                }
-        
-        # Load team custom category if present
-        if expense.team_category_id:
-            team_category = session.exec(
-                select(TeamCustomCategory).where(TeamCustomCategory.id == expense.team_category_id)
-            ).first()
-            if team_category:
-                expense_data["team_category"] = {
-                    "id": team_category.id,
-                    "name": team_category.name,
-                    "emoji": team_category.emoji,
-                    "team_id": team_category.team_id,
-                    "created_by": team_category.created_by,
-                    "created_at": team_category.created_at,
-                    "modified_at": team_category.modified_at
-                }
-        
-        return ExpenseResponse(**expense_data)
+        # Attach default category if present
+        category = categories.get(expense.category_id) if expense.category_id else None
+        if category:
+            expense_data["category"] = {
+                "id": category.id,
+                "name": category.name,
+                "emoji": category.emoji,
+                "is_default": category.is_default,
+                "created_at": category.created_at,
+                "modified_at": category.modified_at
+            }
+        
+        # Attach team custom category if present
+        team_category = team_categories.get(expense.team_category_id) if expense.team_category_id else None
+        if team_category:
+            expense_data["team_category"] = {
+                "id": team_category.id,
+                "name": team_category.name,
+                "emoji": team_category.emoji,
+                "team_id": team_category.team_id,
+                "created_by": team_category.created_by,
+                "created_at": team_category.created_at,
+                "modified_at": team_category.modified_at
+            }
+        
+        return expense_data
 
     @staticmethod
-    def get_enriched_team_expenses(
+    def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Tuple[str, ...]]]:
+        """Parse a sparse fieldset such as "total_amount,payer_id,note,category.emoji".
+        
+        Returns the selected `ExpenseResponse` fields in response order, each
+        mapped to its selected subfields (all of them when a category object
+        is named whole, none for plain fields), or None when `fields` selects
+        nothing and the full response applies. Raises ValueError on names
+        that are not in the response.
+        """
+        selected: Dict[str, set] = {}
+        for name in filter(None, (part.strip() for part in (fields or "").split(","))):
+            field, dot, subfield = name.partition(".")
+            if field not in EXPENSE_FIELDS or (dot and subfield not in CATEGORY_FIELDS.get(field, ())):
+                raise ValueError(f"Unknown field: {name}")
+            subfields = selected.setdefault(field, set())
+            if field in CATEGORY_FIELDS:
+                subfields.update([subfield] if dot else CATEGORY_FIELDS[field])
+        if not selected:
+            return None
+        return {
+            field: tuple(sub for sub in CATEGORY_FIELDS.get(field, ()) if sub in selected[field])
+            for field in EXPENSE_FIELDS if field in selected
+        }
+    
+    @staticmethod
+    def _fields_columns(fields: Dict[str, Tuple[str, ...]], *extra: str) -> list:
+        """Expense columns needed to build `fields`, plus `extra` column names.
+        
+        The id is always read, since participants are looked up by it.
+        """
+        names = {"id", *extra}
+        for field in fields:
+            if field in CATEGORY_FIELDS:
+                names.add(f"{field}_id")
+            elif field != "participants":
+                names.add(field)
+        return [getattr(Expense, column.name) for column in Expense.__table__.columns if column.name in names]
+    
+    @staticmethod
+    def _get_category_fields(session: Session, model, category_ids: set, names: Tuple[str, ...]) -> Dict[UUID, dict]:
+        """Load just the `names` columns of the given categories, keyed by ID."""
+        if not category_ids or not names:
+            return {}
+        rows = session.execute(
+            select(model.id, *(getattr(model, name) for name in names)).where(model.id.in_(category_ids))
+        ).all()
+        return {row[0]: dict(zip(names, row[1:])) for row in rows}
+    
+    @staticmethod
+    def project_expenses(session: Session, rows: list, fields: Dict[str, Tuple[str, ...]]) -> List[dict]:
+        """Build the `fields` of each row selected with `_fields_columns` as plain dicts.
+        
+        Participants and the selected category columns are batch-loaded,
+        and only when the fieldset asks for them.
+        """
+        participants = {}
+        if "participants" in fields:
+            participants = ExpenseService.get_participants_by_expense(session, [row.id for row in rows])
+        categories = {
+            field: ExpenseService._get_category_fields(
+                session,
+                ExpenseCategory if field == "category" else TeamCustomCategory,
+                {getattr(row, f"{field}_id") for row in rows} - {None},
+                fields[field]
+            )
+            for field in CATEGORY_FIELDS if field in fields
+        }
+        
+        projected = []
+        for row in rows:
+            data = {}
+            for field in fields:
+                if field == "participants":
+                    data[field] = participants[row.id]
+                elif field in categories:
+                    data[field] = categories[field].get(getattr(row, f"{field}_id"))
+                else:
+                    data[field] = getattr(row, field)
+            projected.append(data)
+        return projected
+    
+    @staticmethod
+    def get_expense_fields(
         session: Session,
-        team_id: str,
-        limit: int = 100,
-        offset: int = 0
-    ) -> List[ExpenseResponse]:
-        """Get all expenses for a team with category details."""
-        expenses = ExpenseService.get_team_expenses(session, team_id, limit, offset)
-        return [ExpenseService.enrich_expense_with_categories(session, expense) for expense in expenses]
+        expense_id: str,
+        fields: Dict[str, Tuple[str, ...]],
+        team_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Get only the `fields` of one expense, or None if it does not exist, is deleted or is not in `team_id`."""
+        query = select(*ExpenseService._fields_columns(fields)).where(
+            (Expense.id == expense_id) & Expense.deleted_at.is_(None)
+        )
+        if team_id is not None:
+            query = query.where(Expense.team_id == UUID(str(team_id)))
+        row = session.execute(query).first()
+        return ExpenseService.project_expenses(session, [row], fields)[0] if row else None
+
+    @staticmethod
+    def enrich_expenses(session: Session, expenses: List[Expense], validate: bool = True) -> list:
+        """Enrich a page of expenses.
+        
+        Participants and categories are batch-loaded per page, so the query
+        count does not grow with the page size. With `validate=False` the
+        result is plain dicts in the `ExpenseResponse` shape, built from
+        already-typed database values without a Pydantic pass, for
+        endpoints that return a `FastJSONResponse`.
+        """
+        participants = ExpenseService.get_participants_by_expense(session, [e.id for e in expenses])
+        categories, team_categories = ExpenseService.get_categories_by_id(session, expenses)
+        build = ExpenseService._expense_dict
+        if validate:
+            return [
+                ExpenseResponse(**build(expense, participants[expense.id], categories, team_categories))
+                for expense in expenses
+            ]
+        return [build(expense, participants[expense.id], categories, team_categories) for expense in expenses]
     
     @staticmethod
     def update_expense(
@@ -152,22 +648,26 @@ class ExpenseService:
         participants: Optional[List[str]] = None,
         category_id: Optional[str] = None,
         team_category_id: Optional[str] = None,
-        note: Optional[str] = None
+        note: Optional[str] = None,
+        commit: bool = True
     ) -> Optional[Expense]:
-        """Update an existing expense."""
-        expense = session.exec(
-            select(Expense).where(Expense.id == expense_id)
-        ).first()
-        
+        """Update an existing expense and re-apply it to member balances."""
+        expense = ExpenseService.get_expense(session, expense_id)
         if not expense:
             return None
         
+        # Take the old amounts out of the balance table before changing them
+        BalanceService.apply_expense(session, expense, sign=-1)
+        
         # Update only provided fields
         if total_amount is not None:
-            expense.total_amount = total_amount
+            expense.total_amount = quantize_amount(total_amount)
         
-        if participants is not None:
-            expense.participants = json.dumps([str(p) for p in participants])
+        if participants is not None or total_amount is not None:
+            # Shares depend on both the amount and who takes part
+            if participants is None:
+                participants = ExpenseService.get_expense_participants(session, expense.id)
+            ExpenseService._set_participants(session, expense, participants)
         
         if category_id is not None:
             expense.category_id = category_id
@@ -186,7 +686,10 @@ class ExpenseService:
         
         expense.modified_at = datetime.utcnow()
         session.add(expense)
-        session.commit()
-        session.refresh(expense)
+        BalanceService.apply_expense(session, expense)
+        expense.change_seq = BalanceService.bump_version(session, expense.team_id)
+        if commit:
+            session.commit()
+            session.refresh(expense)
         
         return expense
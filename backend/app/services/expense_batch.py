@@ -0,0 +1,120 @@
+"""Apply many expense changes in one transaction."""
+from typing import List
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from app.models.schemas import Expense, ExpenseMutation, ExpenseMutationType, ExpenseUpdate
+from app.services.expense import ExpenseService
+from app.services.team import TeamService
+
+MAX_BATCH_MUTATIONS = 500
+
+
+class ExpenseMutationError(ValueError):
+    """A batch change that cannot be applied; the whole batch is rolled back."""
+
+    def __init__(self, index: int, detail: str, status_code: int = 400):
+        super().__init__(f"Operation {index}: {detail}")
+        self.index = index
+        self.detail = detail
+        self.status_code = status_code
+
+
+class ExpenseBatchService:
+    """Service for applying an ordered list of expense changes atomically.
+
+    Built for offline clients syncing many edits at once: the membership of
+    every participant and every expense being changed is loaded up front in
+    one query each, the changes run without committing, and a single commit
+    makes them visible together.
+    """
+
+    @staticmethod
+    def apply_mutations(
+        session: Session,
+        team_id: str,
+        user_id: str,
+        operations: List[ExpenseMutation]
+    ) -> List[dict]:
+        """Apply `operations` in order as `user_id` and commit once.
+
+        Creates are paid by `user_id`; updates need `user_id` to be the
+        payer and deletes the payer or team creator, as in the single
+        expense endpoints. Returns {"op", "expense_id", "expense"} per
+        operation. Raises ExpenseMutationError, after rolling back, on the
+        first operation that cannot be applied.
+        """
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+
+        try:
+            participant_ids = {
+                participant
+                for operation in operations if operation.data and operation.data.participants
+                for participant in operation.data.participants
+            }
+            member_ids = TeamService.get_member_ids(session, team_uuid, list(participant_ids))
+            existing_ids = {operation.expense_id for operation in operations if operation.expense_id}
+            existing = {
+                expense.id: expense
+                for expense in session.exec(
+                    select(Expense).where(Expense.id.in_(existing_ids) & Expense.deleted_at.is_(None))
+                ).all()
+            } if existing_ids else {}
+            team = TeamService.get_team(session, team_uuid)
+
+            touched: List[tuple] = []
+            for index, operation in enumerate(operations):
+                data = operation.data
+                if data and data.participants is not None and not all(p in member_ids for p in data.participants):
+                    raise ExpenseMutationError(index, "All participants must be team members")
+                if data and data.total_amount is not None and data.total_amount <= 0:
+                    raise ExpenseMutationError(index, "total_amount must be greater than 0")
+
+                if operation.op == ExpenseMutationType.CREATE:
+                    if not data or data.total_amount is None or not data.participants:
+                        raise ExpenseMutationError(index, "create requires total_amount and participants")
+                    expense = ExpenseService.create_expense(
+                        session, team_uuid, user_uuid, data.total_amount, data.participants,
+                        data.category_id, data.team_category_id, data.note, commit=False
+                    )
+                    touched.append((operation.op, expense.id))
+                    continue
+
+                expense = existing.get(operation.expense_id)
+                if expense is None or expense.team_id != team_uuid:
+                    raise ExpenseMutationError(index, "Expense not found", status_code=404)
+
+                if operation.op == ExpenseMutationType.UPDATE:
+                    if expense.payer_id != user_uuid:
+                        raise ExpenseMutationError(index, "You can only edit expenses you created", status_code=403)
+                    data = data or ExpenseUpdate()
+                    ExpenseService.update_expense(
+                        session, expense.id, data.total_amount, data.participants,
+                        data.category_id, data.team_category_id, data.note, commit=False
+                    )
+                else:
+                    if expense.payer_id != user_uuid and team.created_by != user_uuid:
+                        raise ExpenseMutationError(index, "You cannot delete this expense", status_code=403)
+                    ExpenseService.delete_expense(session, expense.id, commit=False)
+                    # Later operations in the batch must not see it any more
+                    del existing[expense.id]
+                touched.append((operation.op, expense.id))
+
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        # Reload everything that still exists in one query
+        kept_ids = [expense_id for op, expense_id in touched if op != ExpenseMutationType.DELETE]
+        expenses = session.exec(select(Expense).where(Expense.id.in_(kept_ids))).all() if kept_ids else []
+        enriched = {
+            response.id: response
+            for response in ExpenseService.enrich_expenses(session, expenses)
+        }
+        return [
+            {"op": op, "expense_id": expense_id, "expense": enriched.get(expense_id)}
+            for op, expense_id in touched
+        ]
@@ -0,0 +1,111 @@
+"""Streaming expense export to CSV or NDJSON."""
+import csv
+import io
+import json
+from typing import Iterator, List
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.schemas import Expense, ExpenseCategory, TeamCustomCategory
+from app.services.expense import ExpenseService
+from app.services.ledger import quantize_amount
+
+EXPORT_BATCH_SIZE = 1000
+
+# Columns match what ExpenseImportService reads, so an export can be re-imported
+EXPORT_COLUMNS = ["id", "created_at", "payer_id", "total_amount", "participants", "category", "category_emoji", "note"]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExpenseExportService:
+    """Service for exporting a team's full expense history.
+
+    Expenses are read oldest first through a server-side cursor, one batch
+    at a time, and written out as each batch arrives; nothing holds more
+    than `batch_size` expenses in memory.
+    """
+
+    @staticmethod
+    def iter_record_batches(
+        session: Session,
+        team_id: str,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[List[dict]]:
+        """Yield lists of export records, each with category name and participants filled in."""
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        result = session.execute(
+            select(
+                Expense.id,
+                Expense.created_at,
+                Expense.payer_id,
+                Expense.total_amount,
+                func.coalesce(TeamCustomCategory.name, ExpenseCategory.name),
+                func.coalesce(TeamCustomCategory.emoji, ExpenseCategory.emoji),
+                Expense.note
+            )
+            .outerjoin(ExpenseCategory, ExpenseCategory.id == Expense.category_id)
+            .outerjoin(TeamCustomCategory, TeamCustomCategory.id == Expense.team_category_id)
+            .where((Expense.team_id == team_uuid) & Expense.deleted_at.is_(None))
+            .order_by(Expense.created_at, Expense.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            participants = ExpenseService.get_participants_by_expense(session, [row[0] for row in rows])
+            yield [
+                {
+                    "id": str(expense_id),
+                    "created_at": created_at.isoformat(),
+                    "payer_id": str(payer_id),
+                    "total_amount": quantize_amount(total_amount),
+                    "participants": [str(user_id) for user_id in participants[expense_id]],
+                    "category": category,
+                    "category_emoji": emoji,
+                    "note": note
+                }
+                for expense_id, created_at, payer_id, total_amount, category, emoji, note in rows
+            ]
+
+    @staticmethod
+    def iter_csv(session: Session, team_id: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        """Yield CSV text, one chunk per batch; participants are `;`-separated."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue()
+
+        for records in ExpenseExportService.iter_record_batches(session, team_id, batch_size):
+            buffer.seek(0)
+            buffer.truncate()
+            for record in records:
+                writer.writerow({
+                    **record,
+                    "total_amount": f"{record['total_amount']:.2f}",
+                    "participants": ";".join(record["participants"])
+                })
+            yield buffer.getvalue()
+
+    @staticmethod
+    def iter_ndjson(session: Session, team_id: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        """Yield NDJSON text, one chunk per batch."""
+        for records in ExpenseExportService.iter_record_batches(session, team_id, batch_size):
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    @staticmethod
+    def iter_export(
+        session: Session,
+        team_id: str,
+        export_format: str,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[str]:
+        """Yield the export in `export_format` ("csv" or "ndjson")."""
+        if export_format == "csv":
+            return ExpenseExportService.iter_csv(session, team_id, batch_size)
+        if export_format == "ndjson":
+            return ExpenseExportService.iter_ndjson(session, team_id, batch_size)
+        raise ValueError(f"Unsupported export format: {export_format}")
@@ -0,0 +1,226 @@
+"""Bulk expense import from CSV or NDJSON."""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from app.models.schemas import ExpenseCategory, TeamCustomCategory, TeamMember, User
+from app.services.expense import ExpenseService
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Accepted formats and the file suffixes / content types that imply them
+IMPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "ndjson": (".ndjson", ".jsonl", "application/x-ndjson", "application/jsonl"),
+}
+
+
+class ImportRowError(ValueError):
+    """A single import row that cannot be turned into an expense."""
+
+
+class ExpenseImportService:
+    """Service for importing many expenses into a team at once.
+
+    Rows are parsed one at a time from the uploaded file, validated against
+    member and category lookups loaded once per import, and written in
+    batches through `ExpenseService.bulk_create_expenses`.
+
+    Columns / keys: payer (user ID or email), total_amount, participants
+    (user IDs or emails; a JSON list, or `;`-separated in CSV), and
+    optionally category (ID or name), note and created_at (ISO 8601).
+    """
+
+    @staticmethod
+    def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+        """Guess the import format from a file name or content type."""
+        name = (filename or "").lower()
+        for import_format, markers in IMPORT_FORMATS.items():
+            if any(name.endswith(marker) or content_type == marker for marker in markers):
+                return import_format
+        return None
+
+    @staticmethod
+    def iter_rows(stream: BinaryIO, import_format: str) -> Iterator[Tuple[int, object]]:
+        """Yield (line_number, row) pairs from a binary stream.
+
+        A row is a dict, or an ImportRowError when the line cannot be parsed.
+        """
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        if import_format == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row
+        elif import_format == "ndjson":
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_number, ImportRowError(f"Invalid JSON: {exc.msg}")
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, ImportRowError("Each line must be a JSON object")
+                    continue
+                yield line_number, row
+        else:
+            raise ValueError(f"Unsupported import format: {import_format}")
+
+    @staticmethod
+    def _load_lookups(session: Session, team_id: UUID) -> Tuple[Dict[str, UUID], Dict[str, dict]]:
+        """Load member and category lookups for a team, keyed by lower-case ID, email or name."""
+        members: Dict[str, UUID] = {}
+        for user_id, email in session.exec(
+            select(TeamMember.user_id, User.email)
+            .join(User, User.id == TeamMember.user_id)
+            .where(TeamMember.team_id == team_id)
+        ).all():
+            members[str(user_id)] = user_id
+            members[email.lower()] = user_id
+
+        categories: Dict[str, dict] = {}
+        for category in session.exec(select(ExpenseCategory)).all():
+            value = {"category_id": category.id}
+            categories[str(category.id)] = value
+            categories[category.name.lower()] = value
+        # Team categories win over default categories with the same name
+        for category in session.exec(
+            select(TeamCustomCategory).where(TeamCustomCategory.team_id == team_id)
+        ).all():
+            value = {"team_category_id": category.id}
+            categories[str(category.id)] = value
+            categories[category.name.lower()] = value
+
+        return members, categories
+
+    @staticmethod
+    def parse_row(row: dict, members: Dict[str, UUID], categories: Dict[str, dict]) -> dict:
+        """Validate one raw row and convert it into `bulk_create_expenses` input."""
+        def resolve_member(value, field: str) -> UUID:
+            key = str(value).strip().lower()
+            if key not in members:
+                raise ImportRowError(f"{field} {value!r} is not a team member")
+            return members[key]
+
+        payer = row.get("payer") or row.get("payer_id")
+        if not payer:
+            raise ImportRowError("payer is required")
+        payer_id = resolve_member(payer, "payer")
+
+        try:
+            total_amount = Decimal(str(row.get("total_amount", "")).strip())
+        except InvalidOperation:
+            raise ImportRowError("total_amount must be a number")
+        if not total_amount.is_finite() or total_amount <= 0:
+            raise ImportRowError("total_amount must be greater than 0")
+
+        raw_participants = row.get("participants") or []
+        if isinstance(raw_participants, str):
+            raw_participants = [p for p in raw_participants.replace(",", ";").split(";") if p.strip()]
+        if not isinstance(raw_participants, list):
+            raise ImportRowError("participants must be a list")
+        participants = list(dict.fromkeys(
+            resolve_member(participant, "participant") for participant in raw_participants
+        ))
+        if not participants:
+            # Nobody would owe the payer anything, and balances would not sum to zero
+            raise ImportRowError("participants must list at least one team member")
+
+        expense = {
+            "payer_id": payer_id,
+            "total_amount": total_amount,
+            "participants": participants,
+            "note": row.get("note") or None,
+        }
+
+        category = row.get("category") or row.get("category_id") or row.get("team_category_id")
+        if category:
+            key = str(category).strip().lower()
+            if key not in categories:
+                raise ImportRowError(f"Unknown category {category!r}")
+            expense.update(categories[key])
+
+        created_at = row.get("created_at")
+        if created_at:
+            try:
+                expense["created_at"] = datetime.fromisoformat(str(created_at).strip())
+            except ValueError:
+                raise ImportRowError("created_at must be an ISO 8601 date/time")
+            if expense["created_at"].tzinfo is not None:
+                raise ImportRowError("created_at must not include a timezone (UTC is assumed)")
+
+        return expense
+
+    @staticmethod
+    def import_expenses(
+        session: Session,
+        team_id: str,
+        stream: BinaryIO,
+        import_format: str,
+        batch_size: int = IMPORT_BATCH_SIZE
+    ) -> dict:
+        """Import expenses from a CSV/NDJSON stream into a team.
+
+        Valid rows are committed in batches of `batch_size`; invalid rows
+        are skipped and reported with their line number. Returns
+        {"imported", "failed", "errors", "error"}; at most
+        MAX_REPORTED_ERRORS errors are listed.
+
+        A file that cannot be read (bad UTF-8, malformed CSV) is rejected
+        with UnicodeDecodeError / csv.Error if it breaks before the first
+        batch is committed. Once batches are committed the import stops
+        at the break instead: every row before it is imported and `error`
+        gives the first line not read, so the rest can be imported again.
+        """
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        members, categories = ExpenseImportService._load_lookups(session, team_uuid)
+
+        imported = 0
+        failed = 0
+        errors: List[dict] = []
+        batch: List[dict] = []
+
+        def flush() -> None:
+            nonlocal imported
+            if batch:
+                ExpenseService.bulk_create_expenses(session, team_uuid, batch)
+                imported += len(batch)
+                batch.clear()
+
+        last_line = 1 if import_format == "csv" else 0
+        stream_error = None
+        try:
+            for last_line, row in ExpenseImportService.iter_rows(stream, import_format):
+                try:
+                    if isinstance(row, ImportRowError):
+                        raise row
+                    batch.append(ExpenseImportService.parse_row(row, members, categories))
+                except ImportRowError as exc:
+                    failed += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"row": last_line, "error": str(exc)})
+                    continue
+                if len(batch) >= batch_size:
+                    flush()
+        except (UnicodeDecodeError, csv.Error) as exc:
+            if not imported:
+                raise
+            stream_error = {"row": last_line + 1, "error": ExpenseImportService.describe_stream_error(exc)}
+        flush()
+
+        return {"imported": imported, "failed": failed, "errors": errors, "error": stream_error}
+
+    @staticmethod
+    def describe_stream_error(exc: Exception) -> str:
+        """Message for a file that cannot be read any further."""
+        if isinstance(exc, UnicodeDecodeError):
+            return "Import file must be UTF-8 encoded"
+        return f"Malformed CSV: {exc}"
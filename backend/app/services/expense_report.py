@@ -0,0 +1,130 @@
+"""Expense totals for trip reports, aggregated in SQL."""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Date, Integer, cast, func, literal_column
+from sqlmodel import Session, select
+
+from app.models.schemas import Expense, ExpenseCategory, ExpenseParticipant, TeamCustomCategory
+from app.services.ledger import MINOR_UNITS_PER_MAJOR, from_minor
+
+REPORT_PERIODS = ("day", "week")
+
+
+class ExpenseReportService:
+    """Service for aggregating a team's expenses into report totals.
+
+    Every grouping is a single GROUP BY over the (team_id, created_at)
+    index range, summing whole paise, so totals are exact and the cost
+    does not depend on shipping rows to the client.
+    """
+
+    @staticmethod
+    def _period_start(session: Session, period: str):
+        """SQL expression for the first day of the day/week an expense falls in (weeks start Monday)."""
+        if period == "day":
+            return func.date(Expense.created_at)
+        if session.get_bind().dialect.name == "sqlite":
+            return func.date(Expense.created_at, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+        return cast(func.date_trunc("week", Expense.created_at), Date)
+
+    @staticmethod
+    def get_team_report(
+        session: Session,
+        team_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        period: str = "day"
+    ) -> dict:
+        """Get team expense totals by category, payer, participant and day or week.
+
+        `start` is inclusive and `end` exclusive. Amounts are in major units;
+        participant totals are the shares each member owes.
+        """
+        if period not in REPORT_PERIODS:
+            raise ValueError(f"Unsupported report period: {period}")
+
+        team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+        conditions = [Expense.team_id == team_uuid, Expense.deleted_at.is_(None)]
+        if start is not None:
+            conditions.append(Expense.created_at >= start)
+        if end is not None:
+            conditions.append(Expense.created_at < end)
+
+        amount_minor = func.sum(cast(func.round(Expense.total_amount * MINOR_UNITS_PER_MAJOR), Integer))
+        expense_count = func.count(Expense.id)
+
+        total_minor, count = session.execute(
+            select(amount_minor, expense_count).where(*conditions)
+        ).one()
+
+        category_name = func.coalesce(TeamCustomCategory.name, ExpenseCategory.name)
+        category_emoji = func.coalesce(TeamCustomCategory.emoji, ExpenseCategory.emoji)
+        by_category = session.execute(
+            select(
+                Expense.category_id, Expense.team_category_id, category_name, category_emoji,
+                amount_minor, expense_count
+            )
+            .outerjoin(ExpenseCategory, ExpenseCategory.id == Expense.category_id)
+            .outerjoin(TeamCustomCategory, TeamCustomCategory.id == Expense.team_category_id)
+            .where(*conditions)
+            .group_by(Expense.category_id, Expense.team_category_id, category_name, category_emoji)
+            .order_by(amount_minor.desc())
+        ).all()
+
+        by_payer = session.execute(
+            select(Expense.payer_id, amount_minor, expense_count)
+            .where(*conditions)
+            .group_by(Expense.payer_id)
+            .order_by(amount_minor.desc())
+        ).all()
+
+        share_minor = func.sum(ExpenseParticipant.share_minor)
+        by_participant = session.execute(
+            select(ExpenseParticipant.user_id, share_minor, func.count(ExpenseParticipant.id))
+            .join(Expense, Expense.id == ExpenseParticipant.expense_id)
+            .where(*conditions)
+            .group_by(ExpenseParticipant.user_id)
+            .order_by(share_minor.desc())
+        ).all()
+
+        period_start = ExpenseReportService._period_start(session, period)
+        by_period = session.execute(
+            select(period_start, amount_minor, expense_count)
+            .where(*conditions)
+            .group_by(period_start)
+            .order_by(period_start)
+        ).all()
+
+        return {
+            "team_id": str(team_uuid),
+            "start": start,
+            "end": end,
+            "period": period,
+            "total_amount": from_minor(int(total_minor or 0)),
+            "expense_count": count,
+            "by_category": [
+                {
+                    "category_id": category_id,
+                    "team_category_id": team_category_id,
+                    "name": name,
+                    "emoji": emoji,
+                    "total_amount": from_minor(int(total)),
+                    "expense_count": rows
+                }
+                for category_id, team_category_id, name, emoji, total, rows in by_category
+            ],
+            "by_payer": [
+                {"user_id": user_id, "total_amount": from_minor(int(total)), "expense_count": rows}
+                for user_id, total, rows in by_payer
+            ],
+            "by_participant": [
+                {"user_id": user_id, "total_share": from_minor(int(total)), "expense_count": rows}
+                for user_id, total, rows in by_participant
+            ],
+            "by_period": [
+                {"period_start": str(day), "total_amount": from_minor(int(total)), "expense_count": rows}
+                for day, total, rows in by_period
+            ]
+        }
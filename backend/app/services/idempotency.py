@@ -0,0 +1,148 @@
+"""Idempotency key store for retried write requests."""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.schemas import IdempotencyKey
+
+MAX_KEY_LENGTH = 255  # Matches IdempotencyKey.key
+
+_last_purge = 0.0
+
+
+class IdempotencyConflict(ValueError):
+    """An idempotency key that is in use by a different or still-running request."""
+
+
+class IdempotencyService:
+    """Service for storing and replaying responses by Idempotency-Key.
+
+    A request claims its key by flushing a row before doing any work. The
+    unique (user_id, scope, key) constraint makes a concurrent retry wait
+    for the first request's transaction and then fail the claim, so the
+    write path runs at most once per key; the response is saved on the same
+    row and committed with (or right after) the write itself.
+    """
+
+    @staticmethod
+    def request_hash(payload: Any) -> str:
+        """SHA-256 of a JSON-serialisable request payload, independent of key order."""
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    @staticmethod
+    def get_key(session: Session, user_id: str, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Get an unexpired key record."""
+        user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+        return session.exec(
+            select(IdempotencyKey).where(
+                (IdempotencyKey.user_id == user_uuid) &
+                (IdempotencyKey.scope == scope) &
+                (IdempotencyKey.key == key) &
+                (IdempotencyKey.expires_at > datetime.utcnow())
+            )
+        ).first()
+
+    @staticmethod
+    def claim(
+        session: Session,
+        user_id: str,
+        scope: str,
+        key: str,
+        request_hash: str
+    ) -> Optional[IdempotencyKey]:
+        """Claim `key` for a new request, or return the stored record of an earlier one.
+
+        Returns None once the claim row is flushed; the caller then does the
+        write and `save_response` before committing. Returns the earlier
+        record if it finished with a response to replay. Raises
+        IdempotencyConflict if the key was used with a different body or
+        the earlier request has not finished.
+        """
+        user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+        existing = IdempotencyService.get_key(session, user_uuid, scope, key)
+        if existing is None:
+            # An expired record with the same key would block the new claim
+            session.execute(
+                delete(IdempotencyKey).where(
+                    (IdempotencyKey.user_id == user_uuid) &
+                    (IdempotencyKey.scope == scope) &
+                    (IdempotencyKey.key == key)
+                )
+            )
+            now = datetime.utcnow()
+            session.add(IdempotencyKey(
+                id=uuid4(),
+                user_id=user_uuid,
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                created_at=now,
+                expires_at=now + timedelta(hours=get_settings().IDEMPOTENCY_KEY_TTL_HOURS)
+            ))
+            try:
+                session.flush()
+                return None
+            except IntegrityError:
+                # A concurrent request with the same key committed first
+                session.rollback()
+                existing = IdempotencyService.get_key(session, user_uuid, scope, key)
+                if existing is None:
+                    raise
+
+        if existing.request_hash != request_hash:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        if existing.status_code is None:
+            raise IdempotencyConflict("A request with this Idempotency-Key is still being processed")
+        return existing
+
+    @staticmethod
+    def save_response(
+        session: Session,
+        user_id: str,
+        scope: str,
+        key: str,
+        body: Any,
+        status_code: int = 200
+    ) -> None:
+        """Store the response on this request's claim; it is saved with the next commit."""
+        record = IdempotencyService.get_key(session, user_id, scope, key)
+        if record is None:
+            return
+        record.status_code = status_code
+        record.response_body = json.dumps(body, separators=(",", ":"))
+        session.add(record)
+
+    @staticmethod
+    def purge_expired(session: Session) -> int:
+        """Delete expired keys and commit `session`; returns how many were removed.
+
+        Commits, so give it a session of its own rather than a request's.
+        """
+        result = session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())
+        )
+        session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def purge_expired_if_due(session: Session) -> None:
+        """Purge expired keys at most once per IDEMPOTENCY_PURGE_INTERVAL_SECONDS per process.
+
+        Commits `session`; the scheduler calls this with a session of its
+        own, never a request's.
+        """
+        global _last_purge
+        now = time.monotonic()
+        if now - _last_purge < get_settings().IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+            return
+        _last_purge = now
+        IdempotencyService.purge_expired(session)
@@ -0,0 +1,138 @@
+"""Fixed-point ledger core shared by settlement and budget calculations.
+
+All money is tracked as integer minor units (paise), so balances are exact
+and always sum to zero. Floats only appear at the API boundary.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Tuple, Union
+from uuid import UUID
+
+MINOR_UNITS_PER_MAJOR = 100
+
+Amount = Union[int, float, Decimal]
+
+# (payer_id, participant_ids, total_amount) as read from the expense table
+ExpenseRow = Tuple[Union[str, UUID], Iterable[Union[str, UUID]], float]
+
+
+def to_minor(amount: Amount) -> int:
+    """Convert a major-unit amount (e.g. 12.34) to integer minor units (1234).
+
+    Rounds half away from zero on the decimal representation, so 0.145
+    becomes 15 paise rather than whatever the binary float happens to be.
+    """
+    if isinstance(amount, int):
+        return amount * MINOR_UNITS_PER_MAJOR
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * MINOR_UNITS_PER_MAJOR).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor: int) -> float:
+    """Convert integer minor units back to a major-unit float."""
+    return minor / MINOR_UNITS_PER_MAJOR
+
+
+def quantize_amount(amount: Amount) -> float:
+    """Round an amount to the nearest representable minor unit."""
+    return from_minor(to_minor(amount))
+
+
+def split_minor(total_minor: int, count: int) -> List[int]:
+    """Split an amount into `count` equal shares using largest remainder.
+
+    Every share gets the floor of the exact share and the leftover minor
+    units go one each to the first participants, so shares always add up
+    to exactly `total_minor` and the result only depends on participant order.
+    """
+    if count <= 0:
+        return []
+    base, remainder = divmod(total_minor, count)
+    return [base + 1 if index < remainder else base for index in range(count)]
+
+
+def as_uuid(value: Union[str, UUID]) -> UUID:
+    """Coerce a string or UUID into a UUID."""
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+class Ledger:
+    """Accumulates expenses for a set of team members in minor units."""
+
+    def __init__(self, members: Iterable[UUID]):
+        self.paid: Dict[UUID, int] = {}
+        self.owed: Dict[UUID, int] = {}
+        for member in members:
+            self.paid[member] = 0
+            self.owed[member] = 0
+
+    @classmethod
+    def from_expenses(
+        cls,
+        expenses: Iterable[dict],
+        members: Iterable[UUID]
+    ) -> "Ledger":
+        """Build a ledger from expense dicts ({payer_id, participants, total_amount})."""
+        rows = (
+            (expense["payer_id"], expense["participants"], expense["total_amount"])
+            for expense in expenses
+        )
+        return cls.from_rows(rows, members)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[ExpenseRow],
+        members: Iterable[UUID]
+    ) -> "Ledger":
+        """Build a ledger from (payer_id, participants, total_amount) rows.
+
+        Rows are consumed one at a time, so a streaming iterator keeps
+        memory constant.
+        """
+        ledger = cls(members)
+        for payer_id, participants, total_amount in rows:
+            ledger.add_expense(payer_id, participants, to_minor(total_amount))
+        return ledger
+
+    def add_expense(
+        self,
+        payer_id: Union[str, UUID],
+        participants: Iterable[Union[str, UUID]],
+        total_minor: int
+    ) -> None:
+        """Record an expense paid by `payer_id` and split among `participants`.
+
+        Only current team members are credited or charged; the amount is
+        split among the participants that are members.
+        """
+        owed = self.owed
+
+        self.add_payment(payer_id, total_minor)
+
+        valid_participants = [p for p in map(as_uuid, participants) if p in owed]
+        for participant, share in zip(valid_participants, split_minor(total_minor, len(valid_participants))):
+            owed[participant] += share
+
+    def add_payment(self, payer_id: Union[str, UUID], amount_minor: int) -> None:
+        """Credit a payment to `payer_id` if they are a member."""
+        payer_id = as_uuid(payer_id)
+        if payer_id in self.paid:
+            self.paid[payer_id] += amount_minor
+
+    def add_share(self, participant_id: Union[str, UUID], share_minor: int) -> None:
+        """Charge an already-computed share to `participant_id` if they are a member."""
+        participant_id = as_uuid(participant_id)
+        if participant_id in self.owed:
+            self.owed[participant_id] += share_minor
+
+    def settlement_balances(self) -> Dict[UUID, int]:
+        """Net position per member: positive is owed money, negative owes money."""
+        return {member: self.paid[member] - self.owed[member] for member in self.paid}
+
+    def budget_balances(self, member_budgets_minor: Dict[UUID, int]) -> Dict[UUID, int]:
+        """Remaining budget per member after the payments they actually made."""
+        return {
+            member: member_budgets_minor.get(member, 0) - paid
+            for member, paid in self.paid.items()
+        }
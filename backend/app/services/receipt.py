@@ -0,0 +1,271 @@
+"""Receipt attachment storage."""
+import glob
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.schemas import Expense, ExpenseReceipt
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it receipts have no thumbnails
+    Image = None
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+THUMBNAIL_QUALITY = 80
+# Largest image decoded for a thumbnail; ~50 megapixels covers any phone
+# camera, while a small upload claiming huge dimensions would need GBs
+THUMBNAIL_MAX_PIXELS = 50_000_000
+# An unreferenced blob touched by a deduplicating upload within this window
+# is kept, as that upload's receipt row may not be committed yet
+ORPHAN_GRACE_SECONDS = 60
+
+# Leading bytes of the accepted receipt types
+RECEIPT_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+HEIC_BRANDS = (b"ftypheic", b"ftypheix", b"ftypmif1")
+
+
+class ReceiptTooLarge(ValueError):
+    """An upload over RECEIPT_MAX_BYTES."""
+
+
+class UnsupportedReceiptType(ValueError):
+    """An upload that is not an accepted image or PDF."""
+
+
+class ReceiptService:
+    """Service for storing and serving expense receipts.
+
+    Files are stored once per SHA-256 under RECEIPT_STORAGE_DIR, outside the
+    database; rows in ExpenseReceipt point at them by digest, so the same
+    photo attached to many expenses, in any team, takes up space once.
+    Uploads are written to a temporary file while hashing and renamed into
+    place, so a blob is either complete or absent.
+    """
+
+    @staticmethod
+    def blob_path(sha256: str) -> str:
+        """Path of the stored file with this digest."""
+        return os.path.join(get_settings().RECEIPT_STORAGE_DIR, "blobs", sha256[:2], sha256)
+
+    @staticmethod
+    def thumbnail_path(sha256: str, size: int) -> str:
+        """Path of the cached JPEG thumbnail of a blob at `size` pixels."""
+        return os.path.join(get_settings().RECEIPT_STORAGE_DIR, "thumbnails", sha256[:2], f"{sha256}-{size}.jpg")
+
+    @staticmethod
+    def _temp_file(suffix: str = "") -> Tuple[int, str]:
+        """Open a temporary file on the storage volume, so renames into place are atomic."""
+        temp_dir = os.path.join(get_settings().RECEIPT_STORAGE_DIR, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        return tempfile.mkstemp(dir=temp_dir, suffix=suffix)
+
+    @staticmethod
+    def detect_content_type(head: bytes) -> Optional[str]:
+        """Content type of a receipt from its first bytes, or None if it is not accepted."""
+        for signature, content_type in RECEIPT_SIGNATURES:
+            if head.startswith(signature):
+                return content_type
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return "image/webp"
+        if head[4:12] in HEIC_BRANDS:
+            return "image/heic"
+        return None
+
+    @staticmethod
+    def store_blob(file: BinaryIO) -> Tuple[str, int, str]:
+        """Write an upload into the blob store and return (sha256, size_bytes, content_type).
+
+        The file is read in chunks, so memory use does not depend on its
+        size. Raises ReceiptTooLarge or UnsupportedReceiptType, leaving
+        nothing behind.
+        """
+        max_bytes = get_settings().RECEIPT_MAX_BYTES
+        digest = hashlib.sha256()
+        size = 0
+        content_type = None
+        fd, temp_path = ReceiptService._temp_file()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if content_type is None:
+                        content_type = ReceiptService.detect_content_type(chunk)
+                        if content_type is None:
+                            raise UnsupportedReceiptType("Receipts must be JPEG, PNG, GIF, WebP, HEIC or PDF files")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ReceiptTooLarge(f"Receipts can be at most {max_bytes} bytes")
+                    digest.update(chunk)
+                    out.write(chunk)
+            if content_type is None:
+                raise UnsupportedReceiptType("Receipt file is empty")
+
+            sha256 = digest.hexdigest()
+            path = ReceiptService.blob_path(sha256)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                # Already stored; refresh its age so orphan collection leaves it be
+                os.utime(path)
+            except FileNotFoundError:
+                os.replace(temp_path, path)
+            return sha256, size, content_type
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    @staticmethod
+    def create_receipt(
+        session: Session,
+        expense_id: UUID,
+        user_id: str,
+        file: BinaryIO,
+        filename: Optional[str] = None
+    ) -> ExpenseReceipt:
+        """Store an uploaded file and attach it to an expense."""
+        sha256, size, content_type = ReceiptService.store_blob(file)
+        receipt = ExpenseReceipt(
+            id=uuid4(),
+            expense_id=expense_id,
+            sha256=sha256,
+            content_type=content_type,
+            size_bytes=size,
+            filename=filename,
+            uploaded_by=UUID(str(user_id))
+        )
+        session.add(receipt)
+        session.commit()
+        session.refresh(receipt)
+        return receipt
+
+    @staticmethod
+    def get_expense_receipts(session: Session, expense_id: UUID) -> List[ExpenseReceipt]:
+        """Get an expense's receipts, oldest first."""
+        return session.exec(
+            select(ExpenseReceipt)
+            .where(ExpenseReceipt.expense_id == expense_id)
+            .order_by(ExpenseReceipt.created_at, ExpenseReceipt.id)
+        ).all()
+
+    @staticmethod
+    def get_receipt(session: Session, expense_id: UUID, receipt_id: UUID) -> Optional[ExpenseReceipt]:
+        """Get one receipt of an expense."""
+        return session.exec(
+            select(ExpenseReceipt).where(
+                (ExpenseReceipt.id == receipt_id) & (ExpenseReceipt.expense_id == expense_id)
+            )
+        ).first()
+
+    @staticmethod
+    def delete_receipt(session: Session, receipt: ExpenseReceipt) -> None:
+        """Detach a receipt, removing its file once no receipt refers to it."""
+        sha256, stored_at = receipt.sha256, receipt.created_at
+        session.delete(receipt)
+        session.commit()
+        ReceiptService.remove_unreferenced_blob(session, sha256, stored_at)
+
+    @staticmethod
+    def purge_deleted_expense_receipts(session: Session, now: Optional[datetime] = None) -> int:
+        """Remove receipts of expenses deleted over RECEIPT_DELETED_EXPENSE_GRACE_HOURS ago.
+
+        Expense deletes are soft, so their receipts would otherwise keep
+        their blobs forever. Commits `session`, then removes blobs no
+        receipt refers to any more; returns how many receipts were removed.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=get_settings().RECEIPT_DELETED_EXPENSE_GRACE_HOURS)
+        deleted_expense_ids = select(Expense.id).where(
+            Expense.deleted_at.is_not(None) & (Expense.deleted_at <= cutoff)
+        )
+        digests = session.exec(
+            select(ExpenseReceipt.sha256, func.max(ExpenseReceipt.created_at))
+            .where(ExpenseReceipt.expense_id.in_(deleted_expense_ids))
+            .group_by(ExpenseReceipt.sha256)
+        ).all()
+        if not digests:
+            return 0
+
+        removed = session.execute(
+            delete(ExpenseReceipt).where(ExpenseReceipt.expense_id.in_(deleted_expense_ids))
+        ).rowcount
+        session.commit()
+        for sha256, stored_at in digests:
+            ReceiptService.remove_unreferenced_blob(session, sha256, stored_at)
+        return removed
+
+    @staticmethod
+    def remove_unreferenced_blob(session: Session, sha256: str, stored_at: datetime) -> None:
+        """Remove a blob and its thumbnails if no committed receipt refers to it any more.
+
+        `stored_at` is when the newest of the just-deleted receipts using it
+        was created; a blob touched after that may be claimed by an upload
+        still in flight, so it is kept.
+        """
+        references = session.exec(
+            select(func.count()).select_from(ExpenseReceipt).where(ExpenseReceipt.sha256 == sha256)
+        ).one()
+        if references:
+            return
+        stored_at = stored_at.replace(tzinfo=timezone.utc).timestamp()
+        path = ReceiptService.blob_path(sha256)
+        try:
+            touched_at = os.stat(path).st_mtime
+            if touched_at > stored_at and time.time() - touched_at < ORPHAN_GRACE_SECONDS:
+                return
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        thumbnail_dir = os.path.dirname(ReceiptService.thumbnail_path(sha256, 0))
+        for thumbnail in glob.glob(os.path.join(thumbnail_dir, f"{sha256}-*.jpg")):
+            os.unlink(thumbnail)
+
+    @staticmethod
+    def get_thumbnail(receipt: ExpenseReceipt) -> Optional[str]:
+        """Path of a receipt's thumbnail, generating and caching it on first use.
+
+        Returns None for PDFs, for images Pillow cannot read or that are
+        over THUMBNAIL_MAX_PIXELS, and when Pillow is not installed.
+        """
+        if Image is None or not receipt.content_type.startswith("image/"):
+            return None
+        size = get_settings().RECEIPT_THUMBNAIL_SIZE
+        path = ReceiptService.thumbnail_path(receipt.sha256, size)
+        if os.path.exists(path):
+            return path
+
+        # Pillow only raises past twice its limit; the size check below covers the rest
+        Image.MAX_IMAGE_PIXELS = THUMBNAIL_MAX_PIXELS
+        fd, temp_path = ReceiptService._temp_file(suffix=".jpg")
+        try:
+            with os.fdopen(fd, "wb") as out, Image.open(ReceiptService.blob_path(receipt.sha256)) as image:
+                # Only the header has been read so far, so this is cheap
+                if image.width * image.height > THUMBNAIL_MAX_PIXELS:
+                    return None
+                # Phone photos store their rotation in EXIF; apply it before shrinking
+                thumbnail = ImageOps.exif_transpose(image)
+                thumbnail.thumbnail((size, size))
+                thumbnail.convert("RGB").save(out, "JPEG", quality=THUMBNAIL_QUALITY)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Concurrent first requests each write their own file; the last rename wins
+            os.replace(temp_path, path)
+            return path
+        except (OSError, Image.DecompressionBombError):
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
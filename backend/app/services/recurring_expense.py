@@ -0,0 +1,214 @@
+"""Recurring expense templates and their materialization."""
+import calendar
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlmodel import Session, select
+
+from app.models.schemas import (
+    RecurrenceInterval, RecurringExpense, RecurringExpenseCreate, RecurringExpenseParticipant, TeamMember
+)
+from app.services.expense import ExpenseService
+
+MATERIALIZE_BATCH_SIZE = 1000
+# Occurrences created per template per run; a long-overdue template catches
+# up over several runs instead of in one huge transaction
+MAX_CATCH_UP_OCCURRENCES = 366
+
+
+class RecurringExpenseService:
+    """Service for recurring expense templates.
+
+    Templates are turned into ordinary expenses by `materialize_due`, which
+    the in-process scheduler calls at startup and then periodically.
+    """
+
+    @staticmethod
+    def _to_utc(value: Optional[datetime]) -> Optional[datetime]:
+        """Naive UTC, as stored everywhere else, for a possibly timezone-aware datetime."""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def next_occurrence(template: RecurringExpense, after: datetime) -> datetime:
+        """The occurrence following `after`.
+
+        Monthly templates stay on start_at's day of month, falling back to
+        the last day of shorter months.
+        """
+        if template.interval == RecurrenceInterval.DAILY:
+            return after + timedelta(days=1)
+        if template.interval == RecurrenceInterval.WEEKLY:
+            return after + timedelta(weeks=1)
+        year = after.year + after.month // 12
+        month = after.month % 12 + 1
+        day = min(template.start_at.day, calendar.monthrange(year, month)[1])
+        return after.replace(year=year, month=month, day=day)
+
+    @staticmethod
+    def create_recurring_expense(
+        session: Session,
+        team_id: str,
+        payer_id: str,
+        data: RecurringExpenseCreate
+    ) -> RecurringExpense:
+        """Create a template; its first occurrence is at `data.start_at` (default now)."""
+        start_at = RecurringExpenseService._to_utc(data.start_at) or datetime.utcnow()
+        end_at = RecurringExpenseService._to_utc(data.end_at)
+        if end_at is not None and end_at < start_at:
+            raise ValueError("end_at must not be before start_at")
+        payer_uuid = UUID(str(payer_id))
+        template = RecurringExpense(
+            id=uuid4(),
+            team_id=UUID(str(team_id)),
+            payer_id=payer_uuid,
+            created_by=payer_uuid,
+            total_amount=data.total_amount,
+            category_id=data.category_id,
+            team_category_id=data.team_category_id,
+            note=data.note,
+            interval=data.interval,
+            start_at=start_at,
+            end_at=end_at,
+            next_run_at=start_at
+        )
+        session.add(template)
+        for position, user_id in enumerate(dict.fromkeys(data.participants)):
+            session.add(RecurringExpenseParticipant(
+                id=uuid4(),
+                recurring_expense_id=template.id,
+                user_id=user_id,
+                position=position
+            ))
+        session.commit()
+        session.refresh(template)
+        return template
+
+    @staticmethod
+    def get_participants_by_template(session: Session, template_ids: List[UUID]) -> Dict[UUID, List[UUID]]:
+        """Get participant user IDs for several templates in one query, in listed order."""
+        participants: Dict[UUID, List[UUID]] = {template_id: [] for template_id in template_ids}
+        if not template_ids:
+            return participants
+
+        results = session.exec(
+            select(RecurringExpenseParticipant.recurring_expense_id, RecurringExpenseParticipant.user_id)
+            .where(RecurringExpenseParticipant.recurring_expense_id.in_(template_ids))
+            .order_by(RecurringExpenseParticipant.recurring_expense_id, RecurringExpenseParticipant.position)
+        ).all()
+        for template_id, user_id in results:
+            participants[template_id].append(user_id)
+        return participants
+
+    @staticmethod
+    def get_recurring_expense(session: Session, team_id: str, recurring_id: UUID) -> Optional[RecurringExpense]:
+        """Get one of a team's templates."""
+        return session.exec(
+            select(RecurringExpense).where(
+                (RecurringExpense.id == recurring_id) & (RecurringExpense.team_id == UUID(str(team_id)))
+            )
+        ).first()
+
+    @staticmethod
+    def get_team_recurring_expenses(session: Session, team_id: str) -> List[dict]:
+        """Get a team's templates, active and stopped, oldest first, in the response shape."""
+        templates = session.exec(
+            select(RecurringExpense)
+            .where(RecurringExpense.team_id == UUID(str(team_id)))
+            .order_by(RecurringExpense.created_at, RecurringExpense.id)
+        ).all()
+        participants = RecurringExpenseService.get_participants_by_template(session, [t.id for t in templates])
+        return [
+            RecurringExpenseService.to_response(template, participants[template.id])
+            for template in templates
+        ]
+
+    @staticmethod
+    def to_response(template: RecurringExpense, participants: List[UUID]) -> dict:
+        """Build the `RecurringExpenseResponse` shape of a template."""
+        return {**template.model_dump(exclude={"modified_at"}), "participants": participants}
+
+    @staticmethod
+    def stop_recurring_expense(session: Session, template: RecurringExpense) -> RecurringExpense:
+        """Stop creating occurrences; expenses already created are kept."""
+        template.is_active = False
+        template.modified_at = datetime.utcnow()
+        session.add(template)
+        session.commit()
+        session.refresh(template)
+        return template
+
+    @staticmethod
+    def materialize_due(session: Session, now: Optional[datetime] = None, team_id: Optional[str] = None) -> int:
+        """Create the expenses of every occurrence due by `now`, returning how many were created.
+
+        Missed periods are caught up (up to MAX_CATCH_UP_OCCURRENCES per
+        template per run), each expense dated at its own occurrence. A
+        team's occurrences go in through `ExpenseService.bulk_create_expenses`
+        MATERIALIZE_BATCH_SIZE at a time, so balances are updated once per
+        batch, and the whole run commits once. Due templates are locked
+        with SKIP LOCKED, so several processes can run this side by side
+        without creating an occurrence twice.
+
+        Participants who have left the team are dropped from occurrences;
+        a template whose payer or every participant has left is stopped.
+        """
+        now = now or datetime.utcnow()
+        query = select(RecurringExpense).where(
+            (RecurringExpense.is_active == True) & (RecurringExpense.next_run_at <= now)
+        )
+        if team_id is not None:
+            query = query.where(RecurringExpense.team_id == UUID(str(team_id)))
+        templates = session.exec(
+            query.order_by(RecurringExpense.team_id, RecurringExpense.next_run_at)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not templates:
+            return 0
+
+        participants = RecurringExpenseService.get_participants_by_template(session, [t.id for t in templates])
+        created = 0
+        for team_uuid, team_templates in groupby(templates, key=attrgetter("team_id")):
+            member_ids = set(session.exec(
+                select(TeamMember.user_id).where(TeamMember.team_id == team_uuid)
+            ).all())
+            expenses = []
+            for template in team_templates:
+                template.modified_at = now
+                session.add(template)
+                members = [user_id for user_id in participants[template.id] if user_id in member_ids]
+                if template.payer_id not in member_ids or not members:
+                    template.is_active = False
+                    continue
+
+                run_at = template.next_run_at
+                for _ in range(MAX_CATCH_UP_OCCURRENCES):
+                    if run_at > now or (template.end_at is not None and run_at > template.end_at):
+                        break
+                    expenses.append({
+                        "payer_id": template.payer_id,
+                        "total_amount": template.total_amount,
+                        "participants": members,
+                        "category_id": template.category_id,
+                        "team_category_id": template.team_category_id,
+                        "note": template.note,
+                        "created_at": run_at
+                    })
+                    template.last_run_at = run_at
+                    run_at = RecurringExpenseService.next_occurrence(template, run_at)
+                template.next_run_at = run_at
+                if template.end_at is not None and run_at > template.end_at:
+                    template.is_active = False
+
+            for start in range(0, len(expenses), MATERIALIZE_BATCH_SIZE):
+                ExpenseService.bulk_create_expenses(
+                    session, team_uuid, expenses[start:start + MATERIALIZE_BATCH_SIZE], commit=False
+                )
+            created += len(expenses)
+
+        session.commit()
+        return created
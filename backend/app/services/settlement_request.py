@@ -1,12 +1,13 @@
 """Settlement request management service."""
 from uuid import UUID, uuid4
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from sqlmodel import Session, select
 from ..models.schemas import (
     SettlementRequest, SettlementStatus, User, TeamMember, Team
 )
 from .email import EmailService
+from .expense import ExpenseService
 
 
 class SettlementRequestService:
@@ -19,9 +20,14 @@ class SettlementRequestService:
         from_user_id: str,
         to_user_id: str,
         amount: float,
-        message: Optional[str] = None
+        message: Optional[str] = None,
+        commit: bool = True
     ) -> SettlementRequest:
-        """Create a new settlement request."""
+        """Create a new settlement request and email the recipient.
+        
+        With `commit=False` the request is only flushed and no email is
+        sent; the caller commits and then calls `send_settlement_request_email`.
+        """
         # Verify both users are team members
         team_uuid = UUID(team_id)
         from_uuid = UUID(from_user_id)
@@ -78,11 +84,14 @@ class SettlementRequestService:
         )
         
         session.add(settlement)
+        if not commit:
+            session.flush()
+            return settlement
         session.commit()
         session.refresh(settlement)
         
         # Send email notification
-        SettlementRequestService._send_settlement_request_email(session, settlement)
+        SettlementRequestService.send_settlement_request_email(session, settlement)
         
         return settlement
     
@@ -119,24 +128,19 @@ class SettlementRequestService:
         settlement.approved_at = datetime.utcnow()
         
         # Create an offsetting expense to balance the books
-        # This represents the settlement payment from debtor to creditor
-        from ..models.schemas import Expense
-        
-        settlement_expense = Expense(
-            id=uuid4(),
-            team_id=settlement.team_id,
-            description=f"Settlement payment: {settlement.message or 'Debt settlement'}",
+        # This represents the settlement payment from debtor to creditor:
+        # the debtor pays the full amount on the creditor's behalf alone.
+        # It goes through ExpenseService so member balances stay in sync.
+        ExpenseService.create_expense(
+            session,
+            team_id=str(settlement.team_id),
+            payer_id=str(settlement.from_user_id),  # Person who owed money pays
             total_amount=settlement.amount,
-            payer_id=settlement.from_user_id,  # Person who owed money pays
-            participants=[settlement.from_user_id, settlement.to_user_id],  # Both involved
-            participant_shares={  # Equal split means creditor gets half back
-                str(settlement.from_user_id): settlement.amount / 2,
-                str(settlement.to_user_id): settlement.amount / 2
-            }
+            participants=[str(settlement.to_user_id)],  # Only the creditor receives it
+            note=f"Settlement payment: {settlement.message or 'Debt settlement'}",
+            commit=False
         )
         
-        session.add(settlement_expense)
-        
         session.commit()
         session.refresh(settlement)
         
@@ -152,60 +156,51 @@ class SettlementRequestService:
         user_id: str
     ) -> List[dict]:
         """Get all settlement requests for a user (sent and received)."""
+        return list(SettlementRequestService.iter_user_settlement_requests(session, team_id, user_id))
+    
+    @staticmethod
+    def iter_user_settlement_requests(
+        session: Session,
+        team_id: str,
+        user_id: str,
+        batch_size: int = 500
+    ) -> Iterator[dict]:
+        """Yield a user's sent then received settlement requests, newest first within each.
+        
+        The counterpart's name is joined in, and rows are read `batch_size`
+        at a time, so nothing is loaded per request.
+        """
         team_uuid = UUID(team_id)
         user_uuid = UUID(user_id)
         
-        # Get settlements sent by user
-        sent_settlements = session.exec(
-            select(SettlementRequest).where(
-                (SettlementRequest.team_id == team_uuid) &
-                (SettlementRequest.from_user_id == user_uuid)
-            ).order_by(SettlementRequest.created_at.desc())
-        ).all()
-        
-        # Get settlements received by user
-        received_settlements = session.exec(
-            select(SettlementRequest).where(
-                (SettlementRequest.team_id == team_uuid) &
-                (SettlementRequest.to_user_id == user_uuid)
-            ).order_by(SettlementRequest.created_at.desc())
-        ).all()
-        
-        # Format response with user names
-        result = []
-        
-        for settlement in sent_settlements:
-            to_user = session.exec(select(User).where(User.id == settlement.to_user_id)).first()
-            result.append({
-                "id": str(settlement.id),
-                "type": "sent",
-                "amount": settlement.amount,
-                "status": settlement.status,
-                "other_user_id": str(settlement.to_user_id),
-                "other_user_name": to_user.name if to_user else "Unknown",
-                "message": settlement.message,
-                "created_at": settlement.created_at,
-                "expires_at": settlement.expires_at
-            })
-        
-        for settlement in received_settlements:
-            from_user = session.exec(select(User).where(User.id == settlement.from_user_id)).first()
-            result.append({
-                "id": str(settlement.id),
-                "type": "received",
-                "amount": settlement.amount,
-                "status": settlement.status,
-                "other_user_id": str(settlement.from_user_id),
-                "other_user_name": from_user.name if from_user else "Unknown",
-                "message": settlement.message,
-                "created_at": settlement.created_at,
-                "expires_at": settlement.expires_at
-            })
-        
-        return result
+        sides = (
+            ("sent", SettlementRequest.from_user_id, SettlementRequest.to_user_id),
+            ("received", SettlementRequest.to_user_id, SettlementRequest.from_user_id),
+        )
+        for request_type, own_column, other_column in sides:
+            results = session.exec(
+                select(SettlementRequest, User.name)
+                .outerjoin(User, User.id == other_column)
+                .where((SettlementRequest.team_id == team_uuid) & (own_column == user_uuid))
+                .order_by(SettlementRequest.created_at.desc())
+                .execution_options(yield_per=batch_size)
+            )
+            for settlement, other_user_name in results:
+                other_user_id = settlement.to_user_id if request_type == "sent" else settlement.from_user_id
+                yield {
+                    "id": str(settlement.id),
+                    "type": request_type,
+                    "amount": settlement.amount,
+                    "status": settlement.status,
+                    "other_user_id": str(other_user_id),
+                    "other_user_name": other_user_name or "Unknown",
+                    "message": settlement.message,
+                    "created_at": settlement.created_at,
+                    "expires_at": settlement.expires_at
+                }
     
     @staticmethod
-    def _send_settlement_request_email(session: Session, settlement: SettlementRequest):
+    def send_settlement_request_email(session: Session, settlement: SettlementRequest):
         """Send email notification for settlement request."""
         try:
             from_user = session.exec(select(User).where(User.id == settlement.from_user_id)).first()
@@ -1,10 +1,21 @@
 """Team management service."""
 from uuid import uuid4, UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
+from sqlalchemy import delete, func
 from sqlmodel import Session, select
 
-from app.models.schemas import Team, TeamMember, User
+from app.core.config import get_settings
+from app.models.schemas import (
+    ExpenseReceipt, RecurringExpense, RecurringExpenseParticipant, Team, TeamMember, TeamMemberBalance, User
+)
+from app.services.balance import BalanceService
+from app.services.cache import TTLCache
+from app.services.receipt import ReceiptService
+
+# Short-lived (team_id, user_id) -> is member cache for authorization checks
+_settings = get_settings()
+membership_cache = TTLCache(_settings.MEMBERSHIP_CACHE_SIZE, _settings.MEMBERSHIP_CACHE_TTL_SECONDS)
 
 
 class TeamService:
@@ -98,8 +109,10 @@ class TeamService:
             initial_budget=initial_budget
         )
         session.add(member)
+        BalanceService.bump_version(session, team_id)
         session.commit()
         session.refresh(member)
+        membership_cache.delete((team_id, user_id))
         
         # Auto-recalculate budgets equally if requested and team has trip_budget
         if auto_recalculate:
@@ -118,32 +131,89 @@ class TeamService:
         ).all()
     
     @staticmethod
-    def get_team_members_enriched(session: Session, team_id: str) -> List[dict]:
-        """Get all members of a team with user details."""
-        from app.models.schemas import User
+    def is_member(session: Session, team_id: str, user_id: str) -> bool:
+        """Check whether a user belongs to a team.
+        
+        A single EXISTS lookup on the (team_id, user_id) unique index.
+        Positive results are kept in a short-TTL process cache, and deleting
+        a team invalidates them. Negative results are never cached: an add
+        only invalidates the cache of the worker that handled it, so other
+        workers would keep refusing a new member until the TTL ran out.
+        """
+        try:
+            team_uuid = team_id if isinstance(team_id, UUID) else UUID(str(team_id))
+            user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+        except ValueError:
+            return False
         
+        key = (team_uuid, user_uuid)
+        if membership_cache.get(key):
+            return True
+        
+        is_member = session.exec(
+            select(
+                select(TeamMember.id).where(
+                    (TeamMember.team_id == team_uuid) &
+                    (TeamMember.user_id == user_uuid)
+                ).exists()
+            )
+        ).one()
+        if is_member:
+            membership_cache.set(key, True)
+        return bool(is_member)
+    
+    @staticmethod
+    def count_team_members(session: Session, team_id: str) -> int:
+        """Count the members of a team."""
+        if isinstance(team_id, str):
+            team_id = UUID(team_id)
+        return session.exec(
+            select(func.count()).select_from(TeamMember).where(TeamMember.team_id == team_id)
+        ).one()
+    
+    @staticmethod
+    def get_member_ids(session: Session, team_id: str, user_ids: List[str]) -> set:
+        """Return which of `user_ids` are members of the team."""
+        if isinstance(team_id, str):
+            team_id = UUID(team_id)
+        user_uuids = {u if isinstance(u, UUID) else UUID(str(u)) for u in user_ids}
+        if not user_uuids:
+            return set()
+        return set(session.exec(
+            select(TeamMember.user_id).where(
+                (TeamMember.team_id == team_id) &
+                (TeamMember.user_id.in_(user_uuids))
+            )
+        ).all())
+    
+    @staticmethod
+    def iter_team_members_enriched(session: Session, team_id: str, batch_size: int = 500) -> Iterator[dict]:
+        """Yield a team's members with user details, reading `batch_size` rows at a time."""
         # Ensure team_id is a UUID
         if isinstance(team_id, str):
             team_id = UUID(team_id)
             
         # Get team members with user details via join
-        query = select(TeamMember, User).join(User, TeamMember.user_id == User.id).where(TeamMember.team_id == team_id)
-        results = session.exec(query).all()
-        
-        enriched_members = []
-        for team_member, user in results:
-            enriched_members.append({
-                "id": team_member.id,
-                "team_id": team_member.team_id, 
-                "user_id": team_member.user_id,
-                "initial_budget": team_member.initial_budget,
-                "created_at": team_member.created_at,
-                "modified_at": team_member.modified_at,
-                "user_name": user.name,
-                "user_email": user.email
-            })
-            
-        return enriched_members
+        query = (
+            select(
+                TeamMember.id, TeamMember.team_id, TeamMember.user_id, TeamMember.initial_budget,
+                TeamMember.created_at, TeamMember.modified_at, User.name, User.email
+            )
+            .join(User, TeamMember.user_id == User.id)
+            .where(TeamMember.team_id == team_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for member_id, member_team_id, user_id, budget, created_at, modified_at, name, email in session.exec(query):
+            yield {
+                "id": member_id,
+                "team_id": member_team_id,
+                "user_id": user_id,
+                "initial_budget": budget,
+                "created_at": created_at,
+                "modified_at": modified_at,
+                "user_name": name,
+                "user_email": email
+            }
     
     @staticmethod
     def set_member_budget(
@@ -171,6 +241,7 @@ class TeamService:
         
         member.initial_budget = budget
         session.add(member)
+        BalanceService.bump_version(session, team_id)
         session.commit()
         session.refresh(member)
         
@@ -203,6 +274,7 @@ class TeamService:
                 member.modified_at = datetime.utcnow()
                 session.add(member)
             
+            BalanceService.bump_version(session, team_id)
             session.commit()
             return True
             
@@ -232,6 +304,7 @@ class TeamService:
             member.initial_budget = new_budget
             member.modified_at = datetime.utcnow()
             session.add(member)
+            BalanceService.bump_version(session, team_id)
             session.commit()
             return True
             
@@ -281,6 +354,8 @@ class TeamService:
         
         team.modified_at = datetime.utcnow()
         session.add(team)
+        # Cached team responses include the name and trip budget
+        BalanceService.bump_version(session, team_id)
         session.commit()
         session.refresh(team)
         return team
@@ -314,14 +389,38 @@ class TeamService:
         for member in members:
             session.delete(member)
         
-        # Delete all expenses for this team
-        from app.models.schemas import Expense
+        # Delete all expenses for this team, with their participant and receipt rows
+        from app.models.schemas import Expense, ExpenseParticipant
+        team_expense_ids = select(Expense.id).where(Expense.team_id == team_id)
+        session.execute(
+            delete(ExpenseParticipant).where(ExpenseParticipant.expense_id.in_(team_expense_ids))
+        )
+        # Receipt files may be shared with other teams; they are removed after commit if unused
+        receipt_digests = session.exec(
+            select(ExpenseReceipt.sha256, func.max(ExpenseReceipt.created_at))
+            .where(ExpenseReceipt.expense_id.in_(team_expense_ids))
+            .group_by(ExpenseReceipt.sha256)
+        ).all()
+        session.execute(delete(ExpenseReceipt).where(ExpenseReceipt.expense_id.in_(team_expense_ids)))
         expenses = session.exec(
             select(Expense).where(Expense.team_id == team_id)
         ).all()
         for expense in expenses:
             session.delete(expense)
         
+        # Delete recurring expense templates, so the scheduler stops picking them up
+        session.execute(
+            delete(RecurringExpenseParticipant).where(
+                RecurringExpenseParticipant.recurring_expense_id.in_(
+                    select(RecurringExpense.id).where(RecurringExpense.team_id == team_id)
+                )
+            )
+        )
+        session.execute(delete(RecurringExpense).where(RecurringExpense.team_id == team_id))
+        
+        # Delete materialized balances for this team
+        session.execute(delete(TeamMemberBalance).where(TeamMemberBalance.team_id == team_id))
+        
         # Delete all invitations for this team
         from app.models.schemas import TeamInvitation
         invitations = session.exec(
@@ -333,4 +432,8 @@ class TeamService:
         # Finally delete the team
         session.delete(team)
         session.commit()
+        for sha256, stored_at in receipt_digests:
+            ReceiptService.remove_unreferenced_blob(session, sha256, stored_at)
+        BalanceService.invalidate_team(team_id)
+        membership_cache.invalidate(lambda key: key[0] == team_id)
         return True
@@ -0,0 +1,104 @@
+"""Benchmark SQL-side payer totals against reading every expense into Python.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_budget_balances [expense_count] [database_url]
+
+Defaults to a throwaway SQLite file; pass a Postgres URL to run the same
+queries there. The script creates its own users, team and expenses and
+deletes them again afterwards.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.schemas import AuthProvider, Expense, Team, User
+from app.services.expense import ExpenseService
+from app.services.ledger import to_minor
+
+DEFAULT_EXPENSE_COUNT = 500_000
+MEMBER_COUNT = 20
+INSERT_BATCH = 10_000
+
+
+def seed(session: Session, team_id, expense_count: int):
+    """Insert a team, its payers and `expense_count` expenses with batched executemany."""
+    rng = random.Random(42)
+    payers = [uuid4() for _ in range(MEMBER_COUNT)]
+    session.execute(insert(User), [
+        {
+            "id": payer,
+            "email": f"bench-{payer}@example.com",
+            "name": "Bench",
+            "auth_provider": AuthProvider.EMAIL,
+        }
+        for payer in payers
+    ])
+    session.execute(insert(Team), [{"id": team_id, "name": "Bench", "created_by": payers[0]}])
+    rows = []
+    for _ in range(expense_count):
+        rows.append({
+            "id": uuid4(),
+            "team_id": team_id,
+            "payer_id": rng.choice(payers),
+            "total_amount": rng.randint(100, 500_000) / 100,
+        })
+        if len(rows) >= INSERT_BATCH:
+            session.execute(insert(Expense), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Expense), rows)
+    session.commit()
+
+
+def python_payer_totals(session: Session, team_id):
+    """Baseline: pull every expense row and sum in Python."""
+    totals = {}
+    for expense in session.exec(select(Expense).where(Expense.team_id == team_id)).all():
+        totals[expense.payer_id] = totals.get(expense.payer_id, 0) + to_minor(expense.total_amount)
+    return totals
+
+
+def main():
+    expense_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EXPENSE_COUNT
+    if len(sys.argv) > 2:
+        database_url = sys.argv[2]
+    else:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    team_id = uuid4()
+    with Session(engine) as session:
+        try:
+            seed(session, team_id, expense_count)
+
+            start = time.perf_counter()
+            sql_totals = ExpenseService.get_payer_totals(session, team_id)
+            sql_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            py_totals = python_payer_totals(session, team_id)
+            py_elapsed = time.perf_counter() - start
+
+            assert sql_totals == py_totals
+            print(f"{expense_count} expenses on {engine.dialect.name}")
+            print(f"  SQL GROUP BY: {sql_elapsed * 1000:.0f} ms")
+            print(f"  Python scan:  {py_elapsed * 1000:.0f} ms")
+        finally:
+            session.rollback()
+            creator = session.exec(select(Team.created_by).where(Team.id == team_id)).first()
+            payers = session.exec(select(Expense.payer_id).where(Expense.team_id == team_id).distinct()).all()
+            session.execute(delete(Expense).where(Expense.team_id == team_id))
+            session.execute(delete(Team).where(Team.id == team_id))
+            session.execute(delete(User).where(User.id.in_(set(payers) | {creator})))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark OFFSET pagination against keyset (cursor) pagination.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_expense_pages [expense_count] [database_url]
+
+Times the first page and page 5,000 (page size 20) of a team's expense
+listing both ways. Defaults to a throwaway SQLite file; the script creates
+its own user, team and expenses and deletes them again afterwards.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.schemas import AuthProvider, Expense, Team, User
+from app.services.expense import ExpenseService
+
+DEFAULT_EXPENSE_COUNT = 200_000
+PAGE_SIZE = 20
+DEEP_PAGE = 5_000
+REPEATS = 20
+INSERT_BATCH = 10_000
+
+
+def seed(session: Session, team_id, user_id, expense_count: int):
+    """Insert a user, a team and `expense_count` expenses one second apart."""
+    session.execute(insert(User), [{
+        "id": user_id,
+        "email": f"bench-{user_id}@example.com",
+        "name": "Bench",
+        "auth_provider": AuthProvider.EMAIL,
+    }])
+    session.execute(insert(Team), [{"id": team_id, "name": "Bench", "created_by": user_id}])
+    start = datetime(2024, 1, 1)
+    rows = []
+    for index in range(expense_count):
+        rows.append({
+            "id": uuid4(),
+            "team_id": team_id,
+            "payer_id": user_id,
+            "total_amount": 10.0,
+            "created_at": start + timedelta(seconds=index),
+            "modified_at": start + timedelta(seconds=index),
+        })
+        if len(rows) >= INSERT_BATCH:
+            session.execute(insert(Expense), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Expense), rows)
+    session.commit()
+
+
+def time_page(session: Session, team_id, **kwargs) -> float:
+    """Median milliseconds to fetch one page."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        page = ExpenseService.get_team_expenses(session, team_id, PAGE_SIZE, **kwargs)
+        timings.append(time.perf_counter() - start)
+        assert len(page) == PAGE_SIZE
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    expense_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EXPENSE_COUNT
+    if len(sys.argv) > 2:
+        database_url = sys.argv[2]
+    else:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    team_id = uuid4()
+    user_id = uuid4()
+    deep_offset = PAGE_SIZE * DEEP_PAGE
+    with Session(engine) as session:
+        try:
+            seed(session, team_id, user_id, expense_count)
+
+            # Cursor pointing at the last row of the page before DEEP_PAGE
+            before_deep = ExpenseService.get_team_expenses(session, team_id, 1, deep_offset - 1)[0]
+            deep_cursor = ExpenseService.encode_cursor(before_deep)
+            assert (
+                [e.id for e in ExpenseService.get_team_expenses(session, team_id, PAGE_SIZE, cursor=deep_cursor)]
+                == [e.id for e in ExpenseService.get_team_expenses(session, team_id, PAGE_SIZE, deep_offset)]
+            )
+
+            print(f"{expense_count} expenses on {engine.dialect.name}, {PAGE_SIZE} per page")
+            print(f"  OFFSET page 0:     {time_page(session, team_id):.2f} ms")
+            print(f"  OFFSET page {DEEP_PAGE}:  {time_page(session, team_id, offset=deep_offset):.2f} ms")
+            print(f"  cursor page 0:     {time_page(session, team_id):.2f} ms")
+            print(f"  cursor page {DEEP_PAGE}:  {time_page(session, team_id, cursor=deep_cursor):.2f} ms")
+        finally:
+            session.rollback()
+            session.execute(delete(Expense).where(Expense.team_id == team_id))
+            session.execute(delete(Team).where(Team.id == team_id))
+            session.execute(delete(User).where(User.id == user_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
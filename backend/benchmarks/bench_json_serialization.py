@@ -0,0 +1,118 @@
+"""Benchmark serializing a large expense listing: validated models vs the fast path.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_json_serialization [row_count]
+
+Builds `row_count` (default 10,000) in-memory expenses with participants
+and categories, then times turning them into response bytes:
+
+  * models + FastAPI: ExpenseResponse per row, then FastAPI's response_model
+    validation and jsonable_encoder pass, then the stdlib JSONResponse
+  * dicts + stdlib: plain dicts encoded by FastJSONResponse without orjson
+  * dicts + orjson: plain dicts encoded by FastJSONResponse with orjson
+
+No database is needed; only serialization is measured.
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core import responses
+from app.models.schemas import Expense, ExpenseCategory, ExpenseResponse, TeamCustomCategory
+from app.services.expense import ExpenseService
+
+DEFAULT_ROW_COUNT = 10_000
+PARTICIPANTS_PER_EXPENSE = 4
+REPEATS = 5
+
+
+def build_rows(row_count: int):
+    """Expenses plus the participant and category maps a listing would load."""
+    team_id = uuid4()
+    members = [uuid4() for _ in range(PARTICIPANTS_PER_EXPENSE)]
+    now = datetime(2024, 1, 1)
+    category = ExpenseCategory(id=uuid4(), name="Food", emoji="🍔", is_default=True, created_at=now, modified_at=now)
+    team_category = TeamCustomCategory(
+        id=uuid4(), team_id=team_id, name="Fuel", emoji="⛽", created_by=members[0], created_at=now, modified_at=now
+    )
+    expenses = []
+    for index in range(row_count):
+        created_at = now + timedelta(seconds=index)
+        expenses.append(Expense(
+            id=uuid4(),
+            team_id=team_id,
+            payer_id=members[index % len(members)],
+            total_amount=round(10 + index * 0.37, 2),
+            category_id=category.id if index % 2 == 0 else None,
+            team_category_id=team_category.id if index % 2 == 1 else None,
+            note=f"Expense {index}",
+            created_at=created_at,
+            modified_at=created_at
+        ))
+    participants = {expense.id: members for expense in expenses}
+    return expenses, participants, {category.id: category}, {team_category.id: team_category}
+
+
+def models_and_fastapi(expenses, participants, categories, team_categories) -> bytes:
+    """The previous path: validated models, response_model validation, jsonable_encoder, stdlib json."""
+    models = [
+        ExpenseService.enrich_expense_with_categories(
+            None, expense, participants[expense.id], categories, team_categories
+        )
+        for expense in expenses
+    ]
+    field = create_response_field(name="Response", type_=List[ExpenseResponse])
+    content = asyncio.run(serialize_response(field=field, response_content=models))
+    return JSONResponse(content).body
+
+
+def dicts(expenses, participants, categories, team_categories) -> bytes:
+    """The fast path: plain dicts straight into FastJSONResponse."""
+    rows = [
+        ExpenseService._expense_dict(expense, participants[expense.id], categories, team_categories)
+        for expense in expenses
+    ]
+    return responses.FastJSONResponse(rows).body
+
+
+def median_ms(function, *args) -> float:
+    """Median milliseconds over REPEATS runs."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    data = build_rows(row_count)
+
+    # All three must produce the same document
+    baseline = json.loads(models_and_fastapi(*data))
+    assert json.loads(dicts(*data)) == baseline
+
+    print(f"{row_count} expenses, {PARTICIPANTS_PER_EXPENSE} participants each")
+    print(f"  models + FastAPI:  {median_ms(models_and_fastapi, *data):8.1f} ms")
+    orjson = responses.orjson
+    responses.orjson = None
+    print(f"  dicts + stdlib:    {median_ms(dicts, *data):8.1f} ms")
+    responses.orjson = orjson
+    if orjson is not None:
+        print(f"  dicts + orjson:    {median_ms(dicts, *data):8.1f} ms")
+    else:
+        print("  dicts + orjson:    (orjson not installed)")
+
+
+if __name__ == "__main__":
+    main()
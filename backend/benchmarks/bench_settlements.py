@@ -0,0 +1,36 @@
+"""Benchmark settlement plan generation for large teams.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_settlements
+"""
+import random
+import time
+from typing import Dict, List
+from uuid import UUID, uuid4
+
+from app.services.settlement import calculate_settlements
+
+MEMBER_COUNTS = [100, 1_000, 10_000, 100_000]
+
+
+def make_balances(member_count: int, seed: int = 42) -> Dict[UUID, float]:
+    """Build random balances (in whole paise) that sum to zero."""
+    rng = random.Random(seed)
+    members: List[UUID] = [uuid4() for _ in range(member_count)]
+    paise = [rng.randint(-500_000, 500_000) for _ in range(member_count - 1)]
+    paise.append(-sum(paise))
+    return {member: amount / 100 for member, amount in zip(members, paise)}
+
+
+def main():
+    print(f"{'members':>10} {'transfers':>10} {'plan time (ms)':>16}")
+    for member_count in MEMBER_COUNTS:
+        balances = make_balances(member_count)
+        start = time.perf_counter()
+        settlements = calculate_settlements(balances)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{member_count:>10} {len(settlements):>10} {elapsed_ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
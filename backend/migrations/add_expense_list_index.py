@@ -0,0 +1,24 @@
+"""Add a composite index for team expense listing
+
+Revision ID: add_expense_list_index
+Revises: add_team_ledger_version
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_expense_list_index'
+down_revision = 'add_team_ledger_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to index expenses by (team_id, created_at, id)."""
+    op.create_index('ix_expense_team_created_id', 'expense', ['team_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade to drop the expense listing index."""
+    op.drop_index('ix_expense_team_created_id', table_name='expense')
@@ -0,0 +1,109 @@
+"""Move expense participants from a JSON string into an association table
+
+Revision ID: add_expense_participants
+Revises: add_expense_categories
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+import json
+from decimal import Decimal, ROUND_HALF_UP
+from uuid import UUID, uuid4
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_expense_participants'
+down_revision = 'add_expense_categories'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _split_minor(total_minor: int, count: int) -> list:
+    """Largest-remainder equal split (same rule as app.services.ledger.split_minor)."""
+    base, remainder = divmod(total_minor, count)
+    return [base + 1 if index < remainder else base for index in range(count)]
+
+
+def upgrade() -> None:
+    """Upgrade to store participants and their shares in expenseparticipant."""
+
+    participant_table = op.create_table('expenseparticipant',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('expense_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('share_minor', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['expense_id'], ['expense.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.UniqueConstraint('expense_id', 'user_id', name='uq_expense_participant')
+    )
+    op.create_index('ix_expenseparticipant_expense_id', 'expenseparticipant', ['expense_id'])
+    op.create_index('ix_expenseparticipant_user_id', 'expenseparticipant', ['user_id'])
+
+    # Backfill from the JSON column. Shares are split among participants who
+    # are team members, which is how balances were computed before.
+    bind = op.get_bind()
+    members = {}
+    for team_id, user_id in bind.execute(sa.text("SELECT team_id, user_id FROM teammember")):
+        members.setdefault(str(team_id), set()).add(str(user_id))
+
+    expenses = bind.execute(
+        sa.text("SELECT id, team_id, total_amount, participants FROM expense")
+    )
+    batch = []
+    for expense_id, team_id, total_amount, participants in expenses:
+        try:
+            participant_ids = list(dict.fromkeys(str(p) for p in json.loads(participants or "[]")))
+        except (json.JSONDecodeError, TypeError):
+            participant_ids = []
+
+        team_members = members.get(str(team_id), set())
+        member_participants = [p for p in participant_ids if p in team_members]
+        total_minor = int((Decimal(str(total_amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        shares = dict(zip(member_participants, _split_minor(total_minor, len(member_participants)))) \
+            if member_participants else {}
+
+        for position, participant_id in enumerate(participant_ids):
+            batch.append({
+                'id': uuid4(),
+                'expense_id': UUID(str(expense_id)),
+                'user_id': UUID(participant_id),
+                'position': position,
+                'share_minor': shares.get(participant_id, 0)
+            })
+        if len(batch) >= BATCH_SIZE:
+            op.bulk_insert(participant_table, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(participant_table, batch)
+
+    op.drop_column('expense', 'participants')
+
+
+def downgrade() -> None:
+    """Downgrade to the JSON participants column."""
+
+    op.add_column('expense', sa.Column('participants', sa.String(), nullable=False, server_default='[]'))
+
+    bind = op.get_bind()
+    participants = {}
+    rows = bind.execute(sa.text(
+        "SELECT expense_id, user_id FROM expenseparticipant ORDER BY expense_id, position"
+    ))
+    for expense_id, user_id in rows:
+        participants.setdefault(str(expense_id), []).append(str(user_id))
+
+    for expense_id, user_ids in participants.items():
+        bind.execute(
+            sa.text("UPDATE expense SET participants = :participants WHERE id = :id"),
+            {'participants': json.dumps(user_ids), 'id': expense_id}
+        )
+
+    op.drop_index('ix_expenseparticipant_user_id', table_name='expenseparticipant')
+    op.drop_index('ix_expenseparticipant_expense_id', table_name='expenseparticipant')
+    op.drop_table('expenseparticipant')
@@ -0,0 +1,42 @@
+"""Add receipt attachments for expenses
+
+Revision ID: add_expense_receipts
+Revises: add_expense_tombstones
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_expense_receipts'
+down_revision = 'add_expense_tombstones'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add the expensereceipt table."""
+    op.create_table('expensereceipt',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('expense_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('uploaded_by', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['expense_id'], ['expense.id'], ),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['user.id'], )
+    )
+    op.create_index('ix_expensereceipt_expense_id', 'expensereceipt', ['expense_id'])
+    op.create_index('ix_expensereceipt_sha256', 'expensereceipt', ['sha256'])
+
+
+def downgrade() -> None:
+    """Downgrade to drop the expensereceipt table (blobs on disk are left in place)."""
+    op.drop_index('ix_expensereceipt_sha256', table_name='expensereceipt')
+    op.drop_index('ix_expensereceipt_expense_id', table_name='expensereceipt')
+    op.drop_table('expensereceipt')
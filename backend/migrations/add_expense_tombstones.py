@@ -0,0 +1,31 @@
+"""Keep deleted expenses as tombstones and stamp expense changes for delta sync
+
+Revision ID: add_expense_tombstones
+Revises: add_idempotency_keys
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_expense_tombstones'
+down_revision = 'add_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add expense.deleted_at, expense.change_seq and ix_expense_team_change_seq."""
+    op.add_column('expense', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Existing expenses get 0 and are picked up by a full sync (since=0)
+    op.add_column('expense', sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_expense_team_change_seq', 'expense', ['team_id', 'change_seq', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade to hard-delete tombstones and drop the delta sync columns."""
+    op.drop_index('ix_expense_team_change_seq', table_name='expense')
+    op.execute("DELETE FROM expense WHERE deleted_at IS NOT NULL")
+    op.drop_column('expense', 'change_seq')
+    op.drop_column('expense', 'deleted_at')
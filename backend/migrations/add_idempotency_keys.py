@@ -0,0 +1,41 @@
+"""Add the idempotency key store
+
+Revision ID: add_idempotency_keys
+Revises: add_invitation_pending_index
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_idempotency_keys'
+down_revision = 'add_invitation_pending_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add the idempotencykey table."""
+    op.create_table('idempotencykey',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.String(), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.UniqueConstraint('user_id', 'scope', 'key', name='uq_idempotency_key')
+    )
+    op.create_index('ix_idempotencykey_expires_at', 'idempotencykey', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade to drop the idempotencykey table."""
+    op.drop_index('ix_idempotencykey_expires_at', table_name='idempotencykey')
+    op.drop_table('idempotencykey')
@@ -0,0 +1,28 @@
+"""Index pending team invitations by team, used flag and expiry
+
+Revision ID: add_invitation_pending_index
+Revises: add_settlement_request_indexes
+Create Date: 2026-10-17 15:20:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_invitation_pending_index'
+down_revision = 'add_settlement_request_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add ix_teaminvitation_team_pending."""
+    op.create_index(
+        'ix_teaminvitation_team_pending',
+        'teaminvitation',
+        ['team_id', 'is_used', 'expires_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade to drop ix_teaminvitation_team_pending."""
+    op.drop_index('ix_teaminvitation_team_pending', table_name='teaminvitation')
@@ -0,0 +1,69 @@
+"""Add recurring expense templates
+
+Revision ID: add_recurring_expenses
+Revises: add_expense_receipts
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_recurring_expenses'
+down_revision = 'add_expense_receipts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add the recurringexpense and recurringexpenseparticipant tables."""
+    op.create_table('recurringexpense',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('team_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payer_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('team_category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('note', sa.String(), nullable=True),
+        sa.Column('interval', sa.Enum('DAILY', 'WEEKLY', 'MONTHLY', name='recurrenceinterval'), nullable=False),
+        sa.Column('start_at', sa.DateTime(), nullable=False),
+        sa.Column('end_at', sa.DateTime(), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('modified_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['team_id'], ['team.id'], ),
+        sa.ForeignKeyConstraint(['payer_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['category_id'], ['expensecategory.id'], ),
+        sa.ForeignKeyConstraint(['team_category_id'], ['teamcustomcategory.id'], )
+    )
+    op.create_index('ix_recurringexpense_team_id', 'recurringexpense', ['team_id'])
+    op.create_index('ix_recurringexpense_due', 'recurringexpense', ['is_active', 'next_run_at'])
+    op.create_table('recurringexpenseparticipant',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('recurring_expense_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['recurring_expense_id'], ['recurringexpense.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.UniqueConstraint('recurring_expense_id', 'user_id', name='uq_recurring_expense_participant')
+    )
+    op.create_index(
+        'ix_recurringexpenseparticipant_recurring_expense_id', 'recurringexpenseparticipant', ['recurring_expense_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade to drop the recurring expense tables (expenses they created are kept)."""
+    op.drop_index('ix_recurringexpenseparticipant_recurring_expense_id', table_name='recurringexpenseparticipant')
+    op.drop_table('recurringexpenseparticipant')
+    op.drop_index('ix_recurringexpense_due', table_name='recurringexpense')
+    op.drop_index('ix_recurringexpense_team_id', table_name='recurringexpense')
+    op.drop_table('recurringexpense')
+    sa.Enum(name='recurrenceinterval').drop(op.get_bind(), checkfirst=True)
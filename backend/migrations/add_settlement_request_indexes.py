@@ -0,0 +1,34 @@
+"""Index settlement requests for sent/received listings
+
+Revision ID: add_settlement_request_indexes
+Revises: add_team_member_constraints
+Create Date: 2026-10-17 15:10:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_settlement_request_indexes'
+down_revision = 'add_team_member_constraints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add (team, user, created_at) indexes on settlementrequest."""
+    op.create_index(
+        'ix_settlementrequest_team_from_created',
+        'settlementrequest',
+        ['team_id', 'from_user_id', 'created_at']
+    )
+    op.create_index(
+        'ix_settlementrequest_team_to_created',
+        'settlementrequest',
+        ['team_id', 'to_user_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade to drop the settlement request indexes."""
+    op.drop_index('ix_settlementrequest_team_to_created', table_name='settlementrequest')
+    op.drop_index('ix_settlementrequest_team_from_created', table_name='settlementrequest')
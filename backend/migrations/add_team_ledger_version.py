@@ -0,0 +1,25 @@
+"""Add a ledger version counter to teams
+
+Revision ID: add_team_ledger_version
+Revises: add_expense_participants
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_team_ledger_version'
+down_revision = 'add_expense_participants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add team.ledger_version."""
+    op.add_column('team', sa.Column('ledger_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade to remove team.ledger_version."""
+    op.drop_column('team', 'ledger_version')
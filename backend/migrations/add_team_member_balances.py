@@ -0,0 +1,97 @@
+"""Add materialized per-member balances and backfill them from expenses
+
+Revision ID: add_team_member_balances
+Revises: add_recurring_expenses
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_team_member_balances'
+down_revision = 'add_recurring_expenses'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade to add teammemberbalance, filled with every member's totals.
+
+    App startup runs create_all, which may already have made an empty
+    table; it is then refilled rather than created. The totals match
+    `BalanceService.rebuild_team`, which can also be rerun at any time with
+    `python -m app.services.balance`.
+    """
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('teammemberbalance'):
+        balance_table = sa.table('teammemberbalance',
+            sa.column('id', postgresql.UUID(as_uuid=True)),
+            sa.column('team_id', postgresql.UUID(as_uuid=True)),
+            sa.column('user_id', postgresql.UUID(as_uuid=True)),
+            sa.column('paid_minor', sa.Integer()),
+            sa.column('owed_minor', sa.Integer()),
+            sa.column('modified_at', sa.DateTime())
+        )
+        op.execute("DELETE FROM teammemberbalance")
+    else:
+        balance_table = op.create_table('teammemberbalance',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('team_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('paid_minor', sa.Integer(), nullable=False),
+            sa.Column('owed_minor', sa.Integer(), nullable=False),
+            sa.Column('modified_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.ForeignKeyConstraint(['team_id'], ['team.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.UniqueConstraint('team_id', 'user_id', name='uq_team_member_balance')
+        )
+        op.create_index('ix_teammemberbalance_team_id', 'teammemberbalance', ['team_id'])
+
+    # Paid and owed totals in paise, summed in the database as rebuild_team does
+    paid = {
+        (str(team_id), str(user_id)): int(total or 0)
+        for team_id, user_id, total in bind.execute(sa.text(
+            "SELECT team_id, payer_id, SUM(CAST(ROUND(total_amount * 100) AS INTEGER)) "
+            "FROM expense WHERE deleted_at IS NULL GROUP BY team_id, payer_id"
+        ))
+    }
+    owed = {
+        (str(team_id), str(user_id)): int(total or 0)
+        for team_id, user_id, total in bind.execute(sa.text(
+            "SELECT expense.team_id, expenseparticipant.user_id, SUM(expenseparticipant.share_minor) "
+            "FROM expenseparticipant JOIN expense ON expense.id = expenseparticipant.expense_id "
+            "WHERE expense.deleted_at IS NULL GROUP BY expense.team_id, expenseparticipant.user_id"
+        ))
+    }
+
+    now = datetime.utcnow()
+    batch = []
+    for team_id, user_id in bind.execute(sa.text("SELECT team_id, user_id FROM teammember")):
+        key = (str(team_id), str(user_id))
+        batch.append({
+            'id': uuid4(),
+            'team_id': UUID(key[0]),
+            'user_id': UUID(key[1]),
+            'paid_minor': paid.get(key, 0),
+            'owed_minor': owed.get(key, 0),
+            'modified_at': now
+        })
+        if len(batch) >= BATCH_SIZE:
+            op.bulk_insert(balance_table, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(balance_table, batch)
+
+
+def downgrade() -> None:
+    """Downgrade to drop teammemberbalance."""
+    op.drop_index('ix_teammemberbalance_team_id', table_name='teammemberbalance')
+    op.drop_table('teammemberbalance')
@@ -0,0 +1,44 @@
+"""Make team membership unique and index members by user
+
+Revision ID: add_team_member_constraints
+Revises: add_expense_list_index
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_team_member_constraints'
+down_revision = 'add_expense_list_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade to add uq_team_member and ix_teammember_user_id."""
+
+    # Remove duplicate memberships left by concurrent adds, keeping the oldest row
+    bind = op.get_bind()
+    seen = set()
+    duplicates = []
+    rows = bind.execute(sa.text(
+        "SELECT id, team_id, user_id FROM teammember ORDER BY created_at, id"
+    ))
+    for member_id, team_id, user_id in rows:
+        key = (str(team_id), str(user_id))
+        if key in seen:
+            duplicates.append(member_id)
+        else:
+            seen.add(key)
+    for member_id in duplicates:
+        bind.execute(sa.text("DELETE FROM teammember WHERE id = :id"), {'id': member_id})
+
+    op.create_unique_constraint('uq_team_member', 'teammember', ['team_id', 'user_id'])
+    op.create_index('ix_teammember_user_id', 'teammember', ['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade to drop the membership constraint and index."""
+    op.drop_index('ix_teammember_user_id', table_name='teammember')
+    op.drop_constraint('uq_team_member', 'teammember', type_='unique')
@@ -14,38 +14,24 @@ def get_auth_headers(token: str) -> dict:
     return {"Authorization": f"Bearer {token}"}
 
 
-@pytest.fixture(scope="session")
-def test_db_setup():
-    """Setup test database."""
+@pytest.fixture(scope="function")
+def session():
+    """Create a fresh in-memory database and session for each test."""
     engine = create_engine(
-        "sqlite:///:memory:",
+        "sqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
     SQLModel.metadata.create_all(engine)
-    return engine
-
-
-@pytest.fixture(scope="function")
-def db_session(test_db_setup):
-    """Create a fresh database session for each test."""
-    engine = test_db_setup
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = Session(bind=connection)
-    
-    yield session
-    
-    session.close()
-    transaction.rollback()
-    connection.close()
+    with Session(engine) as session:
+        yield session
 
 
 @pytest.fixture(scope="function")
-def client(db_session: Session):
+def client(session: Session):
     """Create a test client with test database."""
     def get_session_override():
-        return db_session
+        return session
     
     app.dependency_overrides[get_session] = get_session_override
     client = TestClient(app)
@@ -0,0 +1,169 @@
+"""Tests for the materialized team member balance table."""
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.models.schemas import User, AuthProvider, ExpenseParticipant, TeamMemberBalance
+from app.services.balance import BalanceService, ledger_cache
+from app.services.cache import LRUCache
+from app.services.expense import ExpenseService
+from app.services.settlement_request import SettlementRequestService
+from app.services.team import TeamService
+
+
+@pytest.fixture(name="team")
+def team_fixture(session: Session):
+    """Create a team with three members and return (team_id, [user_ids])."""
+    users = []
+    for index in range(3):
+        user = User(
+            id=uuid4(),
+            email=f"member{index}@example.com",
+            name=f"Member {index}",
+            auth_provider=AuthProvider.EMAIL
+        )
+        session.add(user)
+        users.append(user)
+    session.commit()
+
+    team = TeamService.create_team(session, "Trip", str(users[0].id))
+    for user in users[1:]:
+        TeamService.add_team_member(session, str(team.id), str(user.id))
+    return str(team.id), [str(user.id) for user in users]
+
+
+def snapshot(session: Session, team_id: str) -> dict:
+    """Current balance table contents as {user_id: (paid, owed)}."""
+    return {
+        str(member.user_id): (paid, owed)
+        for member, paid, owed in BalanceService.get_member_balances(session, team_id)
+    }
+
+
+class TestBalanceTable:
+    """Test suite for incremental balance maintenance."""
+
+    def test_create_expense_updates_balances(self, session: Session, team):
+        """Test creating an expense credits the payer and charges participants."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 100.0, users)
+
+        balances = snapshot(session, team_id)
+        assert balances[users[0]] == (10000, 3334)
+        assert balances[users[1]] == (0, 3333)
+        assert balances[users[2]] == (0, 3333)
+        assert sum(BalanceService.get_settlement_balances(session, team_id).values()) == 0
+
+    def test_update_and_delete_match_rebuild(self, session: Session, team):
+        """Test incremental updates agree with a full rebuild from expenses."""
+        team_id, users = team
+        first = ExpenseService.create_expense(session, team_id, users[0], 90.0, users)
+        second = ExpenseService.create_expense(session, team_id, users[1], 45.5, users[:2])
+        ExpenseService.update_expense(session, str(first.id), total_amount=120.0, participants=users[1:])
+        ExpenseService.delete_expense(session, str(second.id))
+
+        incremental = snapshot(session, team_id)
+        BalanceService.rebuild_team(session, team_id)
+
+        assert snapshot(session, team_id) == incremental
+        assert incremental[users[0]] == (12000, 0)
+
+    def test_approving_suggested_settlements_clears_balances(self, session: Session, team):
+        """Test approving each suggested settlement leaves every member square."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 100.0, users)
+        ExpenseService.create_expense(session, team_id, users[1], 25.5, users[1:])
+
+        for settlement in BalanceService.get_snapshot(session, team_id).settlements:
+            request = SettlementRequestService.create_settlement_request(
+                session, team_id, str(settlement.from_user), str(settlement.to_user), settlement.amount
+            )
+            SettlementRequestService.approve_settlement(session, str(request.id), str(settlement.to_user))
+
+        assert set(BalanceService.get_settlement_balances(session, team_id).values()) == {0}
+        assert BalanceService.get_snapshot(session, team_id).settlements == []
+
+    def test_delete_team_removes_balances(self, session: Session, team):
+        """Test deleting a team removes its balance rows."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 10.0, users)
+
+        TeamService.delete_team(session, team_id, users[0])
+
+        assert session.exec(select(TeamMemberBalance)).all() == []
+        assert session.exec(select(ExpenseParticipant)).all() == []
+
+    def test_participant_shares_are_stored(self, session: Session, team):
+        """Test each participant row carries its exact share of the total."""
+        team_id, users = team
+        expense = ExpenseService.create_expense(session, team_id, users[0], 100.0, users + [users[0]])
+
+        rows = session.exec(
+            select(ExpenseParticipant).where(ExpenseParticipant.expense_id == expense.id)
+            .order_by(ExpenseParticipant.position)
+        ).all()
+
+        assert [str(row.user_id) for row in rows] == users
+        assert [row.share_minor for row in rows] == [3334, 3333, 3333]
+        assert ExpenseService.get_participant_share_totals(session, team_id) == {
+            row.user_id: row.share_minor for row in rows
+        }
+
+    def test_sql_aggregates_match_balance_table(self, session: Session, team):
+        """Test the GROUP BY path agrees with the maintained table."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 10.01, users)
+        ExpenseService.create_expense(session, team_id, users[1], 0.145, users[:2])
+        ExpenseService.create_expense(session, team_id, users[0], 99.99, users[1:])
+        maintained = snapshot(session, team_id)
+
+        session.execute(delete(TeamMemberBalance))
+
+        assert snapshot(session, team_id) == maintained
+        assert ExpenseService.get_payer_totals(session, team_id)[UUID(users[0])] == 11000
+
+
+class TestLedgerCache:
+    """Test suite for versioned ledger snapshot caching."""
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test the cache keeps its size bound and counts evictions."""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+    def test_snapshot_served_from_cache_until_version_changes(self, session: Session, team):
+        """Test repeat reads hit the cache and writes bump the version."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 30.0, users)
+
+        first = BalanceService.get_snapshot(session, team_id)
+        assert BalanceService.get_snapshot(session, team_id) is first
+
+        ExpenseService.create_expense(session, team_id, users[1], 30.0, users)
+        second = BalanceService.get_snapshot(session, team_id)
+        assert second.version == first.version + 1
+        assert second.settlement_balances[UUID(users[1])] == 1000
+
+        TeamService.update_member_budget(session, team_id, users[2], 500.0)
+        assert BalanceService.get_snapshot(session, team_id).budget_balances[UUID(users[2])] == 50000
+
+    def test_uncommitted_bump_is_not_cached(self, session: Session, team):
+        """Test reads inside an uncommitted write do not poison the cache."""
+        team_id, users = team
+        committed = BalanceService.get_snapshot(session, team_id)
+
+        ExpenseService.create_expense(session, team_id, users[0], 10.0, users, commit=False)
+        pending = BalanceService.get_snapshot(session, team_id)
+        session.rollback()
+
+        assert ledger_cache.get((UUID(team_id), pending.version)) is None
+        assert BalanceService.get_snapshot(session, team_id) is committed
@@ -1,12 +1,27 @@
 """Tests for expense endpoints."""
+import json
+import zlib
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, create_engine
+from starlette.requests import Request
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, select
 from sqlmodel.pool import StaticPool
 
 from app.main import app
+from app.api import settlement_requests as settlement_requests_api
+from app.core import responses, streaming
 from app.core.database import get_session
-from app.models.schemas import SQLModel
+from app.models.schemas import SQLModel, Expense, ExpenseCategory, IdempotencyKey
+from app.services.balance import BalanceService
+from app.services.expense import ExpenseService
+from app.services.expense_export import ExpenseExportService
+from app.services import idempotency as idempotency_service
+from app.services.idempotency import IdempotencyService
+from app.services.team import TeamService
 
 
 def get_auth_headers(token: str) -> dict:
@@ -240,6 +255,23 @@ class TestExpenseEndpoints:
         data = response.json()
         assert data["total_amount"] == 100.0
 
+    def test_get_expense_of_other_team_is_not_found(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a member of one team cannot read another team's expense through their own team's path."""
+        other_token = client.post("/auth/register", json={
+            "email": "other@example.com", "name": "Other", "password": "pass123!", "auth_provider": "email"
+        }).json()["access_token"]
+        other_user_id = client.get("/auth/me", headers=get_auth_headers(other_token)).json()["id"]
+        other_team_id = client.post("/teams", json={"name": "Other Team"}, headers=get_auth_headers(other_token)).json()["id"]
+        expense = ExpenseService.create_expense(session, other_team_id, other_user_id, 42.0, [other_user_id])
+
+        for params in ({}, {"fields": "id,total_amount"}):
+            response = client.get(
+                f"/expenses/{team_id}/{expense.id}", params=params, headers=get_auth_headers(auth_token)
+            )
+            assert response.status_code == 404
+
     def test_delete_expense_success(
         self, client: TestClient, auth_token: str, team_id: str, user_id: str
     ):
@@ -331,3 +363,712 @@ class TestExpenseEndpoints:
             headers=get_auth_headers(token2)
         )
         assert response.status_code == 403
+
+    def test_create_expense_non_member_participant(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test expense creation fails if a participant is not a team member."""
+        outsider_token = client.post(
+            "/auth/register",
+            json={
+                "email": "outsider@example.com",
+                "name": "Outsider",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        outsider_id = client.get(
+            "/auth/me",
+            headers=get_auth_headers(outsider_token)
+        ).json()["id"]
+        
+        response = client.post(
+            "/expenses",
+            json={
+                "team_id": team_id,
+                "total_amount": 100.0,
+                "participants": [user_id, outsider_id]
+            },
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+
+    def test_list_team_expenses_by_participant(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test filtering the expense list to expenses a user takes part in."""
+        client.post(
+            "/expenses",
+            json={"team_id": team_id, "total_amount": 40.0, "participants": [user_id]},
+            headers=get_auth_headers(auth_token)
+        )
+        client.post(
+            "/expenses",
+            json={"team_id": team_id, "total_amount": 60.0, "participants": []},
+            headers=get_auth_headers(auth_token)
+        )
+        
+        response = client.get(
+            f"/expenses/{team_id}",
+            params={"participant_id": user_id},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        expenses = response.json()
+        assert len(expenses) == 1
+        assert expenses[0]["participants"] == [user_id]
+
+    def test_list_team_expenses_etag(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test the expense list answers 304 until the team's expenses change."""
+        first = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token))
+        etag = first.headers["ETag"]
+
+        cached = client.get(
+            f"/expenses/{team_id}",
+            headers={**get_auth_headers(auth_token), "If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+        client.post(
+            "/expenses",
+            json={"team_id": team_id, "total_amount": 40.0, "participants": [user_id]},
+            headers=get_auth_headers(auth_token)
+        )
+        changed = client.get(
+            f"/expenses/{team_id}",
+            headers={**get_auth_headers(auth_token), "If-None-Match": etag}
+        )
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert len(changed.json()) == 1
+
+    def test_enriched_listing_query_count_is_constant(
+        self, session: Session, team_id: str, user_id: str
+    ):
+        """Test listing runs the same number of queries for any page size."""
+        categories = [ExpenseCategory(id=uuid4(), name=f"category-{i}", emoji="💰") for i in range(3)]
+        session.add_all(categories)
+        session.commit()
+        for index in range(30):
+            ExpenseService.create_expense(
+                session, team_id, user_id, 10.0, [user_id],
+                category_id=categories[index % 3].id
+            )
+
+        def count_queries(limit: int) -> int:
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(session.get_bind(), "before_cursor_execute", listener)
+            try:
+                expenses = list(ExpenseService.iter_enriched_team_expenses(session, team_id, limit=limit))
+            finally:
+                event.remove(session.get_bind(), "before_cursor_execute", listener)
+            assert len(expenses) == limit
+            assert all(expense["category"] is not None for expense in expenses)
+            return len(statements)
+
+        assert count_queries(3) == count_queries(30)
+
+    def test_list_team_expenses_cursor_pagination(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test walking the expense list with cursors returns every expense once."""
+        for amount in range(1, 8):
+            client.post(
+                "/expenses",
+                json={"team_id": team_id, "total_amount": float(amount), "participants": [user_id]},
+                headers=get_auth_headers(auth_token)
+            )
+
+        seen = []
+        params = {"limit": 3}
+        while True:
+            response = client.get(
+                f"/expenses/{team_id}", params=params, headers=get_auth_headers(auth_token)
+            )
+            assert response.status_code == 200
+            seen.extend(expense["id"] for expense in response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params = {"limit": 3, "cursor": response.headers["X-Next-Cursor"]}
+
+        listed = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert seen == [expense["id"] for expense in listed]
+        assert len(seen) == 7
+
+    def test_list_team_expenses_invalid_cursor(self, client: TestClient, auth_token: str, team_id: str):
+        """Test a malformed cursor is rejected."""
+        response = client.get(
+            f"/expenses/{team_id}",
+            params={"cursor": "not-a-cursor"},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+
+    def test_import_expenses_csv(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test CSV import inserts valid rows, reports bad ones and keeps balances exact."""
+        content = (
+            "payer,total_amount,participants,note,created_at\n"
+            f"testuser@example.com,30.00,{user_id},Taxi,2024-03-01T10:00:00\n"
+            f"stranger@example.com,10,{user_id},Unknown payer,\n"
+            f"{user_id},abc,{user_id},Bad amount,\n"
+            f"{user_id},0.145,{user_id};{user_id},Rounding,\n"
+        )
+        response = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.csv", content, "text/csv")},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["imported"] == 2
+        assert result["failed"] == 2
+        assert [error["row"] for error in result["errors"]] == [3, 4]
+
+        expenses = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert sorted(expense["total_amount"] for expense in expenses) == [0.15, 30.0]
+        assert expenses[-1]["created_at"].startswith("2024-03-01T10:00:00")
+
+        balances = BalanceService.get_settlement_balances(session, team_id)
+        BalanceService.rebuild_team(session, team_id)
+        assert BalanceService.get_settlement_balances(session, team_id) == balances
+
+    def test_import_expenses_ndjson(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test NDJSON import, including a malformed line and a row with no participants."""
+        content = (
+            json.dumps({"payer": user_id, "total_amount": 12.5, "participants": [user_id]}) + "\n"
+            "{not json}\n"
+            "\n"
+            + json.dumps({"payer": user_id, "total_amount": "7", "participants": [user_id], "category": "nope"}) + "\n"
+            + json.dumps({"payer": user_id, "total_amount": 3}) + "\n"
+        )
+        response = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.ndjson", content, "application/x-ndjson")},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["imported"] == 1
+        assert [error["row"] for error in result["errors"]] == [2, 4, 5]
+        assert "participants" in result["errors"][-1]["error"]
+
+    def test_import_expenses_unknown_format(self, client: TestClient, auth_token: str, team_id: str):
+        """Test uploads with no recognisable format are rejected."""
+        response = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.xlsx", b"...", "application/octet-stream")},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+
+    def test_import_expenses_rejects_unreadable_file(self, client: TestClient, auth_token: str, team_id: str, user_id: str):
+        """Test a file that breaks before anything is committed is rejected whole."""
+        content = f"payer,total_amount,participants\n{user_id},5,{user_id}\n".encode() + b"\xff\xfe,1,x\n"
+        response = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.csv", content, "text/csv")},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+        assert client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json() == []
+
+    def test_import_expenses_reports_break_after_committed_batch(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a bad row after the first committed batch keeps earlier rows and names the stop line."""
+        rows = "".join(f"{user_id},1.00,{user_id},Row {n}\n" for n in range(1500))
+        content = b"payer,total_amount,participants,note\n" + rows.encode() + b"\xff\xfe,1,x,bad\n"
+        response = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.csv", content, "text/csv")},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["imported"] >= 1000
+        # Header is line 1, so every line before the reported one was imported
+        assert result["error"]["row"] == result["imported"] + 2
+        assert "UTF-8" in result["error"]["error"]
+
+        expenses = session.exec(select(Expense).where(Expense.team_id == UUID(team_id))).all()
+        assert len(expenses) == result["imported"]
+
+    def test_export_expenses_csv_round_trips(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test CSV export lists every expense oldest first and can be imported back."""
+        category = ExpenseCategory(id=uuid4(), name="Food", emoji="🍔")
+        session.add(category)
+        session.commit()
+        for amount in (10.0, 20.5, 0.1):
+            ExpenseService.create_expense(session, team_id, user_id, amount, [user_id], category_id=str(category.id))
+
+        response = client.get(f"/expenses/{team_id}/export", headers=get_auth_headers(auth_token))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+
+        lines = response.text.splitlines()
+        assert lines[0] == "id,created_at,payer_id,total_amount,participants,category,category_emoji,note"
+        assert [line.split(",")[3] for line in lines[1:]] == ["10.00", "20.50", "0.10"]
+        assert all(line.split(",")[5] == "Food" for line in lines[1:])
+
+        reimported = client.post(
+            f"/expenses/{team_id}/import",
+            files={"file": ("expenses.csv", response.text, "text/csv")},
+            headers=get_auth_headers(auth_token)
+        ).json()
+        assert reimported["imported"] == 3
+        assert reimported["failed"] == 0
+
+    def test_export_expenses_ndjson_in_batches(self, session: Session, team_id: str, user_id: str):
+        """Test the NDJSON export reads several cursor batches and joins participants per batch."""
+        for amount in range(1, 6):
+            ExpenseService.create_expense(session, team_id, user_id, float(amount), [user_id])
+
+        chunks = list(ExpenseExportService.iter_export(session, team_id, "ndjson", batch_size=2))
+        records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+        assert len(chunks) == 3
+        assert [record["total_amount"] for record in records] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert all(record["participants"] == [user_id] for record in records)
+
+    def test_export_expenses_unknown_format(self, client: TestClient, auth_token: str, team_id: str):
+        """Test unsupported export formats are rejected."""
+        response = client.get(
+            f"/expenses/{team_id}/export",
+            params={"format": "xlsx"},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+
+    def test_expense_report(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test report totals per category, payer, participant, day and week with a date range."""
+        category = ExpenseCategory(id=uuid4(), name="Food", emoji="🍔")
+        session.add(category)
+        session.commit()
+        payer = UUID(user_id)
+        ExpenseService.bulk_create_expenses(session, team_id, [
+            {"payer_id": payer, "total_amount": 10.1, "participants": [payer],
+             "category_id": category.id, "created_at": datetime(2024, 3, 4, 9)},
+            {"payer_id": payer, "total_amount": 0.2, "participants": [payer],
+             "category_id": category.id, "created_at": datetime(2024, 3, 4, 20)},
+            {"payer_id": payer, "total_amount": 5, "participants": [payer],
+             "created_at": datetime(2024, 3, 10, 12)},
+            {"payer_id": payer, "total_amount": 99, "participants": [payer],
+             "created_at": datetime(2024, 3, 11, 12)},
+        ])
+
+        response = client.get(
+            f"/expenses/{team_id}/report",
+            params={"start": "2024-03-01T00:00:00", "end": "2024-03-11T00:00:00"},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["total_amount"] == 15.3
+        assert report["expense_count"] == 3
+        assert [(c["name"], c["total_amount"]) for c in report["by_category"]] == [("Food", 10.3), (None, 5.0)]
+        assert report["by_payer"] == [{"user_id": user_id, "total_amount": 15.3, "expense_count": 3}]
+        assert report["by_participant"][0]["total_share"] == 15.3
+        assert [(p["period_start"], p["total_amount"]) for p in report["by_period"]] == [
+            ("2024-03-04", 10.3), ("2024-03-10", 5.0)
+        ]
+
+        weekly = client.get(
+            f"/expenses/{team_id}/report",
+            params={"period": "week"},
+            headers=get_auth_headers(auth_token)
+        ).json()
+        # 2024-03-04 is a Monday and 2024-03-10 the Sunday of the same week
+        assert [(p["period_start"], p["expense_count"]) for p in weekly["by_period"]] == [
+            ("2024-03-04", 3), ("2024-03-11", 1)
+        ]
+
+    def test_expense_batch(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a batch of creates, an update and a delete is applied in order and commits once."""
+        existing = ExpenseService.create_expense(session, team_id, user_id, 40.0, [user_id])
+        doomed = ExpenseService.create_expense(session, team_id, user_id, 5.0, [user_id])
+
+        commits = []
+
+        def count_commit(committed_session):
+            commits.append(committed_session)
+
+        event.listen(session, "after_commit", count_commit)
+        try:
+            response = client.post(
+                f"/expenses/{team_id}/batch",
+                json={"operations": [
+                    {"op": "create", "data": {"total_amount": 12.5, "participants": [user_id], "note": "Lunch"}},
+                    {"op": "create", "data": {"total_amount": 7.5, "participants": [user_id]}},
+                    {"op": "update", "expense_id": str(existing.id), "data": {"total_amount": 42.0}},
+                    {"op": "delete", "expense_id": str(doomed.id)},
+                ]},
+                headers=get_auth_headers(auth_token)
+            )
+        finally:
+            event.remove(session, "after_commit", count_commit)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["op"] for result in results] == ["create", "create", "update", "delete"]
+        assert results[0]["expense"]["note"] == "Lunch"
+        assert results[2]["expense"]["total_amount"] == 42.0
+        assert results[3]["expense"] is None
+        assert len(commits) == 1
+
+        expenses = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert sorted(expense["total_amount"] for expense in expenses) == [7.5, 12.5, 42.0]
+        balances = BalanceService.get_settlement_balances(session, team_id)
+        BalanceService.rebuild_team(session, team_id)
+        assert BalanceService.get_settlement_balances(session, team_id) == balances
+
+    def test_expense_batch_rolls_back_on_error(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a failing operation rejects the whole batch and reports its index."""
+        response = client.post(
+            f"/expenses/{team_id}/batch",
+            json={"operations": [
+                {"op": "create", "data": {"total_amount": 12.5, "participants": [user_id]}},
+                {"op": "delete", "expense_id": str(uuid4())},
+            ]},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"]["index"] == 1
+
+        expenses = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert expenses == []
+
+    def test_create_expense_idempotency_key(
+        self, client: TestClient, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a retried create with the same Idempotency-Key replays the first response."""
+        body = {"team_id": team_id, "total_amount": 25.0, "participants": [user_id]}
+        headers = {**get_auth_headers(auth_token), "Idempotency-Key": "retry-1"}
+
+        first = client.post("/expenses", json=body, headers=headers)
+        retry = client.post("/expenses", json=body, headers=headers)
+
+        assert first.status_code == 200
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        expenses = client.get(f"/expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert len(expenses) == 1
+
+        reused = client.post("/expenses", json={**body, "total_amount": 30.0}, headers=headers)
+        assert reused.status_code == 409
+
+    def test_failed_settlement_create_releases_idempotency_key(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, monkeypatch
+    ):
+        """Test a settlement create that fails is retried with the same key instead of answering 409."""
+        other = client.post("/auth/register", json={
+            "email": "other@example.com", "name": "Other", "password": "pass123!", "auth_provider": "email"
+        }).json()["access_token"]
+        other_id = client.get("/auth/me", headers=get_auth_headers(other)).json()["id"]
+        TeamService.add_team_member(session, team_id, other_id)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("storage unavailable")
+
+        body = {"to_user_id": other_id, "amount": 12.5}
+        headers = {**get_auth_headers(auth_token), "Idempotency-Key": "settle-1"}
+        monkeypatch.setattr(settlement_requests_api, "remember_response", fail)
+        failed = client.post(f"/settlements/{team_id}/create", json=body, headers=headers)
+        assert failed.status_code == 500
+        monkeypatch.undo()
+
+        created = client.post(f"/settlements/{team_id}/create", json=body, headers=headers)
+        retry = client.post(f"/settlements/{team_id}/create", json=body, headers=headers)
+        assert created.status_code == 200
+        assert retry.json() == created.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    def test_idempotency_claim_leaves_caller_work_uncommitted(
+        self, session: Session, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test claiming a key never commits the request's session; expired keys are purged separately."""
+        expired = IdempotencyKey(
+            id=uuid4(), user_id=UUID(user_id), scope="POST /test", key="old", request_hash="x",
+            created_at=datetime.utcnow() - timedelta(days=2), expires_at=datetime.utcnow() - timedelta(days=1)
+        )
+        session.add(expired)
+        session.commit()
+
+        expense = ExpenseService.create_expense(session, team_id, user_id, 5.0, [user_id], commit=False)
+        monkeypatch.setattr(idempotency_service, "_last_purge", float("-inf"))
+        IdempotencyService.claim(session, user_id, "POST /test", "new", "y")
+
+        assert expense in session.new or expense in session
+        assert "total_amount" in expense.__dict__  # not expired by a commit
+        session.rollback()
+        assert session.exec(select(Expense)).all() == []
+        assert session.exec(select(IdempotencyKey)).all() == [expired]
+
+        IdempotencyService.purge_expired_if_due(session)
+        assert session.exec(select(IdempotencyKey)).all() == []
+
+    def test_expired_idempotency_key_can_be_reused(self, session: Session, user_id: str):
+        """Test an expired key is claimed afresh instead of replaying the old response."""
+        request_hash = IdempotencyService.request_hash({"amount": 1})
+        assert IdempotencyService.claim(session, user_id, "POST /test", "key", request_hash) is None
+        IdempotencyService.save_response(session, user_id, "POST /test", "key", {"ok": True})
+        session.commit()
+        assert IdempotencyService.claim(session, user_id, "POST /test", "key", request_hash).status_code == 200
+
+        record = session.exec(select(IdempotencyKey)).one()
+        record.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(record)
+        session.commit()
+
+        assert IdempotencyService.claim(session, user_id, "POST /test", "key", request_hash) is None
+
+    def test_expense_changes_delta_sync(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test delta sync returns only changes since the last seq, with tombstones for deletes."""
+        headers = get_auth_headers(auth_token)
+        kept = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        edited = ExpenseService.create_expense(session, team_id, user_id, 20.0, [user_id])
+        removed = ExpenseService.create_expense(session, team_id, user_id, 30.0, [user_id])
+
+        full = client.get(f"/expenses/{team_id}/changes", headers=headers).json()
+        assert len(full["expenses"]) == 3
+        assert full["deleted"] == []
+        assert full["has_more"] is False
+
+        ExpenseService.update_expense(session, str(edited.id), total_amount=25.0)
+        ExpenseService.delete_expense(session, str(removed.id))
+        added = ExpenseService.create_expense(session, team_id, user_id, 5.0, [user_id])
+
+        delta = client.get(f"/expenses/{team_id}/changes", params={"since": full["seq"]}, headers=headers).json()
+        assert [expense["id"] for expense in delta["expenses"]] == [str(edited.id), str(added.id)]
+        assert delta["expenses"][0]["total_amount"] == 25.0
+        assert [tombstone["id"] for tombstone in delta["deleted"]] == [str(removed.id)]
+        assert str(kept.id) not in {expense["id"] for expense in delta["expenses"]}
+
+        empty = client.get(f"/expenses/{team_id}/changes", params={"since": delta["seq"]}, headers=headers).json()
+        assert empty["expenses"] == [] and empty["deleted"] == []
+
+        # Tombstones are invisible everywhere else
+        assert client.get(f"/expenses/{team_id}/{removed.id}", headers=headers).status_code == 404
+        listed = client.get(f"/expenses/{team_id}", headers=headers).json()
+        assert sorted(expense["total_amount"] for expense in listed) == [5.0, 10.0, 25.0]
+        balances = BalanceService.get_settlement_balances(session, team_id)
+        BalanceService.rebuild_team(session, team_id)
+        assert BalanceService.get_settlement_balances(session, team_id) == balances
+
+    def test_expense_changes_pages_within_one_seq(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test paging through a bulk insert whose rows all share one change_seq."""
+        headers = get_auth_headers(auth_token)
+        payer = UUID(user_id)
+        ExpenseService.bulk_create_expenses(session, team_id, [
+            {"payer_id": payer, "total_amount": amount, "participants": [payer]} for amount in range(1, 6)
+        ])
+
+        seen = []
+        params = {"since": 0, "limit": 2}
+        while True:
+            page = client.get(f"/expenses/{team_id}/changes", params=params, headers=headers).json()
+            seen.extend(expense["id"] for expense in page["expenses"])
+            if not page["has_more"]:
+                break
+            params = {"since": page["seq"], "after": page["after"], "snapshot_seq": page["snapshot_seq"], "limit": 2}
+
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_full_sync_pages_skip_earlier_deletes(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test every page of a full sync leaves out rows deleted before it started, but not after."""
+        headers = get_auth_headers(auth_token)
+        expenses = [
+            ExpenseService.create_expense(session, team_id, user_id, float(amount), [user_id])
+            for amount in range(1, 7)
+        ]
+        # Deleting bumps change_seq, so this tombstone sorts onto a later page
+        ExpenseService.delete_expense(session, str(expenses[0].id))
+
+        first = client.get(f"/expenses/{team_id}/changes", params={"since": 0, "limit": 2}, headers=headers).json()
+        assert first["has_more"] and first["snapshot_seq"] is not None
+        assert first["deleted"] == []
+        # A row the client already has is deleted mid-sync
+        ExpenseService.delete_expense(session, first["expenses"][0]["id"])
+
+        seen, deleted = [e["id"] for e in first["expenses"]], []
+        page = first
+        while page["has_more"]:
+            page = client.get(f"/expenses/{team_id}/changes", params={
+                "since": page["seq"], "after": page["after"], "snapshot_seq": page["snapshot_seq"], "limit": 2
+            }, headers=headers).json()
+            seen.extend(expense["id"] for expense in page["expenses"])
+            deleted.extend(tombstone["id"] for tombstone in page["deleted"])
+
+        assert str(expenses[0].id) not in seen + deleted
+        assert deleted == [first["expenses"][0]["id"]]
+        assert page["snapshot_seq"] is None
+
+    def test_fast_listing_matches_validated_response(
+        self, session: Session, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test the unvalidated dict path encodes exactly like ExpenseResponse, with or without orjson."""
+        category = ExpenseCategory(id=uuid4(), name="Food", emoji="🍔")
+        session.add(category)
+        session.commit()
+        ExpenseService.create_expense(session, team_id, user_id, 12.34, [user_id], category_id=str(category.id))
+        ExpenseService.create_expense(session, team_id, user_id, 5, [user_id], note="Snacks")
+
+        validated = ExpenseService.enrich_expenses(session, ExpenseService.get_team_expenses(session, team_id))
+        fast = list(ExpenseService.iter_enriched_team_expenses(session, team_id))
+        expected = [json.loads(expense.model_dump_json()) for expense in validated]
+
+        assert json.loads(responses.FastJSONResponse(fast).body) == expected
+        monkeypatch.setattr(responses, "orjson", None)
+        assert json.loads(responses.FastJSONResponse(fast).body) == expected
+
+    def test_sparse_fieldsets(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test `fields=` narrows the response and the columns read from the expense table."""
+        category = ExpenseCategory(id=uuid4(), name="Food", emoji="🍔")
+        session.add(category)
+        session.commit()
+        expense = ExpenseService.create_expense(
+            session, team_id, user_id, 12.5, [user_id], category_id=str(category.id), note="Lunch"
+        )
+        ExpenseService.create_expense(session, team_id, user_id, 3.0, [user_id])
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(session.get_bind(), "before_cursor_execute", record_statement)
+        try:
+            response = client.get(
+                f"/expenses/{team_id}",
+                params={"fields": "total_amount,payer_id,note,category.emoji"},
+                headers=get_auth_headers(auth_token)
+            )
+        finally:
+            event.remove(session.get_bind(), "before_cursor_execute", record_statement)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"total_amount": 3.0, "note": None, "payer_id": user_id, "category": None},
+            {"total_amount": 12.5, "note": "Lunch", "payer_id": user_id, "category": {"emoji": "🍔"}},
+        ]
+        expense_reads = [statement for statement in statements if "FROM expense " in statement]
+        assert expense_reads and not any("expense.modified_at" in statement for statement in expense_reads)
+        assert not any("expense_category.created_at" in statement for statement in statements)
+
+        single = client.get(
+            f"/expenses/{team_id}/{expense.id}",
+            params={"fields": "id,participants,category"},
+            headers=get_auth_headers(auth_token)
+        ).json()
+        assert single["id"] == str(expense.id)
+        assert single["participants"] == [user_id]
+        assert set(single["category"]) == {"name", "emoji", "id", "is_default", "created_at", "modified_at"}
+
+        changes = client.get(
+            f"/expenses/{team_id}/changes",
+            params={"fields": "id"},
+            headers=get_auth_headers(auth_token)
+        ).json()
+        assert [set(change) for change in changes["expenses"]] == [{"id"}, {"id"}]
+
+        for fields in ("total_amount,secret", "note.emoji", "category.nope"):
+            response = client.get(
+                f"/expenses/{team_id}",
+                params={"fields": fields},
+                headers=get_auth_headers(auth_token)
+            )
+            assert response.status_code == 400
+
+    def test_list_team_expenses_streams_gzip(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test the streamed listing is gzip-encoded on request and keeps its paging headers and a coded ETag."""
+        for amount in (1.0, 2.0, 3.0):
+            ExpenseService.create_expense(session, team_id, user_id, amount, [user_id])
+
+        response = client.get(
+            f"/expenses/{team_id}",
+            params={"limit": 2},
+            headers={**get_auth_headers(auth_token), "Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert [expense["total_amount"] for expense in response.json()] == [3.0, 2.0]
+        assert "X-Next-Cursor" in response.headers
+        gzip_etag = response.headers["ETag"]
+        assert gzip_etag.endswith('-gzip"')
+
+        identity = client.get(
+            f"/expenses/{team_id}",
+            params={"limit": 2},
+            headers={**get_auth_headers(auth_token), "Accept-Encoding": "identity"}
+        )
+        assert identity.headers["ETag"] == gzip_etag.replace("-gzip", "")
+
+        cached = client.get(
+            f"/expenses/{team_id}",
+            params={"limit": 2},
+            headers={**get_auth_headers(auth_token), "Accept-Encoding": "gzip", "If-None-Match": gzip_etag}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == gzip_etag
+
+        plain = client.get(
+            f"/expenses/{team_id}",
+            params={"cursor": response.headers["X-Next-Cursor"]},
+            headers={**get_auth_headers(auth_token), "Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in plain.headers
+        assert [expense["total_amount"] for expense in plain.json()] == [1.0]
+        assert "X-Next-Cursor" not in plain.headers
+
+    def test_streaming_helpers(self, monkeypatch):
+        """Test array chunking, Accept-Encoding negotiation and incremental gzip."""
+        monkeypatch.setattr(streaming, "STREAM_CHUNK_SIZE", 64)
+        items = [{"index": index, "note": "x" * 20} for index in range(20)]
+        chunks = list(streaming.iter_json_array(items, prefix=b'{"items":', suffix=lambda: b"}"))
+        assert len(chunks) > 1
+        assert json.loads(b"".join(chunks)) == {"items": items}
+        assert json.loads(b"".join(streaming.iter_json_array([]))) == []
+
+        def negotiate(header):
+            return streaming.negotiate_encoding(
+                Request({"type": "http", "headers": [(b"accept-encoding", header.encode())]})
+            )
+        monkeypatch.setattr(streaming, "brotli", None)
+        assert negotiate("gzip, deflate, br") == "gzip"
+        assert negotiate("gzip;q=0, deflate") is None
+        assert negotiate("*") == "gzip"
+        assert negotiate("") is None
+
+        compressed = list(streaming.iter_compressed(chunks, "gzip"))
+        # Every chunk is flushed, so each decodes without waiting for the rest
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        assert decoder.decompress(compressed[0]) == chunks[0]
+        assert json.loads(zlib.decompress(b"".join(compressed), zlib.MAX_WBITS | 16)) == {"items": items}
@@ -0,0 +1,155 @@
+"""Query-plan tests for the indexes behind hot lookup paths."""
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models.schemas import User, AuthProvider, TeamInvitation, TeamMember
+from app.services.expense import ExpenseService
+from app.services.invitation import InvitationService
+from app.services.settlement_request import SettlementRequestService
+from app.services.team import TeamService, membership_cache
+
+
+@pytest.fixture(name="team")
+def team_fixture(session: Session):
+    """Create a team with two members and return (team_id, [user_ids])."""
+    users = []
+    for index in range(2):
+        user = User(
+            id=uuid4(),
+            email=f"member{index}@example.com",
+            name=f"Member {index}",
+            auth_provider=AuthProvider.EMAIL
+        )
+        session.add(user)
+        users.append(user)
+    session.commit()
+
+    team = TeamService.create_team(session, "Trip", str(users[0].id))
+    TeamService.add_team_member(session, str(team.id), str(users[1].id))
+    return str(team.id), [str(user.id) for user in users]
+
+
+def query_plans(session: Session, table: str, call) -> list:
+    """Run `call` and return EXPLAIN QUERY PLAN details for its SELECTs on `table`."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement:
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements, f"no queries on {table}"
+    connection = session.connection()
+    return [
+        " | ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+        for statement, parameters in statements
+    ]
+
+
+class TestHotQueryIndexes:
+    """Test suite checking hot service queries search an index instead of scanning."""
+
+    def test_team_members_use_membership_index(self, session: Session, team):
+        """Test member lists and membership checks use the unique membership index."""
+        team_id, users = team
+
+        plans = query_plans(session, "teammember", lambda: TeamService.get_team_members(session, team_id))
+
+        assert all("SEARCH teammember USING INDEX sqlite_autoindex_teammember" in plan for plan in plans)
+
+    def test_membership_check_is_indexed_exists(self, session: Session, team):
+        """Test the authorization check is one EXISTS probe on the membership index."""
+        team_id, users = team
+        membership_cache.clear()
+
+        plans = query_plans(session, "teammember", lambda: TeamService.is_member(session, team_id, users[1]))
+
+        assert len(plans) == 1
+        assert "USING INDEX sqlite_autoindex_teammember" in plans[0]
+        assert "(team_id=? AND user_id=?)" in plans[0]
+
+    def test_membership_cache_keeps_only_positive_results(self, session: Session, team):
+        """Test a refused lookup is not cached, so a member added by another worker is let in."""
+        team_id, users = team
+        membership_cache.clear()
+        outsider = User(id=uuid4(), email="outsider@example.com", name="Outsider", auth_provider=AuthProvider.EMAIL)
+        session.add(outsider)
+        session.commit()
+
+        assert not TeamService.is_member(session, team_id, outsider.id)
+        # Added behind this process's back, as another worker would
+        session.add(TeamMember(id=uuid4(), team_id=UUID(team_id), user_id=outsider.id))
+        session.commit()
+
+        assert TeamService.is_member(session, team_id, outsider.id)
+        assert membership_cache.get((UUID(team_id), outsider.id)) is True
+
+    def test_user_teams_use_user_index(self, session: Session, team):
+        """Test looking up a user's teams searches by user_id."""
+        team_id, users = team
+
+        plans = query_plans(session, "teammember", lambda: TeamService.get_user_teams(session, users[1]))
+
+        assert all("ix_teammember_user_id" in plan for plan in plans)
+
+    def test_expense_listing_uses_team_created_index(self, session: Session, team):
+        """Test the newest-first listing walks the composite index without sorting."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 10.0, users)
+
+        plans = query_plans(session, "expense", lambda: ExpenseService.get_team_expenses(session, team_id))
+
+        assert "ix_expense_team_created_id" in plans[0]
+        assert "TEMP B-TREE" not in plans[0]
+
+    def test_expense_changes_use_change_seq_index(self, session: Session, team):
+        """Test delta sync walks the (team_id, change_seq, id) index without sorting."""
+        team_id, users = team
+        ExpenseService.create_expense(session, team_id, users[0], 10.0, users)
+
+        plans = query_plans(session, "expense", lambda: ExpenseService.get_team_changes(session, team_id, since=1))
+
+        assert "ix_expense_team_change_seq" in plans[0]
+        assert "TEMP B-TREE" not in plans[0]
+
+    def test_settlement_listing_uses_pair_indexes(self, session: Session, team):
+        """Test sent and received settlement lists each use their own index."""
+        team_id, users = team
+
+        plans = query_plans(
+            session,
+            "settlementrequest",
+            lambda: SettlementRequestService.get_user_settlement_requests(session, team_id, users[0])
+        )
+
+        assert "ix_settlementrequest_team_from_created" in plans[0]
+        assert "ix_settlementrequest_team_to_created" in plans[1]
+        assert not any("TEMP B-TREE" in plan for plan in plans)
+
+    def test_pending_invitations_use_pending_index(self, session: Session, team):
+        """Test pending invitation lookups use the (team_id, is_used, expires_at) index."""
+        team_id, users = team
+        session.add(TeamInvitation(
+            id=uuid4(),
+            team_id=team_id,
+            invitee_email="guest@example.com",
+            inviter_id=users[0],
+            expires_at=datetime.utcnow() + timedelta(days=1)
+        ))
+        session.commit()
+
+        plans = query_plans(
+            session, "teaminvitation", lambda: InvitationService.get_pending_invitations(session, team_id)
+        )
+
+        assert "ix_teaminvitation_team_pending" in plans[0]
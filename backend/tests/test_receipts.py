@@ -0,0 +1,207 @@
+"""Tests for expense receipt attachments."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.core.files import parse_range
+from app.models.schemas import ExpenseReceipt
+from app.services import receipt as receipt_service
+from app.services.expense import ExpenseService
+from app.services.receipt import ReceiptService
+from app.services.team import TeamService
+from tests.conftest import get_auth_headers
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+@pytest.fixture(name="storage_dir", autouse=True)
+def storage_dir_fixture(tmp_path, monkeypatch):
+    """Keep receipt files in a per-test directory."""
+    monkeypatch.setattr(get_settings(), "RECEIPT_STORAGE_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestReceiptEndpoints:
+    """Test suite for receipt endpoints."""
+
+    def upload(self, client: TestClient, auth_token: str, team_id: str, expense_id, content=PNG_BYTES):
+        """Upload `content` as a receipt of the expense."""
+        return client.post(
+            f"/expenses/{team_id}/{expense_id}/receipts",
+            files={"file": ("receipt.png", content, "image/png")},
+            headers=get_auth_headers(auth_token)
+        )
+
+    def test_upload_deduplicates_and_serves_ranges(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test identical uploads share one blob, and downloads honour ETag and Range."""
+        first = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        second = ExpenseService.create_expense(session, team_id, user_id, 20.0, [user_id])
+
+        response = self.upload(client, auth_token, team_id, first.id)
+        assert response.status_code == 200
+        receipt = response.json()
+        assert receipt["content_type"] == "image/png"
+        assert receipt["size_bytes"] == len(PNG_BYTES)
+        assert self.upload(client, auth_token, team_id, second.id).json()["sha256"] == receipt["sha256"]
+        assert os.listdir(os.path.dirname(ReceiptService.blob_path(receipt["sha256"]))) == [receipt["sha256"]]
+
+        listed = client.get(f"/expenses/{team_id}/{first.id}/receipts", headers=get_auth_headers(auth_token))
+        assert [r["id"] for r in listed.json()] == [receipt["id"]]
+
+        url = f"/expenses/{team_id}/{first.id}/receipts/{receipt['id']}"
+        full = client.get(url, headers=get_auth_headers(auth_token))
+        assert full.status_code == 200
+        assert full.content == PNG_BYTES
+        assert full.headers["etag"] == f'"{receipt["sha256"]}"'
+        assert full.headers["accept-ranges"] == "bytes"
+
+        cached = client.get(url, headers={**get_auth_headers(auth_token), "If-None-Match": full.headers["etag"]})
+        assert cached.status_code == 304
+
+        partial = client.get(url, headers={**get_auth_headers(auth_token), "Range": "bytes=8-15"})
+        assert partial.status_code == 206
+        assert partial.content == PNG_BYTES[8:16]
+        assert partial.headers["content-range"] == f"bytes 8-15/{len(PNG_BYTES)}"
+
+        stale = client.get(url, headers={**get_auth_headers(auth_token), "Range": "bytes=8-15", "If-Range": '"old"'})
+        assert stale.status_code == 200
+        assert stale.content == PNG_BYTES
+
+        beyond = client.get(url, headers={**get_auth_headers(auth_token), "Range": "bytes=99999-"})
+        assert beyond.status_code == 416
+        assert beyond.headers["content-range"] == f"bytes */{len(PNG_BYTES)}"
+
+    def test_delete_keeps_shared_blob(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a blob is removed only with the last receipt that uses it."""
+        first = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        second = ExpenseService.create_expense(session, team_id, user_id, 20.0, [user_id])
+        first_receipt = self.upload(client, auth_token, team_id, first.id).json()
+        second_receipt = self.upload(client, auth_token, team_id, second.id).json()
+        blob = ReceiptService.blob_path(first_receipt["sha256"])
+
+        response = client.delete(
+            f"/expenses/{team_id}/{first.id}/receipts/{first_receipt['id']}",
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        assert os.path.exists(blob)
+
+        # Age the blob past the window in which a concurrent upload could still claim it
+        os.utime(blob, (0, 0))
+        client.delete(
+            f"/expenses/{team_id}/{second.id}/receipts/{second_receipt['id']}",
+            headers=get_auth_headers(auth_token)
+        )
+        assert not os.path.exists(blob)
+
+    def test_delete_team_removes_receipts(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test deleting a team drops its receipt rows and the files no other receipt uses."""
+        expense = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        receipt = self.upload(client, auth_token, team_id, expense.id).json()
+        blob = ReceiptService.blob_path(receipt["sha256"])
+        assert os.path.exists(blob)
+
+        TeamService.delete_team(session, team_id, user_id)
+
+        assert session.exec(select(ExpenseReceipt)).all() == []
+        assert not os.path.exists(blob)
+
+    def test_receipts_of_deleted_expenses_are_reclaimed(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test receipts of soft-deleted expenses go once the grace period is over, keeping shared files."""
+        live = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        deleted = ExpenseService.create_expense(session, team_id, user_id, 20.0, [user_id])
+        shared = self.upload(client, auth_token, team_id, live.id).json()
+        self.upload(client, auth_token, team_id, deleted.id)
+        unique = self.upload(client, auth_token, team_id, deleted.id, content=PNG_BYTES + b"unique").json()
+        ExpenseService.delete_expense(session, str(deleted.id))
+
+        assert ReceiptService.purge_deleted_expense_receipts(session) == 0
+
+        later = datetime.utcnow() + timedelta(hours=get_settings().RECEIPT_DELETED_EXPENSE_GRACE_HOURS + 1)
+        assert ReceiptService.purge_deleted_expense_receipts(session, now=later) == 2
+        assert [receipt.expense_id for receipt in session.exec(select(ExpenseReceipt)).all()] == [live.id]
+        assert os.path.exists(ReceiptService.blob_path(shared["sha256"]))
+        assert not os.path.exists(ReceiptService.blob_path(unique["sha256"]))
+
+    def test_rejected_uploads(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test unsupported and oversized files are refused and leave nothing on disk."""
+        expense = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+
+        response = self.upload(client, auth_token, team_id, expense.id, content=b"#!/bin/sh\necho hi\n")
+        assert response.status_code == 415
+
+        monkeypatch.setattr(get_settings(), "RECEIPT_MAX_BYTES", 100)
+        response = self.upload(client, auth_token, team_id, expense.id)
+        assert response.status_code == 413
+
+        assert os.listdir(os.path.join(get_settings().RECEIPT_STORAGE_DIR, "tmp")) == []
+        listed = client.get(f"/expenses/{team_id}/{expense.id}/receipts", headers=get_auth_headers(auth_token))
+        assert listed.json() == []
+
+    def test_thumbnail_unavailable_without_pillow(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test thumbnails 404 when they cannot be generated."""
+        monkeypatch.setattr(receipt_service, "Image", None)
+        expense = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        receipt = self.upload(client, auth_token, team_id, expense.id).json()
+
+        response = client.get(
+            f"/expenses/{team_id}/{expense.id}/receipts/{receipt['id']}/thumbnail",
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 404
+
+    def test_thumbnail_refuses_decompression_bombs(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test images Pillow flags as decompression bombs get no thumbnail."""
+        class BombError(Exception):
+            pass
+
+        class FakeImage:
+            MAX_IMAGE_PIXELS = None
+            DecompressionBombError = BombError
+
+            @staticmethod
+            def open(path):
+                raise BombError(path)
+
+        monkeypatch.setattr(receipt_service, "Image", FakeImage)
+        expense = ExpenseService.create_expense(session, team_id, user_id, 10.0, [user_id])
+        receipt = self.upload(client, auth_token, team_id, expense.id).json()
+
+        response = client.get(
+            f"/expenses/{team_id}/{expense.id}/receipts/{receipt['id']}/thumbnail",
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 404
+        assert FakeImage.MAX_IMAGE_PIXELS == receipt_service.THUMBNAIL_MAX_PIXELS
+        assert os.listdir(os.path.join(get_settings().RECEIPT_STORAGE_DIR, "tmp")) == []
+
+    def test_parse_range(self):
+        """Test single byte ranges are parsed and others ignored or refused."""
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        assert parse_range("items=0-1", 100) is None
+        assert parse_range("bytes=a-b", 100) is None
+        with pytest.raises(ValueError):
+            parse_range("bytes=100-", 100)
@@ -0,0 +1,159 @@
+"""Tests for recurring expenses."""
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.scheduler import RecurringExpenseScheduler
+from app.models.schemas import RecurrenceInterval, RecurringExpense, RecurringExpenseParticipant
+from app.services.balance import BalanceService
+from app.services.expense import ExpenseService
+from app.services.recurring_expense import RecurringExpenseService
+from app.services.team import TeamService
+from tests.conftest import get_auth_headers
+
+
+class TestRecurringExpenses:
+    """Test suite for recurring expenses."""
+
+    def test_create_catches_up_missed_days_in_one_batch(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str, monkeypatch
+    ):
+        """Test overdue occurrences are created at once, with one balance update per batch."""
+        delta_calls = []
+        apply_deltas = BalanceService.apply_deltas
+
+        def count_apply_deltas(*args, **kwargs):
+            delta_calls.append(args)
+            return apply_deltas(*args, **kwargs)
+
+        monkeypatch.setattr(BalanceService, "apply_deltas", count_apply_deltas)
+        start_at = datetime.utcnow() - timedelta(days=3) + timedelta(hours=1)
+        response = client.post(
+            f"/recurring-expenses/{team_id}",
+            json={
+                "total_amount": 1500.0,
+                "participants": [user_id],
+                "note": "Hotel room",
+                "start_at": start_at.isoformat()
+            },
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        template = response.json()
+        assert template["interval"] == "daily"
+        assert template["is_active"] is True
+        assert template["participants"] == [user_id]
+        assert datetime.fromisoformat(template["next_run_at"]) == start_at + timedelta(days=3)
+        assert len(delta_calls) == 1
+
+        expenses = ExpenseService.get_team_expenses(session, team_id)
+        assert sorted(expense.created_at for expense in expenses) == [
+            start_at, start_at + timedelta(days=1), start_at + timedelta(days=2)
+        ]
+        assert {expense.note for expense in expenses} == {"Hotel room"}
+        balances = BalanceService.get_settlement_balances(session, team_id)
+        BalanceService.rebuild_team(session, team_id)
+        assert BalanceService.get_settlement_balances(session, team_id) == balances
+
+        # Later runs only create what has fallen due since
+        later = start_at + timedelta(days=4, minutes=1)
+        assert RecurringExpenseService.materialize_due(session, now=later) == 2
+        assert RecurringExpenseService.materialize_due(session, now=later) == 0
+        assert len(ExpenseService.get_team_expenses(session, team_id)) == 5
+
+    def test_end_at_and_stop(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test a template ends after end_at, and a stopped one creates nothing more."""
+        start_at = datetime(2024, 1, 1, 9)
+        response = client.post(
+            f"/recurring-expenses/{team_id}",
+            json={
+                "total_amount": 700.0,
+                "participants": [user_id],
+                "interval": "weekly",
+                "start_at": start_at.isoformat(),
+                "end_at": (start_at + timedelta(weeks=2)).isoformat()
+            },
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.json()["is_active"] is False
+        assert len(ExpenseService.get_team_expenses(session, team_id)) == 3
+
+        template = client.post(
+            f"/recurring-expenses/{team_id}",
+            json={"total_amount": 50.0, "participants": [user_id], "start_at": "2999-01-01T00:00:00"},
+            headers=get_auth_headers(auth_token)
+        ).json()
+        response = client.delete(f"/recurring-expenses/{team_id}/{template['id']}", headers=get_auth_headers(auth_token))
+        assert response.status_code == 200
+        assert response.json()["is_active"] is False
+        assert RecurringExpenseService.materialize_due(session, now=datetime(3000, 1, 1)) == 0
+
+        listed = client.get(f"/recurring-expenses/{team_id}", headers=get_auth_headers(auth_token)).json()
+        assert [item["total_amount"] for item in listed] == [700.0, 50.0]
+
+    def test_delete_team_removes_templates(
+        self, client: TestClient, session: Session, auth_token: str, team_id: str, user_id: str
+    ):
+        """Test deleting a team drops its templates, so the scheduler has nothing left to run."""
+        client.post(
+            f"/recurring-expenses/{team_id}",
+            json={"total_amount": 50.0, "participants": [user_id], "start_at": "2999-01-01T00:00:00"},
+            headers=get_auth_headers(auth_token)
+        )
+
+        TeamService.delete_team(session, team_id, user_id)
+
+        assert session.exec(select(RecurringExpense)).all() == []
+        assert session.exec(select(RecurringExpenseParticipant)).all() == []
+        assert RecurringExpenseService.materialize_due(session, now=datetime(3000, 1, 1)) == 0
+
+    def test_rejects_invalid_templates(self, client: TestClient, auth_token: str, team_id: str, user_id: str):
+        """Test non-member participants and an end before the start are refused."""
+        response = client.post(
+            f"/recurring-expenses/{team_id}",
+            json={"total_amount": 10.0, "participants": ["00000000-0000-0000-0000-000000000001"]},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            f"/recurring-expenses/{team_id}",
+            json={
+                "total_amount": 10.0,
+                "participants": [user_id],
+                "start_at": "2024-02-01T00:00:00",
+                "end_at": "2024-01-01T00:00:00"
+            },
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 400
+        assert client.get(f"/recurring-expenses/{team_id}", headers=get_auth_headers(auth_token)).json() == []
+
+    def test_monthly_occurrences_keep_day_of_month(self):
+        """Test monthly templates fall back to short months' last day and then return to their own."""
+        template = RecurringExpense(interval=RecurrenceInterval.MONTHLY, start_at=datetime(2024, 1, 31, 8))
+        occurrences = [template.start_at]
+        for _ in range(3):
+            occurrences.append(RecurringExpenseService.next_occurrence(template, occurrences[-1]))
+        assert occurrences == [
+            datetime(2024, 1, 31, 8), datetime(2024, 2, 29, 8), datetime(2024, 3, 31, 8), datetime(2024, 4, 30, 8)
+        ]
+        assert RecurringExpenseService.next_occurrence(template, datetime(2024, 12, 31, 8)) == datetime(2025, 1, 31, 8)
+
+    def test_scheduler_runs_on_start(self, monkeypatch):
+        """Test the scheduler's first run happens at start, before the first interval."""
+        runs = []
+        monkeypatch.setattr(RecurringExpenseScheduler, "run_once", staticmethod(lambda: runs.append(1) or 0))
+
+        async def start_and_stop():
+            scheduler = RecurringExpenseScheduler(interval_seconds=3600)
+            scheduler.start()
+            await asyncio.sleep(0.1)
+            await scheduler.stop()
+
+        asyncio.run(start_and_stop())
+        assert runs == [1]
@@ -0,0 +1,112 @@
+"""Tests for the settlement algorithm."""
+from uuid import uuid4
+
+from app.services.ledger import split_minor, to_minor
+from app.services.settlement import (
+    calculate_settlements, calculate_settlement_balances, calculate_budget_balances
+)
+
+
+class TestLedger:
+    """Test suite for the fixed-point ledger core."""
+
+    def test_to_minor_rounds_half_up(self):
+        """Test conversion is exact for values floats cannot represent."""
+        assert to_minor(0.145) == 15
+        assert to_minor(19.99) == 1999
+        assert to_minor(-2.5) == -250
+        assert to_minor(7) == 700
+
+    def test_split_minor_distributes_remainder(self):
+        """Test leftover paise go to the first participants."""
+        assert split_minor(10000, 3) == [3334, 3333, 3333]
+        assert split_minor(2, 3) == [1, 1, 0]
+        assert split_minor(500, 0) == []
+        assert sum(split_minor(123457, 7)) == 123457
+
+    def test_settlement_balances_sum_to_exactly_zero(self):
+        """Test uneven splits never leak paise."""
+        members = [uuid4() for _ in range(3)]
+        expenses = [
+            {"payer_id": str(members[i % 3]), "participants": [str(m) for m in members], "total_amount": 100.0}
+            for i in range(10)
+        ]
+
+        balances = calculate_settlement_balances(expenses, members)
+
+        assert sum(to_minor(b) for b in balances.values()) == 0
+
+    def test_budget_balances(self):
+        """Test remaining budget only counts what each member paid."""
+        alice, bob = uuid4(), uuid4()
+        expenses = [
+            {"payer_id": alice, "participants": [alice, bob], "total_amount": 0.1},
+            {"payer_id": alice, "participants": [alice, bob], "total_amount": 0.2},
+        ]
+
+        balances = calculate_budget_balances(expenses, [alice, bob], {alice: 1.0, bob: 1.0})
+
+        assert balances[alice] == 0.7
+        assert balances[bob] == 1.0
+
+
+class TestCalculateSettlements:
+    """Test suite for settlement plan generation."""
+
+    def test_no_balances(self):
+        """Test an empty or fully settled team produces no transfers."""
+        assert calculate_settlements({}) == []
+        assert calculate_settlements({uuid4(): 0.0, uuid4(): 0.0}) == []
+
+    def test_single_debtor_single_creditor(self):
+        """Test a simple two-person debt."""
+        alice, bob = uuid4(), uuid4()
+        settlements = calculate_settlements({alice: 100.0, bob: -100.0})
+
+        assert len(settlements) == 1
+        assert settlements[0].from_user == bob
+        assert settlements[0].to_user == alice
+        assert settlements[0].amount == 100.0
+
+    def test_largest_debtor_pays_largest_creditor_first(self):
+        """Test greedy matching starts with the largest amounts."""
+        big_creditor, small_creditor = uuid4(), uuid4()
+        big_debtor, small_debtor = uuid4(), uuid4()
+        balances = {
+            small_creditor: 30.0,
+            big_creditor: 70.0,
+            small_debtor: -40.0,
+            big_debtor: -60.0,
+        }
+
+        settlements = calculate_settlements(balances)
+
+        assert settlements[0].from_user == big_debtor
+        assert settlements[0].to_user == big_creditor
+        assert settlements[0].amount == 60.0
+
+    def test_plan_settles_every_balance(self):
+        """Test applying the plan brings every member back to zero."""
+        members = [uuid4() for _ in range(50)]
+        amounts = [((i * 37) % 101) - 50 for i in range(49)]
+        amounts.append(-sum(amounts))
+        balances = dict(zip(members, [float(a) for a in amounts]))
+
+        settlements = calculate_settlements(balances)
+
+        remaining = dict(balances)
+        for settlement in settlements:
+            remaining[settlement.from_user] += settlement.amount
+            remaining[settlement.to_user] -= settlement.amount
+        assert all(abs(value) < 0.01 for value in remaining.values())
+        assert len(settlements) < len(members)
+
+    def test_no_phantom_transfers(self):
+        """Test a three-way split of 100 does not produce one-paisa transfers."""
+        members = [uuid4() for _ in range(3)]
+        expenses = [{"payer_id": members[0], "participants": members, "total_amount": 100.0}]
+
+        settlements = calculate_settlements(calculate_settlement_balances(expenses, members))
+
+        assert sorted(s.amount for s in settlements) == [33.33, 33.33]
+        assert sum(s.amount_minor for s in settlements) == 6666
@@ -7,6 +7,7 @@ from sqlmodel.pool import StaticPool
 from app.main import app
 from app.core.database import get_session
 from app.models.schemas import SQLModel
+from app.services.expense import ExpenseService
 
 
 def get_auth_headers(token: str) -> dict:
@@ -286,3 +287,97 @@ class TestSummaryEndpoints:
         # Sum of all balances should be ~0 (with floating point tolerance)
         total = sum(balances.values())
         assert abs(total) < 0.01
+
+    def test_get_dashboard(self, client: TestClient, session: Session):
+        """Test the dashboard combines balances, settlements, next payer and budgets."""
+        token = client.post(
+            "/auth/register",
+            json={
+                "email": "user@example.com",
+                "name": "User",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        user_id = client.get("/auth/me", headers=get_auth_headers(token)).json()["id"]
+
+        team_id = client.post(
+            "/teams",
+            json={"name": "Team"},
+            headers=get_auth_headers(token)
+        ).json()["id"]
+        ExpenseService.create_expense(session, team_id, user_id, 120.0, [user_id])
+
+        response = client.get(
+            f"/summary/{team_id}/dashboard",
+            headers=get_auth_headers(token)
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["team_id"] == team_id
+        assert result["settlements"] == []
+        assert result["total_transactions"] == 0
+        assert result["next_payer"]["next_payer_id"] == user_id
+        assert result["balances"][user_id] == result["budget_status"][0]["remaining_budget"]
+        assert result["budget_status"][0]["total_spent"] == 120.0
+
+    def test_get_dashboard_not_member(self, client: TestClient):
+        """Test the dashboard is only visible to team members."""
+        token1 = client.post(
+            "/auth/register",
+            json={
+                "email": "user1@example.com",
+                "name": "User 1",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        team_id = client.post(
+            "/teams",
+            json={"name": "Team"},
+            headers=get_auth_headers(token1)
+        ).json()["id"]
+
+        token2 = client.post(
+            "/auth/register",
+            json={
+                "email": "user2@example.com",
+                "name": "User 2",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+
+        response = client.get(
+            f"/summary/{team_id}/dashboard",
+            headers=get_auth_headers(token2)
+        )
+        assert response.status_code == 403
+
+    def test_dashboard_etag(self, client: TestClient, session: Session):
+        """Test summary endpoints answer 304 for a current ETag, per endpoint."""
+        token = client.post(
+            "/auth/register",
+            json={
+                "email": "user@example.com",
+                "name": "User",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        team_id = client.post(
+            "/teams",
+            json={"name": "Team"},
+            headers=get_auth_headers(token)
+        ).json()["id"]
+
+        dashboard = client.get(f"/summary/{team_id}/dashboard", headers=get_auth_headers(token))
+        balances = client.get(f"/summary/{team_id}/balances", headers=get_auth_headers(token))
+        assert dashboard.headers["ETag"] != balances.headers["ETag"]
+
+        response = client.get(
+            f"/summary/{team_id}/dashboard",
+            headers={**get_auth_headers(token), "If-None-Match": f'W/{dashboard.headers["ETag"]}'}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
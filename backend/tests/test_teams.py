@@ -3,12 +3,13 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, create_engine
 from sqlmodel.pool import StaticPool
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from app.main import app
 from app.core.database import get_session
 from app.models.schemas import SQLModel
 from app.services.auth import AuthService
+from app.services.balance import BalanceService
 
 
 def get_auth_headers(token: str) -> dict:
@@ -133,6 +134,14 @@ class TestTeamEndpoints:
         assert data["name"] == "Test Team"
         assert str(data["id"]) == team_id
 
+    def test_get_team_not_found(self, client: TestClient, auth_token: str):
+        """Test getting a team that does not exist is a 404, not a 403."""
+        response = client.get(
+            f"/teams/{uuid4()}",
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 404
+
     def test_get_team_not_member(self, client: TestClient):
         """Test getting team fails if user is not a member."""
         # Create user 1 and team
@@ -171,6 +180,42 @@ class TestTeamEndpoints:
         )
         assert response.status_code == 403
 
+    def test_membership_check_sees_new_member(self, client: TestClient):
+        """Test a cached non-member result is dropped when the user is added."""
+        token1 = client.post(
+            "/auth/register",
+            json={
+                "email": "user1@example.com",
+                "name": "User 1",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        team_id = client.post(
+            "/teams",
+            json={"name": "User1 Team"},
+            headers=get_auth_headers(token1)
+        ).json()["id"]
+        token2 = client.post(
+            "/auth/register",
+            json={
+                "email": "user2@example.com",
+                "name": "User 2",
+                "password": "pass123!",
+                "auth_provider": "email"
+            }
+        ).json()["access_token"]
+        
+        assert client.get(f"/teams/{team_id}", headers=get_auth_headers(token2)).status_code == 403
+        
+        client.post(
+            f"/teams/{team_id}/invite",
+            params={"email": "user2@example.com"},
+            headers=get_auth_headers(token1)
+        )
+        
+        assert client.get(f"/teams/{team_id}", headers=get_auth_headers(token2)).status_code == 200
+
     def test_invite_member_success(self, client: TestClient, auth_token: str):
         """Test inviting a member to team."""
         # Create team
@@ -267,3 +312,31 @@ class TestTeamEndpoints:
         assert response.status_code == 200
         members = response.json()
         assert len(members) >= 1  # At least the creator
+
+    def test_team_and_profile_updates_bump_ledger_version(
+        self, client: TestClient, session: Session, auth_token: str
+    ):
+        """Test renaming a team or changing a member's profile invalidates cached team responses."""
+        team_id = client.post(
+            "/teams",
+            json={"name": "Test Team"},
+            headers=get_auth_headers(auth_token)
+        ).json()["id"]
+        version = BalanceService.get_version(session, team_id)
+
+        response = client.put(
+            f"/teams/{team_id}",
+            json={"name": "Renamed Team", "trip_budget": 500.0},
+            headers=get_auth_headers(auth_token)
+        )
+        assert response.status_code == 200
+        assert BalanceService.get_version(session, team_id) > version
+        version = BalanceService.get_version(session, team_id)
+
+        AuthService.create_or_update_google_user(session, "testuser@example.com", "Renamed User")
+        assert BalanceService.get_version(session, team_id) > version
+        version = BalanceService.get_version(session, team_id)
+
+        # Signing in again with the same profile leaves cached responses valid
+        AuthService.create_or_update_google_user(session, "testuser@example.com", "Renamed User")
+        assert BalanceService.get_version(session, team_id) == version